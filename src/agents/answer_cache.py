@@ -0,0 +1,128 @@
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, List, Optional
+
+from config.config import Config
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class CachedAnswer:
+    query: str
+    embedding: List[float]
+    answer: str
+    sources: str
+    fingerprint: str
+    created_at: float
+    hits: int = 0
+
+def _normalize(vector: List[float]) -> List[float]:
+    norm = math.sqrt(sum(x * x for x in vector))
+    return [x / norm for x in vector] if norm else list(vector)
+
+class AnswerCache:
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, embed_model, fingerprint: Callable[[], str], threshold: float, ttl_seconds: float,
+                 max_entries: int, fingerprint_check_seconds: float):
+        self.embed_model = embed_model
+        self.fingerprint = fingerprint
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max(1, max_entries)
+        self.fingerprint_check_seconds = fingerprint_check_seconds
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._entries: "OrderedDict[int, CachedAnswer]" = OrderedDict()
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self._current_fingerprint: Optional[str] = None
+        self._fingerprint_checked_at = 0.0
+
+    @classmethod
+    def get_instance(cls) -> "AnswerCache":
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    from config.config_rag import ConfigRag
+                    from indexer.db.db_admin import DBAdmin
+                    cls._instance = cls(
+                        ConfigRag.get_embedding_model(),
+                        fingerprint=DBAdmin().index_fingerprint,
+                        threshold=Config.ANSWER_CACHE_THRESHOLD,
+                        ttl_seconds=Config.ANSWER_CACHE_TTL_SECONDS,
+                        max_entries=Config.ANSWER_CACHE_MAX_ENTRIES,
+                        fingerprint_check_seconds=Config.ANSWER_CACHE_FINGERPRINT_SECONDS,
+                    )
+        return cls._instance
+
+    def _index_fingerprint(self) -> str:
+        # Reading the manifest on every request would cost a round trip; re-ingestion is rare, so poll it
+        now = time.monotonic()
+        if self._current_fingerprint is None or now - self._fingerprint_checked_at >= self.fingerprint_check_seconds:
+            fingerprint = self.fingerprint()
+            with self._lock:
+                if self._current_fingerprint is not None and fingerprint != self._current_fingerprint:
+                    logger.info(f"Index changed, dropping {len(self._entries)} cached answers")
+                    self._entries.clear()
+                    self.invalidations += 1
+                self._current_fingerprint = fingerprint
+                self._fingerprint_checked_at = now
+        return self._current_fingerprint
+
+    def _expired(self, entry: CachedAnswer, now: float) -> bool:
+        return now - entry.created_at > self.ttl_seconds
+
+    def lookup(self, query: str) -> Optional[CachedAnswer]:
+        fingerprint = self._index_fingerprint()
+        embedding = _normalize(self.embed_model.get_query_embedding(query))
+        now = time.time()
+        best_id, best_score = None, -1.0
+        with self._lock:
+            for entry_id, entry in list(self._entries.items()):
+                if self._expired(entry, now) or entry.fingerprint != fingerprint:
+                    del self._entries[entry_id]
+                    continue
+                score = sum(x * y for x, y in zip(embedding, entry.embedding))
+                if score > best_score:
+                    best_id, best_score = entry_id, score
+
+            if best_id is None or best_score < self.threshold:
+                self.misses += 1
+                return None
+            entry = self._entries[best_id]
+            self._entries.move_to_end(best_id)
+            entry.hits += 1
+            self.hits += 1
+        logger.info(f"Answer cache hit ({best_score:.3f}) for '{query}' via '{entry.query}'")
+        return entry
+
+    def store(self, query: str, answer: str, sources: str):
+        fingerprint = self._index_fingerprint()
+        embedding = _normalize(self.embed_model.get_query_embedding(query))
+        with self._lock:
+            self._entries[self._next_id] = CachedAnswer(query, embedding, answer, sources, fingerprint, time.time())
+            self._next_id += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "fingerprint": self._current_fingerprint,
+            }
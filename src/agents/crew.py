@@ -1,11 +1,33 @@
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from crewai import Agent, Crew, Task, Process, LLM
+from crewai.crews.crew_output import CrewOutput
+from crewai.hooks.dispatch import HookAborted
 from crewai.project import CrewBase, agent, task, crew, tool, llm, before_kickoff, after_kickoff
 from crewai.agents.agent_builder.base_agent import BaseAgent
-from typing import List
+from crewai.tasks.task_output import TaskOutput
+from crewai.types.usage_metrics import UsageMetrics
+from typing import Callable, List, Optional
 
 from agents.tools.retriever_reranker import RetrieverRerankerTool
 from agents.tools.conversation import ConversationTool
+from agents.answer_cache import AnswerCache, CachedAnswer
+from agents.fast_guardrail import FastGuardrail, GuardrailVerdict, AMBIGUOUS, BLOCKED, VALID
 from config.config import Config
+from monitoring import metrics
+
+logger = logging.getLogger(__name__)
+
+REJECTION_MESSAGE = ("I apologize, but I cannot process queries related to that topic. "
+                     "Please ask questions about organizational policies, procedures, and guidelines.")
+
+class CrewCancelled(HookAborted):
+    # crewAI retries a task on any other Exception, which would keep a blocked draft calling the LLM;
+    # HookAborted is its deliberate-stop type and skips the retry loop
+    def __init__(self, reason: str):
+        super().__init__(reason, source="guardrail")
 
 @CrewBase
 class PolicyCrew:
@@ -17,6 +39,37 @@ class PolicyCrew:
     
     def __init__(self):
         self.session_data = {}
+        self.cancel_event = threading.Event()
+        self.timings = {}
+        self._background: Optional[Future] = None
+        self._task_started = time.perf_counter()
+        self._draft_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="draft")
+
+    def reset(self):
+        self.session_data = {}
+        self.cancel_event.clear()
+        self.timings = {}
+        self.retriever_reranker().retrieval_params = None
+        # Pooled agents outlive a run; failed attempts must not use up the retries of later runs. crewAI has no
+        # public reset for this counter (tests/test_crew_runs.py pins the behaviour this relies on)
+        for pooled_agent in (self.guardrail_agent(), self.memorized_agent(), self.llm_agent()):
+            pooled_agent._times_executed = 0
+        # A failed or cancelled run leaves its outputs on the tasks; the next pooled user must not see them
+        for pooled_task in (self.guardrail_task(), self.memorized_task(), self.llm_task()):
+            pooled_task.output = None
+            pooled_task.retry_count = 0
+
+    def when_idle(self, callback: Callable[[], None]):
+        # A cancelled draft may still be finishing its current LLM step; the crew is reusable only after it does
+        background = self._background
+        if background is not None and not background.done():
+            background.add_done_callback(lambda _: callback())
+        else:
+            callback()
+
+    def _raise_if_cancelled(self, _step=None):
+        if self.cancel_event.is_set():
+            raise CrewCancelled("Query blocked by guardrail")
 
     @agent
     def guardrail_agent(self) -> Agent:
@@ -30,7 +83,8 @@ class PolicyCrew:
     def memorized_agent(self) -> Agent:
         return Agent(
             config=self.agents_config['memorized_agent'],
-            tools=[self.conversation(), self.retriever_reranker()]
+            tools=[self.conversation(), self.retriever_reranker()],
+            step_callback=self._raise_if_cancelled
         )
 
     @task
@@ -51,7 +105,7 @@ class PolicyCrew:
     
     @tool
     def retriever_reranker(self) -> RetrieverRerankerTool:
-        return RetrieverRerankerTool()
+        return RetrieverRerankerTool(cancel_event=self.cancel_event)
 
     @llm
     def local_llm(self) -> LLM:
@@ -63,15 +117,191 @@ class PolicyCrew:
             timeout=300,
         )
 
+    @llm
+    def stream_llm(self) -> LLM:
+        return LLM(
+            model=f"ollama/{Config.LLM_MODEL_NAME}",
+            base_url=Config.OLLAMA_BASE_URL,
+            temperature=0.1,
+            max_tokens=64000,
+            timeout=300,
+            stream=True,
+        )
+
     @crew
     def crew(self) -> Crew:
         return Crew(
             agents=[self.guardrail_agent(), self.memorized_agent(), self.llm_agent()],
             tasks=[self.guardrail_task(), self.memorized_task(), self.llm_task()],
-            process=Process.sequential,  # async_execution:true enables parallel execution
+            process=Process.sequential,  # async_execution:true enables parallel execution; see kickoff() for the cancellable mode
             verbose=True,
+            task_callback=self._observe_task,
         )
     
+    def kickoff(self, inputs) -> CrewOutput:
+        # Per-request retrieval settings go to the tool; they are not template inputs for the tasks
+        inputs = dict(inputs)
+        retrieval_params = inputs.pop('retrieval_params', None)
+        self.retriever_reranker().retrieval_params = retrieval_params
+
+        verdict = self._fast_guardrail(inputs.get('query', ''))
+        if verdict.verdict == BLOCKED:
+            logger.info(f"Fast guardrail blocked query ({verdict.reason})")
+            self.prepare_inputs(inputs)
+            return self.store_assistant_response(self._rejection_output(None))
+
+        answer_cache = self._answer_cache(inputs) if retrieval_params is None else None
+        # Only a clear fast VALID may skip the LLM guardrail; an ambiguous query near a cached answer still goes to it
+        if answer_cache and verdict.verdict == VALID:
+            cached = self._cache_call(answer_cache.lookup, inputs.get('query', ''))
+            if cached:
+                self.prepare_inputs(inputs)
+                return self.store_assistant_response(self._cached_output(cached))
+
+        if Config.CREW_PARALLEL:
+            result = self._kickoff_parallel(inputs, verdict)
+        elif verdict.verdict == VALID:
+            result = self._kickoff_without_guardrail(inputs)
+        else:
+            self._task_started = time.perf_counter()
+            result = self.crew().kickoff(inputs=inputs)
+
+        if answer_cache and not self._is_blocked(result):
+            self._cache_call(answer_cache.store, inputs.get('query', ''), result.raw, self._draft_sources())
+        return result
+
+    def _draft_sources(self) -> str:
+        # The parallel path's final crew only runs llm_task, so read the retrieval draft from its own task
+        draft = self.memorized_task().output
+        return draft.raw if draft is not None and draft.raw else ""
+
+    def _observe_task(self, output: TaskOutput):
+        # Sequential tasks run back to back, so each one's span runs from the previous task's callback to its own
+        now = time.perf_counter()
+        metrics.observe("crew_task", now - self._task_started, task=output.name or "unnamed")
+        self._task_started = now
+
+    def _answer_cache(self, inputs) -> Optional[AnswerCache]:
+        # Follow-up questions are answered against the conversation history, so only a chat's first turn is cacheable
+        if not Config.ANSWER_CACHE_ENABLED:
+            return None
+        history = ConversationTool().get_conversation_context(inputs.get('chat_id', 'default_chat'), limit=1)
+        if history != "No conversation history found":
+            return None
+        return AnswerCache.get_instance()
+
+    @staticmethod
+    def _cache_call(method, *args):
+        try:
+            return method(*args)
+        except Exception as e:
+            logger.warning(f"Answer cache unavailable: {e}")
+            return None
+
+    def _is_blocked(self, result: CrewOutput) -> bool:
+        return (self.cancel_event.is_set() or result.raw.strip() == REJECTION_MESSAGE
+                or any(output.raw.strip().upper().startswith(BLOCKED) for output in result.tasks_output if output.raw))
+
+    def _cached_output(self, cached: CachedAnswer) -> CrewOutput:
+        memorized_task, llm_task = self.memorized_task(), self.llm_task()
+        tasks_output = [
+            TaskOutput(description=memorized_task.description, name=memorized_task.name,
+                       raw=cached.sources, agent=self.memorized_agent().role),
+            TaskOutput(description=llm_task.description, name=llm_task.name,
+                       raw=cached.answer, agent=self.llm_agent().role),
+        ]
+        return CrewOutput(raw=cached.answer, tasks_output=tasks_output, token_usage=UsageMetrics())
+
+    def _fast_guardrail(self, query: str) -> GuardrailVerdict:
+        if not Config.FAST_GUARDRAIL_ENABLED:
+            return GuardrailVerdict(AMBIGUOUS, reason="fast guardrail disabled")
+        started = time.perf_counter()
+        try:
+            with metrics.timed("fast_guardrail"):
+                verdict = FastGuardrail.get_instance().classify(query)
+        except Exception as e:
+            logger.warning(f"Fast guardrail failed, deferring to LLM guardrail: {e}")
+            verdict = GuardrailVerdict(AMBIGUOUS, reason=str(e))
+        self.timings['fast_guardrail_ms'] = (time.perf_counter() - started) * 1000
+        return verdict
+
+    def _fast_valid_output(self) -> TaskOutput:
+        # llm_task reads the guardrail verdict from its context, so record the fast verdict as that task's output
+        guardrail_task = self.guardrail_task()
+        guardrail_task.output = TaskOutput(description=guardrail_task.description, name=guardrail_task.name,
+                                           raw=VALID, agent=self.guardrail_agent().role)
+        return guardrail_task.output
+
+    def _kickoff_without_guardrail(self, inputs) -> CrewOutput:
+        # Sequential mode with a fast VALID verdict: the LLM guardrail is only for ambiguous queries
+        inputs = self.prepare_inputs(inputs)
+        self._fast_valid_output()
+        self._task_started = time.perf_counter()
+        result = Crew(agents=[self.memorized_agent(), self.llm_agent()], tasks=[self.memorized_task(), self.llm_task()],
+                      process=Process.sequential, verbose=True, task_callback=self._observe_task).kickoff(inputs=inputs)
+        return self.store_assistant_response(result)
+
+    def _kickoff_parallel(self, inputs, fast_verdict: GuardrailVerdict) -> CrewOutput:
+        started = time.perf_counter()
+        inputs = self.prepare_inputs(inputs)
+        
+        draft_crew = Crew(agents=[self.memorized_agent()], tasks=[self.memorized_task()],
+                          process=Process.sequential, verbose=True)
+        self._background = self._draft_executor.submit(self._run_draft, draft_crew, inputs)
+        
+        guardrail_started = time.perf_counter()
+        if fast_verdict.verdict == VALID:
+            guardrail_output = self._fast_valid_output()
+        else:
+            guardrail_crew = Crew(agents=[self.guardrail_agent()], tasks=[self.guardrail_task()],
+                                  process=Process.sequential, verbose=True)
+            try:
+                with metrics.timed("crew_task", task="guardrail_task"):
+                    guardrail_output = guardrail_crew.kickoff(inputs=inputs).tasks_output[0]
+            except Exception:
+                self.cancel_event.set()
+                raise
+        self.timings['guardrail_ms'] = (time.perf_counter() - guardrail_started) * 1000
+        
+        if guardrail_output.raw.strip().upper().startswith(BLOCKED):
+            self.cancel_event.set()
+            result = self._rejection_output(guardrail_output)
+        else:
+            self._background.result()
+            final_started = time.perf_counter()
+            with metrics.timed("crew_task", task="llm_task"):
+                result = Crew(agents=[self.llm_agent()], tasks=[self.llm_task()],
+                              process=Process.sequential, verbose=True).kickoff(inputs=inputs)
+            self.timings['final_ms'] = (time.perf_counter() - final_started) * 1000
+        
+        self.timings['total_ms'] = (time.perf_counter() - started) * 1000
+        outcome = "blocked" if self.cancel_event.is_set() else "valid"
+        stages = ", ".join(f"{name}={value:.0f}" for name, value in self.timings.items())
+        logger.info(f"Parallel crew run ({outcome}): {stages}")
+        return self.store_assistant_response(result)
+
+    def _run_draft(self, draft_crew: Crew, inputs):
+        draft_started = time.perf_counter()
+        try:
+            with metrics.timed("crew_task", task="memorized_task"):
+                return draft_crew.kickoff(inputs=inputs)
+        except CrewCancelled:
+            logger.info("Retrieval draft cancelled by guardrail")
+            return None
+        except Exception:
+            if self.cancel_event.is_set():
+                return None
+            raise
+        finally:
+            self.timings['draft_ms'] = (time.perf_counter() - draft_started) * 1000
+
+    def _rejection_output(self, guardrail_output: Optional[TaskOutput]) -> CrewOutput:
+        llm_task = self.llm_task()
+        rejection = TaskOutput(description=llm_task.description, name=llm_task.name,
+                               raw=REJECTION_MESSAGE, agent=self.llm_agent().role)
+        tasks_output = ([guardrail_output] if guardrail_output else []) + [rejection]
+        return CrewOutput(raw=REJECTION_MESSAGE, tasks_output=tasks_output, token_usage=UsageMetrics())
+
     @before_kickoff
     def prepare_inputs(self, inputs):
         chat_id = inputs.get('chat_id', 'default_chat')
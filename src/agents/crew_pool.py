@@ -0,0 +1,64 @@
+import logging
+import queue
+import threading
+from contextlib import contextmanager
+from typing import Callable
+
+from agents.crew import PolicyCrew
+
+logger = logging.getLogger(__name__)
+
+class CrewPool:
+    def __init__(self, size: int, factory: Callable[[], PolicyCrew] = PolicyCrew):
+        self.size = max(1, size)
+        self.factory = factory
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self.created = 0
+        self.reused = 0
+        self.waited = 0
+
+    def warm(self):
+        while self._reserve():
+            self._idle.put(self.factory())
+        logger.info(f"Crew pool warmed with {self._idle.qsize()} crews")
+
+    def _reserve(self) -> bool:
+        # Never more than size crews: crewAI's memoize cache keeps every crew, its agents and its draft
+        # executor alive for the life of the process, so crews built past the pool could never be freed
+        with self._lock:
+            if self.created >= self.size:
+                return False
+            self.created += 1
+            return True
+
+    @contextmanager
+    def acquire(self):
+        # A crew is owned by exactly one run at a time, so its session state cannot leak across chats
+        try:
+            policy_crew = self._idle.get_nowait()
+        except queue.Empty:
+            if self._reserve():
+                policy_crew = self.factory()
+            else:
+                # Every crew is busy, e.g. a cancelled draft finishing its LLM step; wait for one to come back
+                with self._lock:
+                    self.waited += 1
+                policy_crew = self._idle.get()
+                with self._lock:
+                    self.reused += 1
+        else:
+            with self._lock:
+                self.reused += 1
+        try:
+            yield policy_crew
+        finally:
+            policy_crew.when_idle(lambda: self._release(policy_crew))
+
+    def _release(self, policy_crew: PolicyCrew):
+        policy_crew.reset()
+        self._idle.put(policy_crew)
+
+    def stats(self) -> dict:
+        return {"size": self.size, "idle": self._idle.qsize(), "created": self.created, "reused": self.reused,
+                "waited": self.waited}
@@ -0,0 +1,159 @@
+import logging
+import math
+import re
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import yaml
+
+from config.config import Config
+
+logger = logging.getLogger(__name__)
+
+BLOCKED = "BLOCKED"
+VALID = "VALID"
+AMBIGUOUS = "AMBIGUOUS"
+
+AGENTS_CONFIG = Path(__file__).parent / "agents.yaml"
+
+# Synonyms the agents.yaml list does not spell out. They are not part of the reviewed blocked-topic list and
+# several occur in legitimate policy questions ("political activity policy", "explosive materials storage",
+# "reporting stolen equipment"), so they only ever defer to the LLM
+EXTRA_TERMS = {
+    "Politics": ["political", "politician", "politicians", "electoral"],
+    "Sexual content": ["porn", "pornographic", "nude", "nudity"],
+    "War": ["gun", "guns", "firearm", "firearms", "missile", "missiles"],
+    "Crime": ["steal", "robbery", "smuggling"],
+    "Terrorism": ["terrorist", "terrorists", "explosive", "bomb"],
+    "Hate speech": ["racist", "slur", "slurs"],
+}
+
+# Terms from the blocked-topic list that also occur in legitimate HR/policy questions
+# ("anti-discrimination policy", "drug testing", "workplace violence", "explosives storage") only defer to the LLM
+WEAK_TERMS = {"discrimination", "crime", "violence", "drugs", "illegal activities", "explosives"} | {
+    term for terms in EXTRA_TERMS.values() for term in terms
+}
+
+POLICY_ANCHOR = ("Organizational policies, procedures and guidelines: human resources bylaws, procurement "
+                 "standards and manuals, suppliers, purchase orders, information security controls")
+
+@dataclass
+class GuardrailVerdict:
+    verdict: str
+    topic: Optional[str] = None
+    reason: str = ""
+    score: float = 0.0
+
+    @property
+    def message(self) -> str:
+        if self.verdict == BLOCKED:
+            return f"BLOCKED: Query contains inappropriate content about {self.topic}"
+        return self.verdict
+
+def _cosine(a: List[float], b: List[float]) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+def _term_pattern(term: str) -> str:
+    words = [re.escape(word) for word in term.lower().split()]
+    # Allow a plural/singular swap on the last word only; prefixes like "war" must not match "warranty"
+    last = words[-1]
+    if last.endswith("ies"):
+        words[-1] = f"{last[:-3]}(?:y|ies)"
+    else:
+        stem = last[:-1] if last.endswith("s") and len(last) > 3 else last
+        words[-1] = f"{stem}(?:s|es)?"
+    return r"\b" + r"\s+".join(words) + r"\b"
+
+class FastGuardrail:
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, topics: Dict[str, List[str]], embed_model=None,
+                 block_threshold: float = Config.FAST_GUARDRAIL_BLOCK_THRESHOLD,
+                 valid_threshold: float = Config.FAST_GUARDRAIL_VALID_THRESHOLD,
+                 valid_margin: float = Config.FAST_GUARDRAIL_VALID_MARGIN):
+        self.topics = topics
+        self.embed_model = embed_model
+        self.block_threshold = block_threshold
+        self.valid_threshold = valid_threshold
+        self.valid_margin = valid_margin
+        self._strong = []
+        self._weak = []
+        for topic, terms in topics.items():
+            for term in terms:
+                target = self._weak if term.lower() in WEAK_TERMS else self._strong
+                target.append((topic, re.compile(_term_pattern(term), re.IGNORECASE)))
+        self._topic_embeddings: Optional[Dict[str, List[float]]] = None
+        self._policy_embedding: Optional[List[float]] = None
+        self._embed_lock = threading.Lock()
+
+    @classmethod
+    def get_instance(cls) -> "FastGuardrail":
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    embed_model = None
+                    if Config.FAST_GUARDRAIL_EMBEDDINGS:
+                        from config.config_rag import ConfigRag
+                        embed_model = ConfigRag.get_embedding_model()
+                    cls._instance = cls(cls.load_topics(), embed_model=embed_model)
+        return cls._instance
+
+    @staticmethod
+    def load_topics(path: Path = AGENTS_CONFIG) -> Dict[str, List[str]]:
+        backstory = yaml.safe_load(path.read_text(encoding="utf-8"))["guardrail_agent"]["backstory"]
+        # The backstory is a folded scalar, so the bullet list arrives as one "- a, b - c, d" line;
+        # a literal block keeps one bullet per line instead
+        lines = backstory.split("BLOCKED TOPICS", 1)[1].split(":", 1)[1].split("\n")
+        if lines[0].strip():
+            section = lines[0]
+        else:
+            bullets = []
+            for line in lines[1:]:
+                if not line.strip().startswith("-"):
+                    break
+                bullets.append(line.strip())
+            section = " ".join(bullets)
+        topics = {}
+        for bullet in re.split(r"(?:^|\s)-\s+", section.strip()):
+            terms = [term.strip() for term in bullet.split(",") if term.strip()]
+            if terms:
+                topics[terms[0]] = terms + EXTRA_TERMS.get(terms[0], [])
+        return topics
+
+    def _ensure_embeddings(self):
+        if self._topic_embeddings is not None:
+            return
+        with self._embed_lock:
+            if self._topic_embeddings is None:
+                names = list(self.topics)
+                texts = [", ".join(self.topics[name]) for name in names]
+                vectors = self.embed_model.get_text_embedding_batch(texts + [POLICY_ANCHOR])
+                self._policy_embedding = vectors[-1]
+                self._topic_embeddings = dict(zip(names, vectors[:-1]))
+
+    def classify(self, query: str) -> GuardrailVerdict:
+        for topic, pattern in self._strong:
+            if pattern.search(query):
+                return GuardrailVerdict(BLOCKED, topic, f"keyword '{pattern.search(query).group(0)}'", 1.0)
+
+        weak_topic = next((topic for topic, pattern in self._weak if pattern.search(query)), None)
+        if self.embed_model is None:
+            return GuardrailVerdict(AMBIGUOUS, weak_topic, "no embedding check configured")
+
+        self._ensure_embeddings()
+        query_embedding = self.embed_model.get_query_embedding(query)
+        topic, blocked_sim = max(((name, _cosine(query_embedding, vector))
+                                  for name, vector in self._topic_embeddings.items()), key=lambda x: x[1])
+        policy_sim = _cosine(query_embedding, self._policy_embedding)
+
+        if blocked_sim >= self.block_threshold:
+            return GuardrailVerdict(BLOCKED, topic, f"similar to blocked topic ({blocked_sim:.2f})", blocked_sim)
+        if weak_topic is None and (blocked_sim < self.valid_threshold or policy_sim - blocked_sim >= self.valid_margin):
+            return GuardrailVerdict(VALID, None, f"policy {policy_sim:.2f} vs blocked {blocked_sim:.2f}", blocked_sim)
+        return GuardrailVerdict(AMBIGUOUS, weak_topic or topic,
+                                f"policy {policy_sim:.2f} vs blocked {blocked_sim:.2f}", blocked_sim)
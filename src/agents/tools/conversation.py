@@ -5,6 +5,7 @@ import psycopg2
 
 from config.config import Config
 from indexer.db.db_admin import DBAdmin
+from monitoring import metrics
 
 class ConversationInput(BaseModel):
     chat_id: str = Field(description="Chat session ID to retrieve or store messages")
@@ -29,12 +30,13 @@ class ConversationTool(BaseTool):
             context = self.get_conversation_context(chat_id, limit=limit)
             
             if message:
-                DBAdmin.execute_query([
-                    ("INSERT INTO chat_sessions (chat_id) VALUES (%s) ON CONFLICT (chat_id) DO NOTHING", 
-                     (chat_id,)),
-                    ("INSERT INTO chat_messages (chat_id, message, role) VALUES (%s, %s, %s)",
-                     (chat_id, message, role))
-                ])
+                with metrics.timed("conversation_write"):
+                    DBAdmin.execute_query([
+                        ("INSERT INTO chat_sessions (chat_id) VALUES (%s) ON CONFLICT (chat_id) DO NOTHING", 
+                         (chat_id,)),
+                        ("INSERT INTO chat_messages (chat_id, message, role) VALUES (%s, %s, %s)",
+                         (chat_id, message, role))
+                    ])
                 return f"{context}\n{role}: {message}" if context != "No conversation history found" else f"{role}: {message}"
             
             return context
@@ -44,18 +46,20 @@ class ConversationTool(BaseTool):
         
     def store_assistant_response(self, response: str) -> str:
         try:
-            DBAdmin.execute_query([
-                ("INSERT INTO chat_messages (chat_id, message, role) VALUES (%s, %s, %s)",
-                 (self.default_chat_id, response, 'assistant'))
-            ])
+            with metrics.timed("conversation_write"):
+                DBAdmin.execute_query([
+                    ("INSERT INTO chat_messages (chat_id, message, role) VALUES (%s, %s, %s)",
+                     (self.default_chat_id, response, 'assistant'))
+                ])
             return "Stored"
         except Exception as e:
             return f"Error: {str(e)}"
     
     def get_conversation_context(self, chat_id: str, limit: int = 10) -> str:
-        results = DBAdmin.execute_query([
-            ("SELECT role, message FROM chat_messages WHERE chat_id = %s ORDER BY created_at DESC LIMIT %s",
-             (chat_id, limit))
-        ], fetch=True)
+        with metrics.timed("conversation_read"):
+            results = DBAdmin.execute_query([
+                ("SELECT role, message FROM chat_messages WHERE chat_id = %s ORDER BY created_at DESC LIMIT %s",
+                 (chat_id, limit))
+            ], fetch=True)
         messages = results[0] if results else []
         return "\n".join(f"{role}: {msg}" for role, msg in reversed(messages)) or "No conversation history found"
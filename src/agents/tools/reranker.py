@@ -1,57 +1,97 @@
+import logging
 from crewai.tools import BaseTool
 from pydantic import BaseModel, Field
-from typing import Union, List, Dict, Any
+from typing import Union, List, Dict, Any, Optional
+
+from config.config import Config
+from monitoring import metrics
+from retriever.reranker import CrossEncoderReranker
+from retriever.retriever import RetrievedChunk
+
+logger = logging.getLogger(__name__)
 
 class RerankerInput(BaseModel):
     documents: Union[str, List[Dict[str, Any]]] = Field(description="Retrieved documents to re-rank")
+    query: Optional[str] = Field(default=None, description="Query the documents are ranked against")
 
 class RerankerTool(BaseTool):
     name: str = "reranker"
     description: str = "Re-ranks retrieved documents by relevance score"
     args_schema: type[BaseModel] = RerankerInput
-    
-    def _run(self, documents) -> str:
+    top_n: int = Field(default=Config.RERANK_TOP_N, exclude=True)
+    cross_encoder: Optional[Any] = Field(default=None, exclude=True)
+
+    def __init__(self, top_n: int = Config.RERANK_TOP_N, cross_encoder: Optional[CrossEncoderReranker] = None):
+        super().__init__()
+        self.top_n = top_n
+        if cross_encoder is None and Config.RERANKER_ENABLED:
+            cross_encoder = CrossEncoderReranker(top_n=top_n)
+        self.cross_encoder = cross_encoder
+
+    def _run(self, documents, query: Optional[str] = None) -> str:
         try:
-            if not isinstance(documents, str):
-                documents = str(documents)
-            
-            doc_sections = documents.split("--- Source Document")
-            docs = [self._parse(s) for s in doc_sections[1:] if s.strip()]
-            docs = [d for d in docs if d]
-            
-            if not docs:
+            chunks = self.rerank(self._to_chunks(documents), query=query)
+            if not chunks:
                 return "No documents found"
-            
-            docs.sort(key=lambda x: x['score'], reverse=True)
-            top_doc = docs[0]
-            
-            result = f"Document: {top_doc['name']}"
-            if top_doc.get('page') and top_doc['page'] != 'N/A':
-                result += f"\nPage: {top_doc['page']}"
-            result += f"\n\n{top_doc['content']}"
-            
-            return result
+            return self.format_all(chunks)
         except Exception as e:
             return f"Error: {str(e)}"
-    
+
+    def rerank(self, chunks: List[RetrievedChunk], query: Optional[str] = None) -> List[RetrievedChunk]:
+        if query and self.cross_encoder is not None:
+            try:
+                with metrics.timed("rerank"):
+                    return self.cross_encoder.rerank(query, chunks, top_n=self.top_n)
+            except Exception as e:
+                # A missing or broken model must not take retrieval down; fall back to the retriever's ranking
+                logger.warning(f"Cross-encoder rerank failed, using retrieval scores: {e}")
+        return sorted(chunks, key=lambda chunk: chunk.score, reverse=True)[:self.top_n]
+
+    @classmethod
+    def format_all(cls, chunks: List[RetrievedChunk]) -> str:
+        return "\n\n".join(cls.format(chunk) for chunk in chunks)
+
+    @staticmethod
+    def format(chunk: RetrievedChunk) -> str:
+        result = f"Document: {chunk.doc_name}"
+        if chunk.page and chunk.page != 'N/A':
+            result += f"\nPage: {chunk.page}"
+        result += f"\n\n{chunk.text.strip()}"
+        return result
+
+    def _to_chunks(self, documents) -> List[RetrievedChunk]:
+        if isinstance(documents, str):
+            # Agents may still hand over the formatted text of Retriever.search
+            sections = documents.split("--- Source Document ---")
+            return [chunk for chunk in (self._parse(s) for s in sections[1:] if s.strip()) if chunk]
+        chunks = []
+        for document in documents:
+            if isinstance(document, RetrievedChunk):
+                chunks.append(document)
+            elif isinstance(document, dict) and 'content' in document:
+                chunks.append(RetrievedChunk(
+                    node_id=document.get('node_id', ''),
+                    score=float(document.get('score', 0.0)),
+                    text=document['content'],
+                    metadata={'doc_source': document.get('name'), 'page_number': document.get('page', 'N/A')},
+                ))
+        return chunks
+
     def _parse(self, section: str):
-        doc = {}
-        lines = section.strip().split('\n')
-        
-        for line in lines:
-            line = line.strip()
-            if line.startswith('Document:'):
-                doc['name'] = line.replace('Document:', '').strip()
-            elif line.startswith('Page:'):
-                doc['page'] = line.replace('Page:', '').strip()
-            elif line.startswith('Relevance Score:'):
-                try:
-                    doc['score'] = float(line.replace('Relevance Score:', '').strip())
-                except (ValueError, TypeError):
-                    doc['score'] = 0.0
-            elif line.startswith('Content:'):
-                content_start = section.find('Content:')
-                if content_start != -1:
-                    doc['content'] = section[content_start + 8:].strip()
-        
-        return doc if all(k in doc for k in ['name', 'content', 'score']) else None
+        # Header lines come first and "Content:" is the last field, so everything after it is chunk text,
+        # even when the text itself contains "Document:" or "Content:"
+        header, marker, content = section.partition('Content:')
+        if not marker:
+            return None
+        fields = {}
+        for line in header.strip().split('\n'):
+            key, _, value = line.strip().partition(':')
+            fields[key] = value.strip()
+        if 'Document' not in fields or 'Relevance Score' not in fields:
+            return None
+        try:
+            score = float(fields['Relevance Score'])
+        except (ValueError, TypeError):
+            score = 0.0
+        return RetrievedChunk(node_id='', score=score, text=content.strip(),
+                              metadata={'doc_source': fields['Document'], 'page_number': fields.get('Page', 'N/A')})
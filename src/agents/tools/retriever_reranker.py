@@ -1,9 +1,10 @@
 from crewai.tools import BaseTool
 from pydantic import BaseModel, Field
+from typing import Any, Optional
 
 from agents.tools.conversation import ConversationTool
 from agents.tools.reranker import RerankerTool
-from retriever.retriever import Retriever
+from retriever.retriever import Retriever, RetrievalParams
 
 
 class RetrieverRerankerInput(BaseModel):
@@ -15,12 +16,22 @@ class RetrieverRerankerTool(BaseTool):
     name: str = "retriever_reranker"
     description: str = "Retrieve relevant documents using chat context memory"
     args_schema: type[BaseModel] = RetrieverRerankerInput
+    cancel_event: Optional[Any] = Field(default=None, exclude=True)
+    retrieval_params: Optional[RetrievalParams] = Field(default=None, exclude=True)
+    
+    def _cancelled(self) -> bool:
+        return self.cancel_event is not None and self.cancel_event.is_set()
     
     def _run(self, query: str, chat_id: str) -> str:
-        retriever = Retriever()
-        retrieved = retriever.search(query)
-        
+        if self._cancelled():
+            return "Cancelled: query blocked by guardrail"
+        retriever = Retriever.get_instance()
         reranker = RerankerTool()
-        reranked = reranker._run(documents=retrieved)
+        chunks = retriever.retrieve(query, params=self.retrieval_params)
+        
+        reranked = reranker.rerank(chunks, query=query)
+        if not reranked:
+            return "No documents found"
         
-        return reranked
+        # The only place chunk text is rendered for the LLM prompt
+        return RerankerTool.format_all(reranked)
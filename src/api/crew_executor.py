@@ -0,0 +1,51 @@
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+logger = logging.getLogger(__name__)
+
+class ExecutorSaturatedError(Exception):
+    pass
+
+class CrewExecutor:
+    def __init__(self, max_concurrency: int, max_queue: int):
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_queue = max(0, max_queue)
+        self.pending = 0
+        self.rejected = 0
+        self.completed = 0
+        self._pool = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="crew")
+
+    @property
+    def queue_depth(self) -> int:
+        return max(0, self.pending - self.max_concurrency)
+
+    def submit(self, fn, *args, **kwargs) -> asyncio.Future:
+        # Called on the event loop thread only, so the counters need no lock
+        if self.pending >= self.max_concurrency + self.max_queue:
+            self.rejected += 1
+            raise ExecutorSaturatedError(
+                f"{self.pending} requests in flight, queue limit {self.max_queue} reached"
+            )
+        self.pending += 1
+        future = asyncio.get_running_loop().run_in_executor(self._pool, partial(fn, *args, **kwargs))
+        future.add_done_callback(self._done)
+        return future
+
+    def _done(self, _future):
+        self.pending -= 1
+        self.completed += 1
+
+    def stats(self) -> dict:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "running": min(self.pending, self.max_concurrency),
+            "queued": self.queue_depth,
+            "completed": self.completed,
+            "rejected": self.rejected,
+        }
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
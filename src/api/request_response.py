@@ -1,4 +1,4 @@
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional
 from pydantic import BaseModel
 
 class ChatMessage(BaseModel):
@@ -13,6 +13,8 @@ class ChatCompletionRequest(BaseModel):
     stream: Optional[bool] = False
     chat_id: Optional[str] = None
     citations: Optional[bool] = False
+    progress: Optional[bool] = False
+    retrieval: Optional[Dict[str, Any]] = None
 
 class ChatCompletionResponse(BaseModel):
     id: str
@@ -1,13 +1,22 @@
-import os, sys, uuid, json, logging, re
+import os, sys, uuid, json, logging, re, asyncio
+from contextlib import asynccontextmanager
 from datetime import datetime
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
+from fastapi.responses import Response, StreamingResponse
 import uvicorn
 from phoenix.otel import register
 
-from agents.crew import PolicyCrew
+from agents.answer_cache import AnswerCache
+from agents.crew_pool import CrewPool
+from api.crew_executor import CrewExecutor, ExecutorSaturatedError
 from api.request_response import ChatCompletionRequest
+from api.streaming import CrewStream
+from config.config import Config
+from indexer.db.db_admin import DBAdmin
+from monitoring import metrics
+from retriever.reranker import CrossEncoderReranker
+from retriever.retriever import Retriever, RetrievalParams
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
@@ -21,7 +30,38 @@ tracer_provider = register(
 )
 logging.info(f"Phoenix tracing initialized at {phoenix_endpoint}")
 
-app = FastAPI(title="Policy RAG API", version="1.0.0")
+crew_executor = CrewExecutor(Config.API_MAX_CONCURRENCY, Config.API_MAX_QUEUE)
+crew_pool = CrewPool(Config.CREW_POOL_SIZE)
+
+def warm_up_retriever():
+    try:
+        Retriever.get_instance().warm_up()
+    except Exception as e:
+        logging.error(f"Retriever warm-up failed: {e}")
+
+def warm_up_reranker():
+    if not Config.RERANKER_ENABLED:
+        return
+    try:
+        CrossEncoderReranker().warm_up()
+    except Exception as e:
+        logging.error(f"Reranker warm-up failed: {e}")
+
+def warm_up_crew_pool():
+    crew_pool.warm()
+
+def stop_crew_executor():
+    crew_executor.shutdown()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    warm_up_retriever()
+    warm_up_reranker()
+    warm_up_crew_pool()
+    yield
+    stop_crew_executor()
+
+app = FastAPI(title="Policy RAG API", version="1.0.0", lifespan=lifespan)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -30,7 +70,17 @@ app.add_middleware(
     allow_headers=["*"]
 )
 
-crew_instance = PolicyCrew()
+def run_crew(inputs: dict, stream: CrewStream = None):
+    with crew_pool.acquire() as policy_crew:
+        if stream:
+            tasks = [policy_crew.guardrail_task(), policy_crew.memorized_task(), policy_crew.llm_task()]
+            stream.watch(tasks, policy_crew.stream_llm())
+        try:
+            with metrics.timed("crew_run"):
+                return policy_crew.kickoff(inputs)
+        finally:
+            if stream:
+                stream.close()
 
 def extract_pga4_session_from_cookie(cookie_header: str) -> str:
     if not cookie_header:
@@ -58,13 +108,23 @@ async def chat_completions(body: ChatCompletionRequest, request: Request):
             raise HTTPException(status_code=400, detail="No user message found")
         
         flow_inputs = {'query': user_message, 'chat_id': chat_id}
+        if body.retrieval:
+            try:
+                flow_inputs['retrieval_params'] = RetrievalParams.from_overrides(body.retrieval)
+            except (TypeError, ValueError) as e:
+                raise HTTPException(status_code=400, detail=f"Invalid retrieval parameters: {e}")
         response_id = f"chatcmpl-{uuid.uuid4().hex[:29]}"
         created_timestamp = int(datetime.now().timestamp())
         
-        def generate_stream():
-            result = crew_instance.crew().kickoff(inputs=flow_inputs)
-            response_text = result.raw if hasattr(result, 'raw') and result.raw else str(result)
-            
+        stream = CrewStream(asyncio.get_running_loop(), progress=bool(body.progress)) if body.stream else None
+        try:
+            pending_result = crew_executor.submit(run_crew, flow_inputs, stream)
+        except ExecutorSaturatedError as e:
+            logging.warning(f"Rejecting chat_id {chat_id}: {e}")
+            raise HTTPException(status_code=503, detail="Server busy, retry shortly",
+                                headers={"Retry-After": "5"})
+        
+        def chunk(delta: dict, finish_reason: str = None) -> str:
             data = {
                 "id": response_id,
                 "object": "chat.completion.chunk",
@@ -72,10 +132,28 @@ async def chat_completions(body: ChatCompletionRequest, request: Request):
                 "model": body.model,
                 "choices": [{
                     "index": 0,
-                    "delta": {"role": "assistant", "content": response_text}
+                    "delta": delta,
+                    **({"finish_reason": finish_reason} if finish_reason else {})
                 }]
             }
-            yield f"data: {json.dumps(data)}\n\n"
+            return f"data: {json.dumps(data)}\n\n"
+        
+        async def generate_stream():
+            if not stream:
+                result = await pending_result
+                response_text = result.raw if hasattr(result, 'raw') and result.raw else str(result)
+                yield chunk({"role": "assistant", "content": response_text})
+                yield "data: [DONE]\n\n"
+                return
+            
+            first = True
+            async for kind, payload in stream.events(pending_result):
+                if kind == "progress":
+                    yield f"event: progress\ndata: {json.dumps(payload)}\n\n"
+                    continue
+                yield chunk({"role": "assistant", "content": payload} if first else {"content": payload})
+                first = False
+            yield chunk({}, finish_reason="stop")
             yield "data: [DONE]\n\n"
         
         return StreamingResponse(
@@ -87,9 +165,27 @@ async def chat_completions(body: ChatCompletionRequest, request: Request):
                 "Content-Type": "text/event-stream"
             }
         )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
 
+@app.get("/health")
+async def health():
+    try:
+        status = Retriever.get_instance().health()
+    except Exception as e:
+        raise HTTPException(status_code=503, detail={"status": "error", "last_error": str(e)})
+    if status["status"] != "ok":
+        raise HTTPException(status_code=503, detail=status)
+    return {"status": "ok", "retriever": status, "db_pool": DBAdmin.pool_stats(), "crew_executor": crew_executor.stats(),
+            "crew_pool": crew_pool.stats(),
+            "answer_cache": AnswerCache.get_instance().stats() if Config.ANSWER_CACHE_ENABLED else None}
+
+@app.get("/metrics")
+async def get_metrics():
+    return Response(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
 @app.get("/v1/models")
 async def get_models():
     return {
@@ -0,0 +1,127 @@
+import asyncio
+import logging
+import threading
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+
+try:
+    from crewai.events import crewai_event_bus, LLMStreamChunkEvent, TaskStartedEvent, TaskCompletedEvent
+except ImportError:
+    from crewai.utilities.events import crewai_event_bus, LLMStreamChunkEvent, TaskStartedEvent, TaskCompletedEvent
+
+logger = logging.getLogger(__name__)
+
+FINAL_ANSWER_MARKER = "Final Answer:"
+
+TASK_STAGES = {
+    "guardrail_task": "guardrail",
+    "memorized_task": "retrieval",
+    "llm_task": "generation",
+}
+
+# The event bus is process-wide, so events are routed to the stream that owns the emitting LLM or task
+_streams: Dict[int, "CrewStream"] = {}
+_streams_lock = threading.Lock()
+_handlers_registered = False
+
+def _route(source) -> Optional["CrewStream"]:
+    with _streams_lock:
+        return _streams.get(id(source))
+
+def _register_handlers():
+    global _handlers_registered
+    with _streams_lock:
+        if _handlers_registered:
+            return
+        _handlers_registered = True
+
+    @crewai_event_bus.on(LLMStreamChunkEvent)
+    def on_chunk(source, event):
+        stream = _route(source)
+        if stream:
+            stream.on_chunk(event.chunk)
+
+    @crewai_event_bus.on(TaskStartedEvent)
+    def on_task_started(source, event):
+        stream = _route(source)
+        if stream:
+            stream.on_progress(source, "started")
+
+    @crewai_event_bus.on(TaskCompletedEvent)
+    def on_task_completed(source, event):
+        stream = _route(source)
+        if stream:
+            stream.on_progress(source, "completed")
+
+class FinalAnswerFilter:
+    def __init__(self):
+        self._buffer = ""
+        self._open = False
+
+    def feed(self, text: str) -> str:
+        # Agents emit "Thought: ... Final Answer: <answer>"; only the answer is forwarded to the client
+        if self._open:
+            return text
+        self._buffer += text
+        marker_at = self._buffer.find(FINAL_ANSWER_MARKER)
+        if marker_at == -1:
+            return ""
+        self._open = True
+        return self._buffer[marker_at + len(FINAL_ANSWER_MARKER):].lstrip()
+
+class CrewStream:
+    def __init__(self, loop: asyncio.AbstractEventLoop, progress: bool = False):
+        self.loop = loop
+        self.progress = progress
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.streamed = False
+        self._filter = FinalAnswerFilter()
+        self._stages: Dict[int, str] = {}
+        self._watched = []
+
+    def watch(self, tasks, stream_llm):
+        _register_handlers()
+        self._stages = {id(task): TASK_STAGES.get(getattr(task, "name", None), getattr(task, "name", "task"))
+                        for task in tasks}
+        self._watched = [stream_llm] + list(tasks)
+        with _streams_lock:
+            for source in self._watched:
+                _streams[id(source)] = self
+
+    def close(self):
+        with _streams_lock:
+            for source in self._watched:
+                if _streams.get(id(source)) is self:
+                    del _streams[id(source)]
+        self._watched = []
+
+    def on_chunk(self, chunk: str):
+        text = self._filter.feed(chunk or "")
+        if text:
+            self.loop.call_soon_threadsafe(self.queue.put_nowait, ("token", text))
+
+    def on_progress(self, task, status: str):
+        if self.progress:
+            stage = self._stages.get(id(task), "task")
+            self.loop.call_soon_threadsafe(self.queue.put_nowait, ("progress", {"stage": stage, "status": status}))
+
+    async def events(self, pending: asyncio.Future) -> AsyncIterator[Tuple[str, Any]]:
+        while True:
+            getter = asyncio.ensure_future(self.queue.get())
+            done, _ = await asyncio.wait({getter, pending}, return_when=asyncio.FIRST_COMPLETED)
+            if getter in done:
+                kind, payload = getter.result()
+                self.streamed = self.streamed or kind == "token"
+                yield kind, payload
+                continue
+            getter.cancel()
+            break
+
+        while not self.queue.empty():
+            kind, payload = self.queue.get_nowait()
+            self.streamed = self.streamed or kind == "token"
+            yield kind, payload
+
+        result = pending.result()
+        if not self.streamed:
+            # The model never produced the final-answer marker in stream; fall back to the complete output
+            yield "token", result.raw if hasattr(result, 'raw') and result.raw else str(result)
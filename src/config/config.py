@@ -14,12 +14,97 @@ class Config:
     DPASSWORD = os.getenv("DPASSWORD", "password")
     TABLE_NAME = os.getenv("TABLE_NAME", "data_llamaindex")
     DOCSTORE_TABLE = os.getenv("DOCSTORE_TABLE", "data_docstore")
+    MANIFEST_TABLE = os.getenv("MANIFEST_TABLE", "data_ingest_manifest")
+    CHUNKS_TABLE = os.getenv("CHUNKS_TABLE", "data_ingest_chunks")
+    # Blue/green index versions: pointer table, versions kept for rollback, how long readers cache the pointer
+    INDEX_VERSIONS_TABLE = os.getenv("INDEX_VERSIONS_TABLE", "data_index_versions")
+    INDEX_VERSIONS_KEEP = int(os.getenv("INDEX_VERSIONS_KEEP", "2"))
+    INDEX_POINTER_TTL_SECONDS = float(os.getenv("INDEX_POINTER_TTL_SECONDS", "5"))
+    
+    DB_POOL_MIN = int(os.getenv("DB_POOL_MIN", "1"))
+    DB_POOL_MAX = int(os.getenv("DB_POOL_MAX", "10"))
+    DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "5.0"))
+    DB_POOL_HEALTH_CHECK_SECONDS = float(os.getenv("DB_POOL_HEALTH_CHECK_SECONDS", "30"))
     
     @classmethod
     def get_durl(cls):
         return f"postgresql://{cls.DUSER}:{cls.DPASSWORD}@{cls.DHOST}:{cls.DPORT}/{cls.DNAME}"
     
+    CHUNKER = os.getenv("CHUNKER", "policy")
+    CHUNK_MAX_TOKENS = int(os.getenv("CHUNK_MAX_TOKENS", "600"))
+
     OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
     EMBEDDING_MODEL_NAME = os.getenv("EMBEDDING_MODEL")
     EMBEDDING_DIM = int(os.getenv("EMBEDDING_MODEL_DIM"))
     LLM_MODEL_NAME = os.getenv("LLM_MODEL", "gemma3:12b")
+
+    RERANKER_ENABLED = os.getenv("RERANKER_ENABLED", "true").lower() == "true"
+    RERANKER_MODEL = os.getenv("RERANKER_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2")
+    RERANK_CANDIDATES = int(os.getenv("RERANK_CANDIDATES", "20"))
+    RERANK_TOP_N = int(os.getenv("RERANK_TOP_N", "3"))
+    RERANK_BUDGET_MS = float(os.getenv("RERANK_BUDGET_MS", "300"))
+    RERANK_BATCH_SIZE = int(os.getenv("RERANK_BATCH_SIZE", "32"))
+
+    RETRIEVER_TOP_K = int(os.getenv("RETRIEVER_TOP_K", str(RERANK_CANDIDATES) if RERANKER_ENABLED else "2"))
+    RETRIEVER_SPARSE_TOP_K = int(os.getenv("RETRIEVER_SPARSE_TOP_K", str(max(1, RETRIEVER_TOP_K // 2))))
+    # The cross-encoder judges relevance itself, so low scores are only cut without it. The cut-offs below
+    # assume cosine-like scores and are not applied to HYBRID_ENGINE=native's rank-fused scores
+    RETRIEVER_MIN_SCORE = float(os.getenv("RETRIEVER_MIN_SCORE", "0.0" if RERANKER_ENABLED else "0.5"))
+    HNSW_EF_SEARCH = int(os.getenv("HNSW_EF_SEARCH", "64"))
+    RETRIEVER_ADAPTIVE = os.getenv("RETRIEVER_ADAPTIVE", "false").lower() == "true"
+    RETRIEVER_MAX_TOP_K = int(os.getenv("RETRIEVER_MAX_TOP_K", str(RETRIEVER_TOP_K * 2)))
+    HNSW_MAX_EF_SEARCH = int(os.getenv("HNSW_MAX_EF_SEARCH", "200"))
+    RETRIEVER_CONFIDENT_SCORE = float(os.getenv("RETRIEVER_CONFIDENT_SCORE", "0.8"))
+    RETRIEVER_SCORE_GAP = float(os.getenv("RETRIEVER_SCORE_GAP", "0.15"))
+
+    QUERY_EMBED_CACHE_SIZE = int(os.getenv("QUERY_EMBED_CACHE_SIZE", "1024"))
+    QUERY_EMBED_BATCH_MAX = int(os.getenv("QUERY_EMBED_BATCH_MAX", "16"))
+    QUERY_EMBED_BATCH_WAIT_MS = float(os.getenv("QUERY_EMBED_BATCH_WAIT_MS", "5"))
+
+    HYBRID_ENGINE = os.getenv("HYBRID_ENGINE", "pgvector")
+    HYBRID_FUSION = os.getenv("HYBRID_FUSION", "rrf")
+    HYBRID_RRF_K = int(os.getenv("HYBRID_RRF_K", "60"))
+    HYBRID_DENSE_WEIGHT = float(os.getenv("HYBRID_DENSE_WEIGHT", "1.0"))
+    HYBRID_SPARSE_WEIGHT = float(os.getenv("HYBRID_SPARSE_WEIGHT", "1.0"))
+    HYBRID_SPARSE_LEG = os.getenv("HYBRID_SPARSE_LEG", "tsvector")
+    # Ingestion builds the BM25 index only for the native engine's bm25 leg unless this is set explicitly
+    BM25_ENABLED = os.getenv("BM25_ENABLED",
+                             str(HYBRID_ENGINE == "native" and HYBRID_SPARSE_LEG == "bm25")).lower() == "true"
+    BM25_INDEX_DIR = os.getenv("BM25_INDEX_DIR", ".cache/bm25")
+
+    API_MAX_CONCURRENCY = int(os.getenv("API_MAX_CONCURRENCY", "4"))
+    API_MAX_QUEUE = int(os.getenv("API_MAX_QUEUE", "16"))
+    # Per-stage latency histograms served on /metrics; off, every span is a shared no-op
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+    FAST_GUARDRAIL_ENABLED = os.getenv("FAST_GUARDRAIL_ENABLED", "true").lower() == "true"
+    # The similarity step embeds each query with the Ollama embedding model, an HTTP call; off, only the
+    # keyword lists run and everything they do not block goes to the LLM guardrail
+    FAST_GUARDRAIL_EMBEDDINGS = os.getenv("FAST_GUARDRAIL_EMBEDDINGS", "true").lower() == "true"
+    FAST_GUARDRAIL_BLOCK_THRESHOLD = float(os.getenv("FAST_GUARDRAIL_BLOCK_THRESHOLD", "0.80"))
+    FAST_GUARDRAIL_VALID_THRESHOLD = float(os.getenv("FAST_GUARDRAIL_VALID_THRESHOLD", "0.45"))
+    FAST_GUARDRAIL_VALID_MARGIN = float(os.getenv("FAST_GUARDRAIL_VALID_MARGIN", "0.10"))
+    ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE_ENABLED", "true").lower() == "true"
+    ANSWER_CACHE_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.95"))
+    ANSWER_CACHE_TTL_SECONDS = float(os.getenv("ANSWER_CACHE_TTL_SECONDS", "86400"))
+    ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "1000"))
+    ANSWER_CACHE_FINGERPRINT_SECONDS = float(os.getenv("ANSWER_CACHE_FINGERPRINT_SECONDS", "30"))
+    CREW_PARALLEL = os.getenv("CREW_PARALLEL", "true").lower() == "true"
+    CREW_POOL_SIZE = int(os.getenv("CREW_POOL_SIZE", os.getenv("API_MAX_CONCURRENCY", "4")))
+
+    EMBED_CACHE_ENABLED = os.getenv("EMBED_CACHE_ENABLED", "true").lower() == "true"
+    EMBED_CACHE_PATH = os.getenv("EMBED_CACHE_PATH", ".cache/embeddings.sqlite")
+    EMBED_CACHE_MAX_ENTRIES = int(os.getenv("EMBED_CACHE_MAX_ENTRIES", "200000"))
+
+    EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "50"))
+    EMBED_MIN_BATCH_SIZE = int(os.getenv("EMBED_MIN_BATCH_SIZE", "8"))
+    EMBED_MAX_BATCH_SIZE = int(os.getenv("EMBED_MAX_BATCH_SIZE", "256"))
+    EMBED_IN_FLIGHT = int(os.getenv("EMBED_IN_FLIGHT", "4"))
+    EMBED_TARGET_BATCH_SECONDS = float(os.getenv("EMBED_TARGET_BATCH_SECONDS", "2.0"))
+    # Files buffered between the load, split and embed stages of ingestion
+    INGEST_QUEUE_SIZE = int(os.getenv("INGEST_QUEUE_SIZE", "4"))
+
+    # Full rebuilds COPY into a staging table, build the indexes once and swap it in
+    BULK_LOAD = os.getenv("BULK_LOAD", "true").lower() == "true"
+    BULK_MAINTENANCE_WORK_MEM = os.getenv("BULK_MAINTENANCE_WORK_MEM", "512MB")
+    HNSW_M = int(os.getenv("HNSW_M", "24"))
+    HNSW_EF_CONSTRUCTION = int(os.getenv("HNSW_EF_CONSTRUCTION", "128"))
@@ -1,7 +1,10 @@
 import os
+import threading
+from typing import Optional
 from dotenv import load_dotenv
 from llama_index.embeddings.ollama import OllamaEmbedding
 from config.config import Config
+from config.embedding_cache import CachedEmbedding, EmbeddingCache
 from llama_index.vector_stores.postgres import PGVectorStore
 from llama_index.storage.docstore.postgres import PostgresDocumentStore
 
@@ -12,23 +15,15 @@ class ConfigRag:
         model_name=Config.EMBEDDING_MODEL_NAME,
         base_url=Config.OLLAMA_BASE_URL,
     )
+    if Config.EMBED_CACHE_ENABLED:
+        __embed_model = CachedEmbedding(
+            __embed_model,
+            EmbeddingCache(Config.EMBED_CACHE_PATH, Config.EMBED_CACHE_MAX_ENTRIES),
+            dim=Config.EMBEDDING_DIM,
+        )
 
-    __vector_store = PGVectorStore.from_params(
-        database=Config.DNAME, 
-        host=Config.DHOST, 
-        port=Config.DPORT, 
-        user=Config.DUSER, 
-        password=Config.DPASSWORD,
-        embed_dim=Config.EMBEDDING_DIM,
-        hybrid_search=True,
-        text_search_config="english",
-        hnsw_kwargs={
-            "hnsw_m": 24,
-            "hnsw_ef_construction": 128,
-            "hnsw_ef_search": 64,
-            "hnsw_dist_method": "vector_cosine_ops"
-        }
-    )
+    __vector_stores = {}
+    __vector_stores_lock = threading.Lock()
 
     __docstore = PostgresDocumentStore.from_params(
         database=Config.DNAME,
@@ -43,8 +38,38 @@ class ConfigRag:
         return cls.__embed_model
 
     @classmethod
-    def get_vector_store(cls):
-        return cls.__vector_store
+    def active_table(cls) -> str:
+        # The pointer switch: follows the index version activated last, cached for INDEX_POINTER_TTL_SECONDS
+        from indexer.db.index_versions import IndexVersions
+        return IndexVersions.active_tables().table_name
+
+    @classmethod
+    def get_vector_store(cls, table_name: Optional[str] = None):
+        table_name = table_name or cls.active_table()
+        vector_store = cls.__vector_stores.get(table_name)
+        if vector_store is None:
+            with cls.__vector_stores_lock:
+                vector_store = cls.__vector_stores.get(table_name)
+                if vector_store is None:
+                    vector_store = cls.__vector_stores[table_name] = PGVectorStore.from_params(
+                        database=Config.DNAME,
+                        host=Config.DHOST,
+                        port=Config.DPORT,
+                        user=Config.DUSER,
+                        password=Config.DPASSWORD,
+                        # PGVectorStore adds the "data_" prefix itself
+                        table_name=table_name[len("data_"):] if table_name.startswith("data_") else table_name,
+                        embed_dim=Config.EMBEDDING_DIM,
+                        hybrid_search=True,
+                        text_search_config="english",
+                        hnsw_kwargs={
+                            "hnsw_m": Config.HNSW_M,
+                            "hnsw_ef_construction": Config.HNSW_EF_CONSTRUCTION,
+                            "hnsw_ef_search": Config.HNSW_EF_SEARCH,
+                            "hnsw_dist_method": "vector_cosine_ops"
+                        }
+                    )
+        return vector_store
     
     @classmethod
     def get_docstore(cls):
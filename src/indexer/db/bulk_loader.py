@@ -0,0 +1,115 @@
+import io
+import json
+import logging
+import struct
+import time
+from typing import List, Sequence
+
+import numpy as np
+from llama_index.core.schema import BaseNode, MetadataMode
+from llama_index.core.vector_stores.utils import node_to_metadata_dict
+
+from config.config import Config
+from indexer.db.db_admin import DBAdmin
+
+logger = logging.getLogger(__name__)
+
+COPY_SIGNATURE = b"PGCOPY\n\xff\r\n\x00"
+COPY_COLUMNS = ("text", "metadata_", "node_id", "embedding")
+
+class BulkLoader:
+    # Drop-in for PGVectorStore.add during full rebuilds. Rows are streamed with binary COPY into a staging
+    # table without indexes; the HNSW, GIN and node_id indexes are built once after the load, and the staging
+    # table is renamed to the target table in a single transaction. The schema matches what
+    # PGVectorStore(hybrid_search=True) creates, including the generated tsvector.
+
+    def __init__(self, table_name: str = Config.TABLE_NAME, embed_dim: int = Config.EMBEDDING_DIM,
+                 text_search_config: str = "english"):
+        self.table_name = table_name
+        self.staging_table = f"{table_name}_staging"
+        self.embed_dim = embed_dim
+        self.text_search_config = text_search_config
+        self.rows = 0
+        self.copy_seconds = 0.0
+
+    def begin(self):
+        DBAdmin.execute_query([
+            (f"DROP TABLE IF EXISTS {self.staging_table} CASCADE", None),
+            (f"""CREATE TABLE {self.staging_table} (
+                     id BIGSERIAL PRIMARY KEY,
+                     text VARCHAR NOT NULL,
+                     metadata_ JSON,
+                     node_id VARCHAR,
+                     embedding VECTOR({self.embed_dim}),
+                     text_search_tsv TSVECTOR GENERATED ALWAYS AS (to_tsvector('{self.text_search_config}', text)) STORED
+                 )""", None),
+        ], autocommit=True)
+
+    def add(self, nodes: Sequence[BaseNode]) -> List[str]:
+        started = time.perf_counter()
+        payload = io.BytesIO(self._encode(nodes))
+        with DBAdmin.get_pool().connection() as conn:
+            with conn.cursor() as cur:
+                cur.copy_expert(
+                    f"COPY {self.staging_table} ({', '.join(COPY_COLUMNS)}) FROM STDIN WITH (FORMAT binary)", payload
+                )
+            conn.commit()
+        self.rows += len(nodes)
+        self.copy_seconds += time.perf_counter() - started
+        return [node.node_id for node in nodes]
+
+    def _encode(self, nodes: Sequence[BaseNode]) -> bytes:
+        # Binary COPY: signature, flags and header extension, then per row a field count and length-prefixed
+        # fields. pgvector's binary form is (int16 dim, int16 unused, float4[dim]); json is sent as plain text.
+        parts = [COPY_SIGNATURE, struct.pack(">ii", 0, 0)]
+        field_count = struct.pack(">h", len(COPY_COLUMNS))
+        vector_header = struct.pack(">hh", self.embed_dim, 0)
+        for node in nodes:
+            embedding = np.asarray(node.get_embedding(), dtype=">f4")
+            if embedding.shape != (self.embed_dim,):
+                raise ValueError(f"Node {node.node_id} has a {embedding.shape[0]}-dim embedding, "
+                                 f"expected {self.embed_dim}")
+            metadata = node_to_metadata_dict(node, remove_text=True, flat_metadata=False)
+            fields = (
+                node.get_content(metadata_mode=MetadataMode.NONE).encode("utf-8"),
+                json.dumps(metadata).encode("utf-8"),
+                node.node_id.encode("utf-8"),
+                vector_header + embedding.tobytes(),
+            )
+            parts.append(field_count)
+            for field in fields:
+                parts.append(struct.pack(">i", len(field)))
+                parts.append(field)
+        parts.append(struct.pack(">h", -1))
+        return b"".join(parts)
+
+    def finish(self):
+        started = time.perf_counter()
+        staging, live = self.staging_table, self.table_name
+        DBAdmin.execute_query([
+            ("SET maintenance_work_mem = %s", (Config.BULK_MAINTENANCE_WORK_MEM,)),
+            (f"""CREATE INDEX {staging}_embedding_idx ON {staging}
+                 USING hnsw (embedding vector_cosine_ops) WITH (m = %s, ef_construction = %s)""",
+             (Config.HNSW_M, Config.HNSW_EF_CONSTRUCTION)),
+            (f"CREATE INDEX {staging}_text_search_idx ON {staging} USING gin (text_search_tsv)", None),
+            (f"CREATE INDEX {staging}_node_id_idx ON {staging} (node_id)", None),
+            (f"ANALYZE {staging}", None),
+            ("RESET maintenance_work_mem", None),
+        ], autocommit=True)
+        indexed = time.perf_counter()
+
+        DBAdmin.execute_query([
+            (f"DROP TABLE IF EXISTS {live} CASCADE", None),
+            (f"ALTER TABLE {staging} RENAME TO {live}", None),
+            (f"ALTER SEQUENCE {staging}_id_seq RENAME TO {live}_id_seq", None),
+            (f"ALTER INDEX {staging}_pkey RENAME TO {live}_pkey", None),
+            (f"ALTER INDEX {staging}_embedding_idx RENAME TO {live}_embedding_idx", None),
+            (f"ALTER INDEX {staging}_text_search_idx RENAME TO {live}_text_search_idx", None),
+            (f"ALTER INDEX {staging}_node_id_idx RENAME TO {live}_node_id_idx", None),
+        ])
+        logger.info(f"Bulk loaded {self.rows} rows into {live}: COPY {self.rows_per_sec:.0f} rows/sec, "
+                    f"indexes built in {indexed - started:.1f}s, swapped in {time.perf_counter() - indexed:.1f}s")
+
+    @property
+    def rows_per_sec(self) -> float:
+        return self.rows / self.copy_seconds if self.copy_seconds else 0.0
@@ -0,0 +1,114 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+import psycopg2
+from psycopg2 import pool
+
+logger = logging.getLogger(__name__)
+
+class PoolTimeoutError(Exception):
+    pass
+
+class ConnectionPool:
+    def __init__(self, dsn: str, min_size: int, max_size: int, acquire_timeout: float, health_check_interval: float):
+        self.acquire_timeout = acquire_timeout
+        self.health_check_interval = health_check_interval
+        self.max_size = max_size
+        self._pool = pool.ThreadedConnectionPool(min_size, max_size, dsn)
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._stats_lock = threading.Lock()
+        self._last_used = {}
+        self._in_use = 0
+        self._acquired = 0
+        self._timeouts = 0
+        self._discarded = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    @contextmanager
+    def connection(self):
+        started = time.perf_counter()
+        if not self._slots.acquire(timeout=self.acquire_timeout):
+            with self._stats_lock:
+                self._timeouts += 1
+            raise PoolTimeoutError(f"No database connection available within {self.acquire_timeout}s")
+        try:
+            conn = self._checked_connection()
+        except Exception:
+            self._slots.release()
+            raise
+
+        waited = time.perf_counter() - started
+        with self._stats_lock:
+            self._acquired += 1
+            self._in_use += 1
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+
+        broken = False
+        try:
+            yield conn
+        except Exception:
+            broken = conn.closed != 0
+            if not broken:
+                try:
+                    conn.rollback()
+                except psycopg2.Error:
+                    broken = True
+            raise
+        finally:
+            self._release(conn, broken)
+
+    def _checked_connection(self):
+        conn = self._pool.getconn()
+        last_used = self._last_used.get(id(conn), 0.0)
+        if conn.closed == 0 and time.monotonic() - last_used < self.health_check_interval:
+            return conn
+        try:
+            if conn.closed:
+                raise psycopg2.InterfaceError("connection already closed")
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+            return conn
+        except psycopg2.Error as e:
+            logger.warning(f"Discarding unhealthy database connection: {e}")
+            self._discard(conn)
+            return self._pool.getconn()
+
+    def _discard(self, conn):
+        with self._stats_lock:
+            self._discarded += 1
+        self._last_used.pop(id(conn), None)
+        self._pool.putconn(conn, close=True)
+
+    def _release(self, conn, broken: bool):
+        with self._stats_lock:
+            self._in_use -= 1
+        try:
+            if broken:
+                self._discard(conn)
+            else:
+                if conn.autocommit:
+                    conn.autocommit = False
+                self._last_used[id(conn)] = time.monotonic()
+                self._pool.putconn(conn)
+        finally:
+            self._slots.release()
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            return {
+                "max_size": self.max_size,
+                "in_use": self._in_use,
+                "acquired": self._acquired,
+                "timeouts": self._timeouts,
+                "discarded": self._discarded,
+                "wait_avg_ms": round(self._wait_total / self._acquired * 1000, 3) if self._acquired else 0.0,
+                "wait_max_ms": round(self._wait_max * 1000, 3),
+            }
+
+    def close(self):
+        self._pool.closeall()
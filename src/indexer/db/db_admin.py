@@ -1,62 +1,198 @@
-import psycopg2
+import os
+import threading
 from config.config import Config
-from typing import List, Tuple, Optional, Any
+from indexer.db.connection_pool import ConnectionPool
+from typing import Dict, List, Tuple, Optional, Any, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from indexer.db.index_versions import IndexTables
 
 class DBAdmin:
+    _pool: Optional[ConnectionPool] = None
+    _pool_pid: Optional[int] = None
+    _pool_lock = threading.Lock()
+
+    def __init__(self, tables: Optional["IndexTables"] = None):
+        # Without explicit tables every call goes to the active index version
+        self._tables = tables
+
+    @property
+    def tables(self) -> "IndexTables":
+        if self._tables is not None:
+            return self._tables
+        from indexer.db.index_versions import IndexVersions
+        return IndexVersions.active_tables()
+
+    @classmethod
+    def get_pool(cls) -> ConnectionPool:
+        # Connections must not be shared across fork, so a child process builds its own pool
+        if cls._pool is None or cls._pool_pid != os.getpid():
+            with cls._pool_lock:
+                if cls._pool is None or cls._pool_pid != os.getpid():
+                    cls._pool = ConnectionPool(
+                        Config.get_durl(),
+                        min_size=Config.DB_POOL_MIN,
+                        max_size=Config.DB_POOL_MAX,
+                        acquire_timeout=Config.DB_POOL_TIMEOUT,
+                        health_check_interval=Config.DB_POOL_HEALTH_CHECK_SECONDS,
+                    )
+                    cls._pool_pid = os.getpid()
+        return cls._pool
+
+    @classmethod
+    def pool_stats(cls) -> dict:
+        return cls.get_pool().stats()
+
     @staticmethod
     def execute_query(queries: List[Tuple[str, Optional[Tuple]]], autocommit: bool = False, fetch: bool = False) -> Any:
-        conn = None
-        try:
-            conn = psycopg2.connect(Config.get_durl())
+        with DBAdmin.get_pool().connection() as conn:
             if autocommit:
                 conn.autocommit = True
-            cur = conn.cursor()
-            
-            results = []
-            for query, params in queries:
-                if params:
-                    cur.execute(query, params)
-                else:
-                    cur.execute(query)
-                
-                if fetch:
-                    results.append(cur.fetchall())
+            with conn.cursor() as cur:
+                results = []
+                for query, params in queries:
+                    if params:
+                        cur.execute(query, params)
+                    else:
+                        cur.execute(query)
+                    
+                    if fetch:
+                        results.append(cur.fetchall())
             
             if not autocommit:
                 conn.commit()
             
-            cur.close()
-            conn.close()
             return results if fetch else None
-        except Exception as e:
-            if conn:
-                conn.close()
-            raise e
 
-    def clean_db(self):
+    def create_manifest_tables(self):
+        tables = self.tables
         self.execute_query([
-            (f'DROP TABLE IF EXISTS {Config.TABLE_NAME} CASCADE;', None),
-            (f'DROP TABLE IF EXISTS {Config.DOCSTORE_TABLE} CASCADE;', None)
+            (f"""CREATE TABLE IF NOT EXISTS {tables.manifest_table} (
+                     doc_key TEXT PRIMARY KEY,
+                     doc_hash TEXT NOT NULL,
+                     chunk_count INTEGER NOT NULL DEFAULT 0,
+                     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                 );""", None),
+            (f"""CREATE TABLE IF NOT EXISTS {tables.chunks_table} (
+                     node_id TEXT PRIMARY KEY,
+                     doc_key TEXT NOT NULL,
+                     chunk_hash TEXT NOT NULL
+                 );""", None),
+            (f"CREATE INDEX IF NOT EXISTS {tables.chunks_table}_doc_key_idx ON {tables.chunks_table} (doc_key);", None)
         ], autocommit=True)
 
+    def get_doc_hashes(self) -> Dict[str, str]:
+        tables = self.tables
+        results = self.execute_query([
+            (f"SELECT doc_key, doc_hash FROM {tables.manifest_table}", None)
+        ], fetch=True)
+        return dict(results[0])
+
+    def get_chunk_hashes(self, doc_key: str) -> Dict[str, str]:
+        tables = self.tables
+        results = self.execute_query([
+            (f"SELECT node_id, chunk_hash FROM {tables.chunks_table} WHERE doc_key = %s", (doc_key,))
+        ], fetch=True)
+        return dict(results[0])
+
+    def table_exists(self, table_name: str) -> bool:
+        results = self.execute_query([
+            ("SELECT to_regclass(%s) IS NOT NULL", (table_name,))
+        ], fetch=True)
+        return results[0][0][0]
+
+    def delete_nodes(self, node_ids: List[str]):
+        tables = self.tables
+        if not node_ids or not self.table_exists(tables.table_name):
+            return
+        self.execute_query([
+            (f"DELETE FROM {tables.table_name} WHERE node_id = ANY(%s)", (list(node_ids),)),
+            (f"DELETE FROM {tables.chunks_table} WHERE node_id = ANY(%s)", (list(node_ids),))
+        ])
+
+    def update_metadata(self, metadata: Dict[str, str]):
+        # Metadata-only rewrite for chunks whose text, and so embedding, did not change
+        tables = self.tables
+        if not metadata:
+            return
+        self.execute_query([
+            (f"UPDATE {tables.table_name} SET metadata_ = %s WHERE node_id = %s", (value, node_id))
+            for node_id, value in metadata.items()
+        ])
+
+    def save_doc_manifest(self, doc_key: str, doc_hash: str, chunks: Dict[str, str]):
+        self.execute_query(self.manifest_queries(doc_key, doc_hash, chunks))
+
+    def manifest_queries(self, doc_key: str, doc_hash: str, chunks: Dict[str, str]) -> List[Tuple[str, Optional[Tuple]]]:
+        tables = self.tables
+        queries = [
+            (f"DELETE FROM {tables.chunks_table} WHERE doc_key = %s", (doc_key,)),
+            (f"""INSERT INTO {tables.manifest_table} (doc_key, doc_hash, chunk_count, updated_at)
+                 VALUES (%s, %s, %s, CURRENT_TIMESTAMP)
+                 ON CONFLICT (doc_key) DO UPDATE
+                 SET doc_hash = EXCLUDED.doc_hash, chunk_count = EXCLUDED.chunk_count, updated_at = EXCLUDED.updated_at""",
+             (doc_key, doc_hash, len(chunks)))
+        ]
+        queries += [
+            (f"INSERT INTO {tables.chunks_table} (node_id, doc_key, chunk_hash) VALUES (%s, %s, %s)",
+             (node_id, doc_key, chunk_hash))
+            for node_id, chunk_hash in chunks.items()
+        ]
+        return queries
+
+    def get_chunks(self, doc_keys: Optional[List[str]] = None) -> List[Tuple[str, str, str, dict]]:
+        tables = self.tables
+        query = f"""SELECT c.node_id, c.doc_key, t.text, t.metadata_
+                    FROM {tables.chunks_table} c JOIN {tables.table_name} t ON t.node_id = c.node_id"""
+        if doc_keys is None:
+            results = self.execute_query([(query, None)], fetch=True)
+        else:
+            results = self.execute_query([(query + " WHERE c.doc_key = ANY(%s)", (list(doc_keys),))], fetch=True)
+        return results[0]
+
+    def index_fingerprint(self) -> str:
+        # Changes whenever ingestion adds, updates or removes a document, or another index version goes live
+        tables = self.tables
+        if not self.table_exists(tables.manifest_table):
+            return ""
+        results = self.execute_query([
+            (f"""SELECT COALESCE(md5(%s || '|' || string_agg(doc_key || ':' || doc_hash, ',' ORDER BY doc_key)), '')
+                 FROM {tables.manifest_table}""", (tables.table_name,))
+        ], fetch=True)
+        return results[0][0][0]
+
+    def delete_doc(self, doc_key: str):
+        tables = self.tables
+        self.execute_query([
+            (f"""DELETE FROM {tables.table_name} WHERE node_id IN
+                 (SELECT node_id FROM {tables.chunks_table} WHERE doc_key = %s)""", (doc_key,)),
+            (f"DELETE FROM {tables.chunks_table} WHERE doc_key = %s", (doc_key,)),
+            (f"DELETE FROM {tables.manifest_table} WHERE doc_key = %s", (doc_key,))
+        ])
+
     def check_index_in_db(self):
+        tables = self.tables
         try:
             results = self.execute_query([
                 (f"""SELECT column_name, data_type 
                      FROM information_schema.columns 
-                     WHERE table_name = '{Config.TABLE_NAME}'
+                     WHERE table_name = '{tables.table_name}'
                      ORDER BY ordinal_position;""", None),
-                (f"SELECT COUNT(*) FROM {Config.TABLE_NAME}", None),
-                (f"SELECT COUNT(*) FROM {Config.TABLE_NAME} WHERE embedding IS NOT NULL", None)
+                (f"SELECT COUNT(*) FROM {tables.table_name}", None),
+                (f"SELECT COUNT(*) FROM {tables.table_name} WHERE embedding IS NOT NULL", None),
+                (f"SELECT COALESCE(SUM(chunk_count), 0) FROM {tables.manifest_table}", None)
             ], fetch=True)
+            total, embedded, expected = results[1][0][0], results[2][0][0], results[3][0][0]
             
-            print("Table columns:")
+            print(f"Table {tables.table_name} columns:")
             for col_name, col_type in results[0]:
                 print(f"  {col_name}: {col_type}")
-            print(f"Total rows: {results[1][0][0]}")
-            print(f"Rows with embeddings: {results[2][0][0]}")
+            print(f"Total rows: {total}")
+            print(f"Rows with embeddings: {embedded}")
+            print(f"Chunks in manifest: {expected}")
             
-            return True
+            # A version only goes live when every manifest chunk made it in with an embedding
+            return total > 0 and embedded == total == expected
         except Exception as e:
             print(f"Database verification failed: {e}")
             return False
@@ -0,0 +1,170 @@
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from config.config import Config
+from indexer.db.db_admin import DBAdmin
+
+logger = logging.getLogger(__name__)
+
+BUILDING = "building"
+READY = "ready"
+ACTIVE = "active"
+FAILED = "failed"
+
+@dataclass(frozen=True)
+class IndexTables:
+    version: int
+    table_name: str
+    manifest_table: str
+    chunks_table: str
+
+    @classmethod
+    def for_version(cls, version: int) -> "IndexTables":
+        if version == 0:
+            # Deployments from before versioning keep their unversioned tables as version 0
+            return cls(0, Config.TABLE_NAME, Config.MANIFEST_TABLE, Config.CHUNKS_TABLE)
+        return cls(version, f"{Config.TABLE_NAME}_v{version}", f"{Config.MANIFEST_TABLE}_v{version}",
+                   f"{Config.CHUNKS_TABLE}_v{version}")
+
+LEGACY_TABLES = IndexTables.for_version(0)
+
+class IndexVersions:
+    # Blue/green index tables. A full rebuild writes a new set of versioned tables while the API keeps reading
+    # the active set; the pointer table names the active version and switching or rolling back is a single
+    # UPDATE transaction. Readers cache the pointer for INDEX_POINTER_TTL_SECONDS.
+
+    _active: Optional[IndexTables] = None
+    _active_checked = 0.0
+    _active_lock = threading.Lock()
+
+    def __init__(self, pointer_table: str = Config.INDEX_VERSIONS_TABLE, keep: int = Config.INDEX_VERSIONS_KEEP):
+        self.pointer_table = pointer_table
+        self.keep = max(1, keep)
+
+    def create_table(self):
+        DBAdmin.execute_query([
+            (f"""CREATE TABLE IF NOT EXISTS {self.pointer_table} (
+                     version INTEGER PRIMARY KEY,
+                     status TEXT NOT NULL,
+                     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                     activated_at TIMESTAMP
+                 );""", None),
+            # Adopt the unversioned tables as version 0 so the first rebuild can still roll back to them
+            (f"""INSERT INTO {self.pointer_table} (version, status, activated_at)
+                 SELECT 0, %s, CURRENT_TIMESTAMP WHERE to_regclass(%s) IS NOT NULL
+                 AND NOT EXISTS (SELECT 1 FROM {self.pointer_table})""", (ACTIVE, LEGACY_TABLES.table_name)),
+        ], autocommit=True)
+
+    @classmethod
+    def active_tables(cls) -> IndexTables:
+        if cls._active is not None and time.monotonic() - cls._active_checked < Config.INDEX_POINTER_TTL_SECONDS:
+            return cls._active
+        with cls._active_lock:
+            if cls._active is None or time.monotonic() - cls._active_checked >= Config.INDEX_POINTER_TTL_SECONDS:
+                version = cls().active_version()
+                cls._active = IndexTables.for_version(version if version is not None else 0)
+                cls._active_checked = time.monotonic()
+            return cls._active
+
+    @classmethod
+    def invalidate(cls):
+        with cls._active_lock:
+            cls._active_checked = 0.0
+
+    def active_version(self) -> Optional[int]:
+        results = DBAdmin.execute_query([
+            ("SELECT to_regclass(%s) IS NOT NULL", (self.pointer_table,))
+        ], fetch=True)
+        if not results[0][0][0]:
+            return None
+        results = DBAdmin.execute_query([
+            (f"SELECT version FROM {self.pointer_table} WHERE status = %s", (ACTIVE,))
+        ], fetch=True)
+        return results[0][0][0] if results[0] else None
+
+    def allocate(self) -> IndexTables:
+        self.create_table()
+        with DBAdmin.get_pool().connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(f"LOCK TABLE {self.pointer_table} IN EXCLUSIVE MODE")
+                cur.execute(f"""INSERT INTO {self.pointer_table} (version, status)
+                                SELECT COALESCE(MAX(version), 0) + 1, %s FROM {self.pointer_table}
+                                RETURNING version""", (BUILDING,))
+                version = cur.fetchone()[0]
+            conn.commit()
+        tables = IndexTables.for_version(version)
+        logger.info(f"Building index version {version} in {tables.table_name}")
+        return tables
+
+    def activate(self, version: int):
+        with DBAdmin.get_pool().connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(f"SELECT status FROM {self.pointer_table} WHERE version = %s FOR UPDATE", (version,))
+                row = cur.fetchone()
+                if row is None or row[0] == FAILED:
+                    conn.rollback()
+                    raise ValueError(f"Index version {version} cannot be activated "
+                                     f"(status: {row[0] if row else 'missing'})")
+                cur.execute(f"UPDATE {self.pointer_table} SET status = %s WHERE status = %s AND version <> %s",
+                            (READY, ACTIVE, version))
+                cur.execute(f"""UPDATE {self.pointer_table} SET status = %s, activated_at = CURRENT_TIMESTAMP
+                                WHERE version = %s""", (ACTIVE, version))
+            conn.commit()
+        self.invalidate()
+        logger.info(f"Index version {version} is now active")
+
+    def mark_failed(self, version: int):
+        DBAdmin.execute_query([
+            (f"UPDATE {self.pointer_table} SET status = %s WHERE version = %s AND status <> %s",
+             (FAILED, version, ACTIVE))
+        ])
+
+    def rollback(self) -> int:
+        # The most recently active version other than the current one; running it again rolls forward
+        results = DBAdmin.execute_query([
+            (f"""SELECT version FROM {self.pointer_table}
+                 WHERE status = %s AND activated_at IS NOT NULL
+                 ORDER BY activated_at DESC LIMIT 1""", (READY,))
+        ], fetch=True)
+        if not results[0]:
+            raise ValueError("No previous index version to roll back to")
+        version = results[0][0][0]
+        self.activate(version)
+        return version
+
+    def versions(self) -> List[Dict]:
+        results = DBAdmin.execute_query([
+            (f"""SELECT version, status, created_at, activated_at FROM {self.pointer_table}
+                 ORDER BY version DESC""", None)
+        ], fetch=True)
+        return [{"version": version, "status": status, "table": IndexTables.for_version(version).table_name,
+                 "created_at": created_at, "activated_at": activated_at}
+                for version, status, created_at, activated_at in results[0]]
+
+    def prune(self):
+        # Keep the active version plus keep - 1 rollback targets; builds still running are newer and untouched.
+        # The version active until now is always kept: other API processes read it until their cached pointer
+        # expires after INDEX_POINTER_TTL_SECONDS, so it cannot be dropped right after a switch.
+        versions = self.versions()
+        active = next((v["version"] for v in versions if v["status"] == ACTIVE), None)
+        if active is None:
+            return
+        inactive = [v for v in versions if v["version"] != active]
+        ready = sorted((v for v in inactive if v["status"] == READY),
+                       key=lambda v: v.get("activated_at") or datetime.min, reverse=True)
+        rollback_targets = [v["version"] for v in ready][:max(1, self.keep - 1)]
+        stale = [v["version"] for v in inactive
+                 if v["version"] not in rollback_targets and (v["status"] != BUILDING or v["version"] < active)]
+        for version in stale:
+            tables = IndexTables.for_version(version)
+            DBAdmin.execute_query([
+                (f"DROP TABLE IF EXISTS {tables.table_name} CASCADE", None),
+                (f"DROP TABLE IF EXISTS {tables.manifest_table} CASCADE", None),
+                (f"DROP TABLE IF EXISTS {tables.chunks_table} CASCADE", None),
+                (f"DELETE FROM {self.pointer_table} WHERE version = %s", (version,)),
+            ])
+            logger.info(f"Dropped index version {version}")
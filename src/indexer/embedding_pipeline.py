@@ -0,0 +1,101 @@
+import logging
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, List, Optional
+
+from llama_index.core.schema import BaseNode, MetadataMode
+from tqdm import tqdm
+
+from config.config import Config
+
+logger = logging.getLogger(__name__)
+
+class EmbeddingPipeline:
+    def __init__(self, embed_model, vector_store,
+                 batch_size: int = Config.EMBED_BATCH_SIZE,
+                 min_batch_size: int = Config.EMBED_MIN_BATCH_SIZE,
+                 max_batch_size: int = Config.EMBED_MAX_BATCH_SIZE,
+                 max_in_flight: int = Config.EMBED_IN_FLIGHT,
+                 target_batch_seconds: float = Config.EMBED_TARGET_BATCH_SECONDS):
+        self.embed_model = embed_model
+        self.vector_store = vector_store
+        self.batch_size = batch_size
+        self.min_batch_size = min_batch_size
+        self.max_batch_size = max_batch_size
+        self.max_in_flight = max(1, max_in_flight)
+        self.target_batch_seconds = target_batch_seconds
+        self.total_chunks = 0
+        self.total_seconds = 0.0
+
+    @property
+    def chunks_per_sec(self) -> float:
+        return self.total_chunks / self.total_seconds if self.total_seconds else 0.0
+
+    def run(self, nodes: Iterable[BaseNode], total: Optional[int] = None, desc: str = "Writing chunks",
+            on_written: Optional[Callable[[List[BaseNode]], None]] = None) -> int:
+        started = time.perf_counter()
+        written = 0
+        pending = deque()
+        writes = deque()
+
+        with ThreadPoolExecutor(max_workers=self.max_in_flight, thread_name_prefix="embed") as embed_pool, \
+             ThreadPoolExecutor(max_workers=1, thread_name_prefix="pgwrite") as write_pool, \
+             tqdm(total=total, desc=desc, unit="chunks") as pbar:
+
+            def finish_write():
+                write, batch = writes.popleft()
+                write.result()
+                # Batches are written in order by a single writer, so callers can track what is durable
+                if on_written:
+                    on_written(batch)
+
+            def drain(limit: int):
+                nonlocal written
+                while len(pending) > limit:
+                    batch, elapsed = pending.popleft().result()
+                    self._adapt_batch_size(len(batch), elapsed)
+                    writes.append((write_pool.submit(self.vector_store.add, batch), batch))
+                    while len(writes) > self.max_in_flight:
+                        finish_write()
+                    written += len(batch)
+                    pbar.update(len(batch))
+                    pbar.set_postfix(batch=self.batch_size, rate=f"{written / (time.perf_counter() - started):.1f}/s")
+
+            batch: List[BaseNode] = []
+            for node in nodes:
+                batch.append(node)
+                if len(batch) >= self.batch_size:
+                    pending.append(embed_pool.submit(self._embed_batch, batch))
+                    batch = []
+                    drain(self.max_in_flight - 1)
+            if batch:
+                pending.append(embed_pool.submit(self._embed_batch, batch))
+            drain(0)
+            while writes:
+                finish_write()
+
+        elapsed = time.perf_counter() - started
+        self.total_chunks += written
+        self.total_seconds += elapsed
+        if written:
+            logger.info(f"Embedded and wrote {written} chunks in {elapsed:.1f}s "
+                        f"({written / elapsed:.1f} chunks/sec, batch size {self.batch_size})")
+        return written
+
+    def _embed_batch(self, batch: List[BaseNode]):
+        started = time.perf_counter()
+        texts = [node.get_content(metadata_mode=MetadataMode.EMBED) for node in batch]
+        embeddings = self.embed_model.get_text_embedding_batch(texts)
+        for node, embedding in zip(batch, embeddings):
+            node.embedding = embedding
+        return batch, time.perf_counter() - started
+
+    def _adapt_batch_size(self, size: int, elapsed: float):
+        # Grow while batches finish well under target, back off once a batch overshoots it
+        if size < self.batch_size:
+            return
+        if elapsed < self.target_batch_seconds / 2 and self.batch_size < self.max_batch_size:
+            self.batch_size = min(self.max_batch_size, self.batch_size * 2)
+        elif elapsed > self.target_batch_seconds and self.batch_size > self.min_batch_size:
+            self.batch_size = max(self.min_batch_size, self.batch_size // 2)
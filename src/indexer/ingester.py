@@ -1,12 +1,28 @@
+import argparse
+import hashlib
+import json
 import logging
-from tqdm import tqdm
-from llama_index.core import Settings, VectorStoreIndex
+import time
+import uuid
+from collections import defaultdict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional
+from llama_index.core import Document, Settings
 from llama_index.core.node_parser import MarkdownNodeParser, TokenTextSplitter
+from llama_index.core.vector_stores.utils import node_to_metadata_dict
 
 from config.config import Config
 from config.config_rag import ConfigRag
+from indexer.db.bulk_loader import BulkLoader
 from indexer.db.db_admin import DBAdmin
+from indexer.db.index_versions import IndexTables, IndexVersions
+from indexer.embedding_pipeline import EmbeddingPipeline
 from indexer.loaders.doc_loader import DocumentLoader
+from indexer.manifest import ConversionManifest, file_sha256
+from indexer.policy_chunker import PolicyChunker
+from indexer.stages import prefetch
+from retriever.bm25_index import BM25Index
 
 logging.getLogger("httpx").setLevel(logging.WARNING)
 logging.getLogger("httpcore").setLevel(logging.WARNING)
@@ -15,49 +31,232 @@ logging.getLogger("openai").setLevel(logging.WARNING)
 
 logger = logging.getLogger(__name__)
 
+# The chunkers number chunks by their section's ordinal; an edit above a chunk must not change its hash.
+# Unchanged chunks get their stored metadata rewritten instead, so citations keep the current page
+POSITIONAL_METADATA = ('page_number',)
+
+@dataclass
+class _PendingDocument:
+    doc_hash: str
+    chunks: Dict[str, str]
+    orphan_ids: List[str]
+    unwritten: int
+    unchanged: int
+    # Serialized metadata of the unchanged chunks, rewritten so their page_number follows edits above them
+    unchanged_metadata: Dict[str, str]
+
 class Ingester:
     def __init__(self, db_admin: DBAdmin, doc_loader: DocumentLoader):
         self.db_admin = db_admin
         self.doc_loader = doc_loader
-    
-    def ingest(self):
-        self.db_admin.clean_db()
-        
+        self.md_parser = MarkdownNodeParser(include_metadata=True, include_prev_next_rel=True)
+        self.text_splitter = TokenTextSplitter(chunk_size=1000, chunk_overlap=200, separator=" ")
+        self.policy_chunker = PolicyChunker(Config.CHUNK_MAX_TOKENS) if Config.CHUNKER == "policy" else None
+
+    def ingest(self, incremental: bool = False):
+        # Incremental runs update the live index version in place; full rebuilds fill a new version in the
+        # background and only switch traffic to it once it passes check_index_in_db
+        versions = IndexVersions()
+        tables = None if incremental else versions.allocate()
+        # An incremental run is pinned to the version active at its start; a switch mid-run must not send
+        # its manifest and orphan writes to another version than the rows it already wrote
+        db_admin = DBAdmin(IndexVersions.active_tables() if incremental else tables)
+        try:
+            changed_doc_keys = self._ingest_into(db_admin, incremental)
+            if tables and not db_admin.check_index_in_db():
+                raise RuntimeError(f"Index version {tables.version} failed verification")
+        except BaseException:
+            if tables:
+                versions.mark_failed(tables.version)
+                logger.error(f"Index version {tables.version} was not activated; the live version keeps serving")
+            raise
+
+        if tables:
+            versions.activate(tables.version)
+            versions.prune()
+        if Config.BM25_ENABLED:
+            self._update_bm25(db_admin, incremental, changed_doc_keys)
+        if incremental:
+            db_admin.check_index_in_db()
+
+    def _ingest_into(self, db_admin: DBAdmin, incremental: bool):
+        db_admin.create_manifest_tables()
+
         embed_model = ConfigRag.get_embedding_model()
         check_dim = len(embed_model.get_text_embedding("try me"))
         if check_dim != Config.EMBEDDING_DIM:
             raise ValueError(f"Embedding dimension mismatch! Expected {Config.EMBEDDING_DIM}, got {check_dim}")
-        
-        documents = self.doc_loader.load_documents(Config.MD_DIR, '.md')
-        
-        for doc in tqdm(documents, desc="Processing documents", unit="doc"):
-            first_line = doc.text.split('\n')[0] if doc.text else ""
-            if first_line.startswith("# Source:"):
-                doc.metadata['doc_source'] = first_line.replace("# Source:", "").strip()
-        
+
         Settings.embed_model = embed_model
-        vector_store = ConfigRag.get_vector_store()
-        
-        md_parser = MarkdownNodeParser(include_metadata=True, include_prev_next_rel=True)
-        nodes = md_parser.get_nodes_from_documents(documents)
-        
-        for i, node in enumerate(tqdm(nodes, desc="Adding metadata", unit="node")):
+        table_name = db_admin.tables.table_name
+        bulk_loader = BulkLoader(table_name) if not incremental and Config.BULK_LOAD else None
+        if bulk_loader:
+            bulk_loader.begin()
+        pipeline = EmbeddingPipeline(embed_model, bulk_loader or ConfigRag.get_vector_store(table_name))
+
+        stored_hashes = db_admin.get_doc_hashes()
+        conversions = ConversionManifest(Config.MD_DIR)
+        file_hashes = {
+            self._doc_key(path): (path, conversions.md_hash(path) or file_sha256(path))
+            for path in Path(Config.MD_DIR).rglob('*.md')
+        }
+        changed = {key: value for key, value in file_hashes.items() if stored_hashes.get(key) != value[1]}
+        removed = [key for key in stored_hashes if key not in file_hashes]
+        logger.info(f"{len(changed)} changed, {len(file_hashes) - len(changed)} unchanged, {len(removed)} removed documents")
+
+        for doc_key in removed:
+            db_admin.delete_doc(doc_key)
+
+        if changed:
+            # load -> split -> embed -> write run concurrently with bounded queues in between, so memory
+            # holds a few files at a time and the first chunks are written while later files are still read
+            files = prefetch(
+                self.doc_loader.iter_documents(Config.MD_DIR, '.md', input_files=[str(path) for path, _ in changed.values()]),
+                Config.INGEST_QUEUE_SIZE, "ingest-load"
+            )
+            splits = prefetch(self._split_files(files), Config.INGEST_QUEUE_SIZE, "ingest-split")
+            self._ingest_stream(db_admin, pipeline, splits, {key: doc_hash for key, (_, doc_hash) in changed.items()})
+            logger.info(f"Embedding throughput: {pipeline.chunks_per_sec:.1f} chunks/sec "
+                        f"over {pipeline.total_chunks} chunks")
+
+        if bulk_loader:
+            bulk_loader.finish()
+        return set(changed) | set(removed)
+
+    def switch(self, version: Optional[int] = None) -> int:
+        # Without a version this is the rollback to the previously active index version
+        versions = IndexVersions()
+        if version is None:
+            version = versions.rollback()
+        else:
+            if not DBAdmin(IndexTables.for_version(version)).check_index_in_db():
+                raise RuntimeError(f"Index version {version} failed verification")
+            versions.activate(version)
+        if Config.BM25_ENABLED:
+            self._update_bm25(DBAdmin(IndexTables.for_version(version)), False, set())
+        return version
+
+    def _split_files(self, files):
+        for docs in files:
+            doc_key = self._doc_key(docs[0].metadata['file_path'])
+            if len(docs) > 1:
+                # The markdown reader may cut a file at its headers; the chunkers need the whole file
+                docs = [Document(text="\n\n".join(doc.text.strip() for doc in docs), metadata=docs[0].metadata)]
+            for doc in docs:
+                first_line = doc.text.split('\n')[0] if doc.text else ""
+                if first_line.startswith("# Source:"):
+                    doc.metadata['doc_source'] = first_line.replace("# Source:", "").strip()
+            yield doc_key, self._split(docs)
+
+    def _ingest_stream(self, db_admin: DBAdmin, pipeline: EmbeddingPipeline, splits, doc_hashes: Dict[str, str]):
+        pending: Dict[str, _PendingDocument] = {}
+        owners: Dict[str, str] = {}
+        started = time.perf_counter()
+        first_write = None
+
+        def new_nodes():
+            for doc_key, split_nodes in splits:
+                chunks = self._assign_chunk_ids(doc_key, split_nodes)
+                existing = db_admin.get_chunk_hashes(doc_key)
+                nodes = [node for node in split_nodes if node.id_ not in existing]
+                orphan_ids = [node_id for node_id in existing if node_id not in chunks]
+                unchanged_metadata = {
+                    node.id_: json.dumps(node_to_metadata_dict(node, remove_text=True, flat_metadata=False))
+                    for node in split_nodes if node.id_ in existing
+                }
+
+                # Leftovers of an interrupted run are not in the manifest yet; clear them before re-inserting
+                db_admin.delete_nodes([node.id_ for node in nodes])
+                document = _PendingDocument(doc_hashes[doc_key], chunks, orphan_ids, len(nodes),
+                                            len(unchanged_metadata), unchanged_metadata)
+                if not nodes:
+                    self._finish_document(db_admin, doc_key, document)
+                    continue
+                pending[doc_key] = document
+                for node in nodes:
+                    owners[node.id_] = doc_key
+                    yield node
+
+        def on_written(batch):
+            nonlocal first_write
+            if first_write is None:
+                first_write = time.perf_counter() - started
+                logger.info(f"First chunks written after {first_write:.1f}s")
+            for node in batch:
+                doc_key = owners.pop(node.id_)
+                pending[doc_key].unwritten -= 1
+                if not pending[doc_key].unwritten:
+                    self._finish_document(db_admin, doc_key, pending.pop(doc_key))
+
+        pipeline.run(new_nodes(), on_written=on_written)
+
+    def _finish_document(self, db_admin: DBAdmin, doc_key: str, document: _PendingDocument):
+        # Orphans go only after their replacements are written so the live table never loses the document
+        db_admin.delete_nodes(document.orphan_ids)
+        db_admin.update_metadata(document.unchanged_metadata)
+        db_admin.save_doc_manifest(doc_key, document.doc_hash, document.chunks)
+        logger.info(f"{doc_key}: {len(document.chunks) - document.unchanged} chunks written, "
+                    f"{len(document.orphan_ids)} removed, {document.unchanged} unchanged")
+
+    def _split(self, docs):
+        if self.policy_chunker:
+            return self.policy_chunker.get_nodes_from_documents(docs)
+
+        nodes = self.md_parser.get_nodes_from_documents(docs)
+        for i, node in enumerate(nodes):
             if not hasattr(node, 'metadata') or not node.metadata:
                 node.metadata = {}
             node.metadata['page_number'] = i + 1
-        
-        text_splitter = TokenTextSplitter(chunk_size=1000, chunk_overlap=200, separator=" ")
-        split_nodes = text_splitter.get_nodes_from_documents(nodes)
-        
-        index = VectorStoreIndex.from_vector_store(vector_store=vector_store, embed_model=Settings.embed_model)
-        
-        with tqdm(total=len(split_nodes), desc="Writing chunks", unit="chunks") as pbar:
-            for i in range(0, len(split_nodes), 50):
-                batch = split_nodes[i:i+50]
-                index.insert_nodes(batch)
-                pbar.update(len(batch))
-        
-        self.db_admin.check_index_in_db()
+        return self.text_splitter.get_nodes_from_documents(nodes)
+
+    def _update_bm25(self, db_admin: DBAdmin, incremental: bool, changed_doc_keys):
+        bm25 = BM25Index(Config.BM25_INDEX_DIR)
+        if incremental and bm25.load() is not None:
+            if changed_doc_keys:
+                bm25.update(changed_doc_keys, db_admin.get_chunks(list(changed_doc_keys)))
+        else:
+            bm25.build(db_admin.get_chunks())
+
+    @staticmethod
+    def _doc_key(path) -> str:
+        # Relative to MD_DIR, since the same file name can sit in several subfolders
+        return Path(path).resolve().relative_to(Path(Config.MD_DIR).resolve()).as_posix()
+
+    @staticmethod
+    def _assign_chunk_ids(doc_key: str, nodes):
+        chunks = {}
+        seen = defaultdict(int)
+        for node in nodes:
+            metadata = {key: value for key, value in node.metadata.items() if key not in POSITIONAL_METADATA}
+            chunk_hash = hashlib.sha256(
+                json.dumps({'text': node.text, 'metadata': metadata}, sort_keys=True, default=str).encode("utf-8")
+            ).hexdigest()
+            occurrence = seen[chunk_hash]
+            seen[chunk_hash] += 1
+            node.id_ = str(uuid.uuid5(uuid.NAMESPACE_URL, f"{doc_key}:{chunk_hash}:{occurrence}"))
+            chunks[node.id_] = chunk_hash
+        return chunks
+
+def main():
+    parser = argparse.ArgumentParser(description="Index markdown documents into the vector store")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only embed new or changed chunks instead of rebuilding the index")
+    parser.add_argument("--rollback", action="store_true",
+                        help="Switch traffic back to the previously active index version")
+    parser.add_argument("--activate", type=int, metavar="VERSION",
+                        help="Verify a built index version and switch traffic to it")
+    parser.add_argument("--versions", action="store_true", help="List index versions and exit")
+    args = parser.parse_args()
+
+    ingester = Ingester(DBAdmin(), DocumentLoader())
+    if args.versions:
+        for version in IndexVersions().versions():
+            print(f"v{version['version']:<4} {version['status']:<9} {version['table']:<28} "
+                  f"created {version['created_at']}  activated {version['activated_at']}")
+    elif args.rollback or args.activate is not None:
+        print(f"Index version {ingester.switch(args.activate)} is active")
+    else:
+        ingester.ingest(incremental=args.incremental)
 
 if __name__ == "__main__":
-    Ingester(DBAdmin(), DocumentLoader()).ingest()
\ No newline at end of file
+    main()
@@ -1,13 +1,30 @@
 import logging
 import os
+from typing import Iterator, List, Optional
 from llama_index.core import SimpleDirectoryReader
 
 logger = logging.getLogger(__name__)
 
 class DocumentLoader:
-    def load_documents(self, md_dir: str, file_extension: str = '.md'):
-        reader = SimpleDirectoryReader(
-            input_dir=md_dir, 
+    def load_documents(self, md_dir: str, file_extension: str = '.md', input_files: Optional[List[str]] = None):
+        documents = self._reader(md_dir, input_files).load_data()
+        logger.info(f"Loaded {len(documents)} documents")
+        return documents
+
+    def iter_documents(self, md_dir: str, file_extension: str = '.md',
+                       input_files: Optional[List[str]] = None) -> Iterator[List]:
+        # Yields the documents of one file at a time, so only the files in flight are held in memory
+        loaded = 0
+        for documents in self._reader(md_dir, input_files).iter_data():
+            loaded += 1
+            yield documents
+        logger.info(f"Loaded {loaded} files")
+
+    @staticmethod
+    def _reader(md_dir: str, input_files: Optional[List[str]]) -> SimpleDirectoryReader:
+        return SimpleDirectoryReader(
+            input_dir=None if input_files else md_dir,
+            input_files=input_files,
             recursive=True,
             file_metadata=lambda filename: {
                 'file_name': os.path.basename(filename),
@@ -15,6 +32,3 @@ class DocumentLoader:
                 'file_type': 'markdown'
             }
         )
-        documents = reader.load_data()
-        logger.info(f"Loaded {len(documents)} documents")
-        return documents
\ No newline at end of file
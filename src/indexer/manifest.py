@@ -0,0 +1,83 @@
+import hashlib
+import json
+import logging
+import os
+from datetime import datetime
+from importlib import metadata
+from pathlib import Path
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE = ".conversion_manifest.json"
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def docling_version() -> str:
+    try:
+        return metadata.version("docling")
+    except metadata.PackageNotFoundError:
+        return "unknown"
+
+class ConversionManifest:
+    def __init__(self, md_dir: str):
+        self.path = Path(md_dir) / MANIFEST_FILE
+        self.entries: Dict[str, Dict] = {}
+        if self.path.exists():
+            self.entries = json.loads(self.path.read_text(encoding="utf-8"))
+
+    def needs_conversion(self, src_path: Path, md_path: Path, version: str) -> bool:
+        entry = self.entries.get(src_path.name)
+        if not md_path.exists():
+            return True
+        if entry is None:
+            # Markdown converted before the manifest existed: adopt it instead of reconverting everything
+            logger.info(f"Adopting existing conversion of {src_path.name} into the manifest")
+            self.record(src_path, md_path, version)
+            return False
+        if entry.get("docling_version") != version or entry.get("md_file") != md_path.name:
+            return True
+        stat = src_path.stat()
+        if entry["size"] == stat.st_size and entry["mtime"] == stat.st_mtime:
+            return False
+        if entry["size"] != stat.st_size or entry["sha256"] != file_sha256(src_path):
+            return True
+        # Touched but identical content: remember the new mtime so the next run takes the fast path
+        entry["mtime"] = stat.st_mtime
+        return False
+
+    def record(self, src_path: Path, md_path: Path, version: str):
+        src_stat = src_path.stat()
+        md_stat = md_path.stat()
+        self.entries[src_path.name] = {
+            "size": src_stat.st_size,
+            "mtime": src_stat.st_mtime,
+            "sha256": file_sha256(src_path),
+            "docling_version": version,
+            "md_file": md_path.name,
+            "md_size": md_stat.st_size,
+            "md_mtime": md_stat.st_mtime,
+            "md_sha256": file_sha256(md_path),
+            "converted_at": datetime.now().isoformat(timespec="seconds"),
+        }
+
+    def md_hash(self, md_path: Path) -> Optional[str]:
+        # Trusted only while the markdown on disk is still the file the converter wrote
+        stat = md_path.stat()
+        for entry in self.entries.values():
+            if entry.get("md_file") == md_path.name:
+                if entry.get("md_size") == stat.st_size and entry.get("md_mtime") == stat.st_mtime:
+                    return entry.get("md_sha256")
+                return None
+        return None
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(self.entries, indent=2, sort_keys=True), encoding="utf-8")
+        os.replace(tmp_path, self.path)
@@ -1,66 +1,149 @@
 #!/usr/bin/env python3
 import os, argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
+from typing import Dict, List, Optional, Tuple
 from docling.document_converter import DocumentConverter
 from tqdm import tqdm
 
+from indexer.manifest import ConversionManifest, docling_version
+
+_worker_converter: Optional[DocumentConverter] = None
+
+def _init_worker():
+    global _worker_converter
+    _worker_converter = DocumentConverter()
+
+def _convert_pages(converter: DocumentConverter, src_path: str, page_range: Optional[Tuple[int, int]]) -> str:
+    if page_range:
+        conv_res = converter.convert(src_path, page_range=page_range)
+    else:
+        conv_res = converter.convert(src_path)
+    return conv_res.document.export_to_markdown()
+
+def _convert_shard(src_path: str, page_range: Optional[Tuple[int, int]]) -> str:
+    assert _worker_converter is not None, "worker converter is set by the pool initializer"
+    return _convert_pages(_worker_converter, src_path, page_range)
+
 class MDConverter:
-    def __init__(self, docs_dir: str, md_dir: str, force: bool = False):
+    def __init__(self, docs_dir: str, md_dir: str, force: bool = False, workers: int = 1, pages_per_shard: int = 0):
         self.docs_dir = Path(docs_dir)
         self.md_dir = Path(md_dir)
-        self.converter = DocumentConverter()
+        self.workers = max(1, workers)
+        self.pages_per_shard = pages_per_shard
+        self.converter = DocumentConverter() if self.workers == 1 else None
         self.force = force
-    
+        self.manifest = ConversionManifest(md_dir)
+        self.docling_version = docling_version()
+
     def _get_files_to_process(self):
         files_to_process = []
         for file_path in self.docs_dir.iterdir():
             if not file_path.is_file():
                 continue
             md_path = self.md_dir / f"{file_path.stem}.md"
-            if self.force or not md_path.exists():
+            if self.force or self.manifest.needs_conversion(file_path, md_path, self.docling_version):
                 files_to_process.append(file_path)
         return files_to_process
-    
+
+    def _write_markdown(self, src_path: Path, md_content: str):
+        final_content = f"# Source: {src_path.name}\n\n{md_content}"
+        out_md = self.md_dir / f"{src_path.stem}.md"
+        out_md.write_text(final_content, encoding="utf-8")
+        self.manifest.record(src_path, out_md, self.docling_version)
+        print(f"✅ Converted: {src_path.name}")
+
     def _convert_file(self, src_path: Path):
+        assert self.converter is not None
         try:
-            conv_res = self.converter.convert(str(src_path))
-            md_content = conv_res.document.export_to_markdown()
-            final_content = f"# Source: {src_path.name}\n\n{md_content}"
-            
-            out_md = self.md_dir / f"{src_path.stem}.md"
-            out_md.write_text(final_content, encoding="utf-8")
-            print(f"✅ Converted: {src_path.name}")
+            # Serial runs shard too, so --pages-per-shard bounds docling's memory per call either way
+            parts = [_convert_pages(self.converter, str(src_path), page_range)
+                     for page_range in self._page_ranges(src_path)]
+            self._write_markdown(src_path, "\n\n".join(parts))
             return True
         except Exception as e:
             print(f"⚠️ Error converting {src_path.name}: {e}")
             return False
-    
+
+    def _page_ranges(self, src_path: Path) -> List[Optional[Tuple[int, int]]]:
+        if self.pages_per_shard <= 0 or src_path.suffix.lower() != ".pdf":
+            return [None]
+        import pypdfium2
+        pdf = pypdfium2.PdfDocument(str(src_path))
+        try:
+            page_count = len(pdf)
+        finally:
+            pdf.close()
+        if not page_count:
+            raise ValueError("PDF has no pages")
+        return [(start, min(start + self.pages_per_shard - 1, page_count))
+                for start in range(1, page_count + 1, self.pages_per_shard)]
+
+    def _convert_parallel(self, files: List[Path]):
+        shards: Dict[Path, List[Optional[str]]] = {}
+        failed = set()
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker) as pool:
+            futures = {}
+            for src_path in files:
+                try:
+                    page_ranges = self._page_ranges(src_path)
+                except Exception as e:
+                    print(f"⚠️ Error reading {src_path.name}: {e}")
+                    continue
+                shards[src_path] = [None] * len(page_ranges)
+                for i, page_range in enumerate(page_ranges):
+                    futures[pool.submit(_convert_shard, str(src_path), page_range)] = (src_path, i)
+
+            for future in tqdm(as_completed(futures), total=len(futures), desc="Converting", unit="shard"):
+                src_path, i = futures[future]
+                try:
+                    shards[src_path][i] = future.result()
+                except Exception as e:
+                    print(f"⚠️ Error converting {src_path.name} (shard {i + 1}): {e}")
+                    failed.add(src_path)
+                    continue
+                if src_path not in failed and all(part is not None for part in shards[src_path]):
+                    self._write_markdown(src_path, "\n\n".join(shards[src_path]))
+
     def convert_all(self):
         self.md_dir.mkdir(parents=True, exist_ok=True)
         files = self._get_files_to_process()
-        
+
         if not files:
+            self.manifest.save()
             print("No new files to convert.")
             return
-        
-        print(f"Converting {len(files)} file(s)...")
-        for src_path in tqdm(files, desc="Converting", unit="file"):
-            self._convert_file(src_path)
+
+        print(f"Converting {len(files)} file(s) with {self.workers} worker(s)...")
+        try:
+            if self.workers > 1:
+                self._convert_parallel(files)
+                return
+            for src_path in tqdm(files, desc="Converting", unit="file"):
+                self._convert_file(src_path)
+        finally:
+            self.manifest.save()
 
 def main():
     parser = argparse.ArgumentParser(description="Convert documents to markdown")
-    parser.add_argument("--docs-dir", 
+    parser.add_argument("--docs-dir",
                         default=os.getenv("DOCS_DIR") or "data/all",
                         help="Source documents directory")
-    parser.add_argument("--md-dir", 
+    parser.add_argument("--md-dir",
                         default=os.getenv("MD_DIR") or "data/md",
                         help="Output markdown directory")
     parser.add_argument("--force", action="store_true",
-                        help="Force reconversion of existing MD files")
-    
+                        help="Force reconversion of all files, ignoring the conversion manifest")
+    parser.add_argument("--workers", type=int,
+                        default=int(os.getenv("MD_WORKERS") or 1),
+                        help="Number of converter processes (one docling converter each)")
+    parser.add_argument("--pages-per-shard", type=int,
+                        default=int(os.getenv("MD_PAGES_PER_SHARD") or 0),
+                        help="Split PDFs into page ranges of this size across workers (0 disables sharding)")
+
     args = parser.parse_args()
-    
-    converter = MDConverter(args.docs_dir, args.md_dir, args.force)
+
+    converter = MDConverter(args.docs_dir, args.md_dir, args.force, args.workers, args.pages_per_shard)
     converter.convert_all()
 
 if __name__ == "__main__":
@@ -0,0 +1,220 @@
+import re
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+HEADING = re.compile(r"^#{1,6}\s+(.*?)\s*#*\s*$")
+ARTICLE = re.compile(r"^article\s*\(?\s*(\d+)\s*\)?", re.IGNORECASE)
+STRUCTURAL = re.compile(r"^(chapter|part|section)\b", re.IGNORECASE)
+NUMBERED = re.compile(r"^(\d+(?:\.\d+)*)\.?(?:\s|$)")
+SENTENCE_END = re.compile(r"(?<=[.;:!?])\s+")
+
+PART_RANK = 0
+STRUCTURAL_RANK = 1
+ARTICLE_RANK = 2
+GENERIC_RANK = 99
+
+@dataclass
+class Section:
+    title: str
+    rank: int
+    lines: List[str] = field(default_factory=list)
+    article: Optional[int] = None
+    heading_path: List[str] = field(default_factory=list)
+    block: int = 0
+    ordinal: int = 0
+
+    @property
+    def body(self) -> str:
+        return "\n".join(line for line in self.lines if not HEADING.match(line)).strip()
+
+    @property
+    def text(self) -> str:
+        return "\n".join(self.lines).strip()
+
+@dataclass
+class PolicyChunk:
+    text: str
+    metadata: Dict
+
+def _rank(title: str) -> int:
+    if ARTICLE.match(title):
+        return ARTICLE_RANK
+    if STRUCTURAL.match(title):
+        return STRUCTURAL_RANK
+    numbered = NUMBERED.match(title)
+    if numbered:
+        return ARTICLE_RANK + numbered.group(1).count(".") + 1
+    return GENERIC_RANK
+
+class PolicyChunker:
+    # Docling writes every heading as "##", so the hierarchy is recovered from the heading text:
+    # Chapter/Part/Section > Article (N) > numbered clauses > other headings. Chapters, sections and
+    # articles are hard boundaries; smaller sections inside one are packed up to max_tokens without overlap.
+
+    def __init__(self, max_tokens: int, tokenizer: Optional[Callable[[str], List]] = None):
+        if tokenizer is None:
+            from llama_index.core.utils import get_tokenizer
+            tokenizer = get_tokenizer()
+        self.max_tokens = max_tokens
+        self.tokenizer = tokenizer
+
+    def _tokens(self, text: str) -> int:
+        return len(self.tokenizer(text))
+
+    def _sections(self, text: str) -> List[Section]:
+        sections = [Section(title="", rank=GENERIC_RANK)]
+        for line in text.splitlines():
+            heading = HEADING.match(line)
+            if heading and heading.group(1):
+                title = " ".join(heading.group(1).split())
+                sections.append(Section(title=title, rank=_rank(title), lines=[line]))
+            else:
+                sections[-1].lines.append(line)
+        sections = [s for s in sections if s.text]
+
+        merged: List[Section] = []
+        for section in sections:
+            previous = merged[-1] if merged else None
+            if previous and previous.title and not previous.body and previous.rank <= ARTICLE_RANK \
+                    and section.rank == GENERIC_RANK:
+                # "## Chapter 1" followed by "## Definitions, scope ..." is one heading split in two
+                previous.title = f"{previous.title} {section.title}"
+                previous.lines.extend(section.lines)
+                continue
+            merged.append(section)
+
+        for i, section in enumerate(merged):
+            following = merged[i + 1] if i + 1 < len(merged) else None
+            if section.rank == GENERIC_RANK and section.title and not section.body \
+                    and following and following.rank <= ARTICLE_RANK:
+                # A bare heading right before chapters or articles titles the part that follows
+                section.rank = PART_RANK
+
+        path: List[Section] = []
+        block = 0
+        part_has_articles = False
+        for ordinal, section in enumerate(merged):
+            if section.title:
+                while path and path[-1].rank >= section.rank:
+                    path.pop()
+                if section.rank == STRUCTURAL_RANK and part_has_articles and path and path[0].rank == PART_RANK:
+                    # Articles sat directly under the part ("decided the following: Article (1)..."), so a
+                    # chapter starts a new part of the document rather than nesting in it
+                    path.pop(0)
+                if section.rank == PART_RANK:
+                    part_has_articles = False
+                elif section.rank == ARTICLE_RANK:
+                    part_has_articles = len(path) == 1 and path[0].rank == PART_RANK
+                path.append(section)
+                if section.rank <= ARTICLE_RANK:
+                    block += 1
+            section.heading_path = [s.title for s in path]
+            article = next((s for s in reversed(path) if s.rank == ARTICLE_RANK), None)
+            section.article = int(ARTICLE.match(article.title).group(1)) if article else None
+            section.block = block
+            section.ordinal = ordinal
+        return merged
+
+    def _split_oversized(self, text: str, budget: int) -> List[str]:
+        pieces: List[str] = []
+        for unit_pattern in (r"\n\s*\n", SENTENCE_END.pattern):
+            if self._tokens(text) <= budget:
+                break
+            units = [u for u in re.split(unit_pattern, text) if u.strip()]
+            if len(units) > 1:
+                return self._pack_units(units, budget, "\n\n" if unit_pattern != SENTENCE_END.pattern else " ")
+        if self._tokens(text) <= budget:
+            return [text]
+        words = text.split()
+        current: List[str] = []
+        for word in words:
+            if current and self._tokens(" ".join(current + [word])) > budget:
+                pieces.append(" ".join(current))
+                current = []
+            current.append(word)
+        if current:
+            pieces.append(" ".join(current))
+        return pieces
+
+    def _pack_units(self, units: List[str], budget: int, joiner: str) -> List[str]:
+        packed: List[str] = []
+        current = ""
+        for unit in units:
+            if self._tokens(unit) > budget:
+                if current:
+                    packed.append(current)
+                    current = ""
+                packed.extend(self._split_oversized(unit, budget))
+                continue
+            candidate = f"{current}{joiner}{unit}" if current else unit
+            if current and self._tokens(candidate) > budget:
+                packed.append(current)
+                current = unit
+            else:
+                current = candidate
+        if current:
+            packed.append(current)
+        return packed
+
+    def split_text(self, text: str) -> List[PolicyChunk]:
+        chunks: List[PolicyChunk] = []
+        sections = self._sections(text)
+        blocks: Dict[int, List[Section]] = {}
+        for section in sections:
+            blocks.setdefault(section.block, []).append(section)
+
+        for block_sections in blocks.values():
+            head = block_sections[0]
+            # Pieces that do not start with the article/chapter heading repeat it, so every chunk keeps its number
+            prefix = f"## {head.title}\n\n" if head.title and head.rank <= ARTICLE_RANK else ""
+            budget = self.max_tokens - self._tokens(prefix)
+            current: List[Section] = []
+            current_text = ""
+            for section in block_sections:
+                candidate = f"{current_text}\n\n{section.text}" if current_text else section.text
+                starts_block = (current[0] if current else section) is head
+                if self._tokens(candidate if starts_block else prefix + candidate) <= self.max_tokens:
+                    current.append(section)
+                    current_text = candidate
+                    continue
+                self._emit(chunks, current, current_text, head, prefix)
+                if self._tokens(section.text) <= budget:
+                    current, current_text = [section], section.text
+                    continue
+                # The heading goes back on every piece through the prefix, so only the head's body is split
+                for piece in self._split_oversized(section.body if section is head else section.text, budget):
+                    self._emit(chunks, [section], piece, None, prefix)
+                current, current_text = [], ""
+            self._emit(chunks, current, current_text, head, prefix)
+        return chunks
+
+    def _emit(self, chunks: List[PolicyChunk], sections: List[Section], text: str, head: Optional[Section], prefix: str):
+        # Heading-only runs ("## Chapter 1" before its first article) live on in the heading_path metadata
+        if not sections or not text.strip() or not any(section.body for section in sections):
+            return
+        if sections[0] is not head:
+            text = prefix + text
+        chunks.append(PolicyChunk(text.strip(), self._metadata(sections)))
+
+    @staticmethod
+    def _metadata(sections: List[Section]) -> Dict:
+        first = sections[0]
+        metadata = {
+            "heading_path": " > ".join(first.heading_path),
+            # Same numbering MarkdownNodeParser gave: the ordinal of the markdown section the chunk starts in
+            "page_number": first.ordinal + 1,
+        }
+        if first.article is not None:
+            metadata["article"] = first.article
+        return metadata
+
+    def get_nodes_from_documents(self, documents) -> List:
+        from llama_index.core.schema import NodeRelationship, TextNode
+
+        nodes = []
+        for document in documents:
+            for chunk in self.split_text(document.text):
+                node = TextNode(text=chunk.text, metadata={**document.metadata, **chunk.metadata})
+                node.relationships[NodeRelationship.SOURCE] = document.as_related_node_info()
+                nodes.append(node)
+        return nodes
@@ -0,0 +1,49 @@
+import queue
+import threading
+from typing import Iterable, Iterator, TypeVar
+
+T = TypeVar("T")
+
+_DONE = object()
+
+class _Failed:
+    def __init__(self, error: BaseException):
+        self.error = error
+
+def prefetch(items: Iterable[T], maxsize: int, name: str) -> Iterator[T]:
+    # Runs the upstream stage on its own thread, at most maxsize items ahead of the consumer. The bound is
+    # what keeps memory flat: a stage that outruns the next one blocks instead of piling up results.
+    buffer: "queue.Queue" = queue.Queue(maxsize=max(1, maxsize))
+    stop = threading.Event()
+
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                buffer.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for item in items:
+                if not put(item):
+                    return
+        except BaseException as e:
+            put(_Failed(e))
+            return
+        put(_DONE)
+
+    threading.Thread(target=produce, name=name, daemon=True).start()
+    try:
+        while True:
+            item = buffer.get()
+            if item is _DONE:
+                return
+            if isinstance(item, _Failed):
+                raise item.error
+            yield item
+    finally:
+        # The consumer stopped early or failed; let the producer thread exit instead of blocking on put
+        stop.set()
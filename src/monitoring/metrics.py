@@ -0,0 +1,69 @@
+import time
+
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Histogram, generate_latest
+from prometheus_client import disable_created_metrics
+
+from config.config import Config
+
+# Seconds; spans range from sub-millisecond DB reads to multi-minute LLM generations
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+CONTENT_TYPE = CONTENT_TYPE_LATEST
+
+# The *_created series only say when this process first saw a stage
+disable_created_metrics()
+
+# A registry of our own keeps /metrics to the pipeline stages and lets tests reset it
+REGISTRY = CollectorRegistry()
+# task is set only for crew_task spans; Prometheus treats the empty value as the label being absent
+DURATIONS = Histogram("rag_stage_duration_seconds", "Time spent per request pipeline stage", ("stage", "task"),
+                      buckets=BUCKETS, registry=REGISTRY)
+ERRORS = Counter("rag_stage_errors_total", "Stage spans that ended with an exception", ("stage", "task"),
+                 registry=REGISTRY)
+
+class _Timer:
+    __slots__ = ("duration", "errors", "started")
+
+    def __init__(self, stage: str, task: str):
+        self.duration = DURATIONS.labels(stage, task)
+        # Created up front so a stage that never failed still exports errors_total 0
+        self.errors = ERRORS.labels(stage, task)
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.duration.observe(time.perf_counter() - self.started)
+        if exc_type is not None:
+            self.errors.inc()
+        return False
+
+class _NoopTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+_NOOP = _NoopTimer()
+
+def timed(stage: str, task: str = ""):
+    # With metrics off every span shares one no-op context manager, so instrumented code pays a flag check
+    if not Config.METRICS_ENABLED:
+        return _NOOP
+    return _Timer(stage, task)
+
+def observe(stage: str, seconds: float, task: str = ""):
+    if Config.METRICS_ENABLED:
+        DURATIONS.labels(stage, task).observe(seconds)
+        ERRORS.labels(stage, task)
+
+def reset():
+    DURATIONS.clear()
+    ERRORS.clear()
+
+def render() -> str:
+    return generate_latest(REGISTRY).decode("utf-8")
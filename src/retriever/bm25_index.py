@@ -0,0 +1,271 @@
+import json
+import logging
+import math
+import mmap
+import os
+import re
+import shutil
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+import numpy as np
+
+from retriever.retriever import RetrievedChunk
+
+logger = logging.getLogger(__name__)
+
+CURRENT = "CURRENT"
+
+# Numbers stay tokens of their own so "Article 3" and "clause 4.2" match exactly
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "how", "in", "is", "it", "of", "on", "or",
+    "that", "the", "this", "to", "was", "what", "when", "which", "who", "with",
+}
+
+# (node_id, doc_key, text, metadata)
+Chunk = Tuple[str, str, str, dict]
+
+def tokenize(text: str) -> List[str]:
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOPWORDS]
+
+@dataclass
+class _Segment:
+    version: str
+    pointer_mtime: int
+    terms: List[str]
+    term_index: Dict[str, int]
+    doc_keys: List[str]
+    avgdl: float
+    offsets: np.ndarray
+    postings_doc: np.ndarray
+    postings_tf: np.ndarray
+    doc_len: np.ndarray
+    chunk_offsets: np.ndarray
+    chunks: object
+    # Searches in flight on this segment; a superseded segment is closed once the last one finishes
+    readers: int = 0
+    retired: bool = False
+
+    def chunk_bytes(self, doc_id: int) -> bytes:
+        return bytes(self.chunks[int(self.chunk_offsets[doc_id]):int(self.chunk_offsets[doc_id + 1])])
+
+    def close(self):
+        if isinstance(self.chunks, mmap.mmap):
+            self.chunks.close()
+        # np.memmap has no close(); its mapping goes with the last array that references it
+        for name in ("offsets", "postings_doc", "postings_tf", "doc_len", "chunk_offsets"):
+            setattr(self, name, None)
+
+class BM25Index:
+    # Postings are stored CSR-style in .npy files and memory-mapped, so loading costs no parsing and the
+    # pages are shared between API workers. Every build writes a new version directory and then swaps the
+    # CURRENT pointer; a running API picks the new version up on its next search.
+
+    def __init__(self, path: str, k1: float = 1.5, b: float = 0.75):
+        self.path = Path(path)
+        self.k1 = k1
+        self.b = b
+        self._segment: Optional[_Segment] = None
+        self._lock = threading.Lock()
+
+    @property
+    def version(self) -> Optional[str]:
+        return self._segment.version if self._segment else None
+
+    @property
+    def size(self) -> int:
+        return len(self._segment.doc_keys) if self._segment else 0
+
+    def build(self, chunks: Iterable[Chunk]) -> int:
+        return self._write(None, [], chunks)
+
+    def update(self, changed_doc_keys: Set[str], chunks: Iterable[Chunk]) -> int:
+        # Chunks of changed or removed documents are replaced; all others are carried over from the postings
+        with self._reading() as segment:
+            if segment is None:
+                return self.build(chunks)
+            keep = [i for i, doc_key in enumerate(segment.doc_keys) if doc_key not in changed_doc_keys]
+            return self._write(segment, keep, chunks)
+
+    @staticmethod
+    def _term_counts(segment: _Segment, keep: List[int]) -> Dict[int, Counter]:
+        term_ids = np.repeat(np.arange(len(segment.terms)), np.diff(segment.offsets))
+        kept = np.isin(segment.postings_doc, np.asarray(keep, dtype=np.int32))
+        counts: Dict[int, Counter] = {i: Counter() for i in keep}
+        for term_id, doc_id, tf in zip(term_ids[kept], segment.postings_doc[kept], segment.postings_tf[kept]):
+            counts[int(doc_id)][segment.terms[term_id]] = int(tf)
+        return counts
+
+    def _write(self, segment: Optional[_Segment], keep: List[int], new_chunks: Iterable[Chunk]) -> int:
+        started = time.perf_counter()
+        version = f"v{time.time_ns()}"
+        target = self.path / version
+        target.mkdir(parents=True, exist_ok=True)
+
+        kept_counts = self._term_counts(segment, keep) if segment else {}
+        doc_counts: List[Counter] = []
+        doc_keys: List[str] = []
+        chunk_offsets = [0]
+        with open(target / "chunks.jsonl", "wb") as out:
+            for i in keep:
+                record = segment.chunk_bytes(i)
+                out.write(record)
+                chunk_offsets.append(chunk_offsets[-1] + len(record))
+                doc_counts.append(kept_counts[i])
+                doc_keys.append(segment.doc_keys[i])
+            for node_id, doc_key, text, metadata in new_chunks:
+                record = (json.dumps({"node_id": node_id, "text": text, "metadata": metadata},
+                                     default=str) + "\n").encode("utf-8")
+                out.write(record)
+                chunk_offsets.append(chunk_offsets[-1] + len(record))
+                doc_counts.append(Counter(tokenize(text)))
+                doc_keys.append(doc_key)
+
+        terms = sorted({term for counts in doc_counts for term in counts})
+        term_index = {term: i for i, term in enumerate(terms)}
+        postings: List[List[Tuple[int, int]]] = [[] for _ in terms]
+        for doc_id, counts in enumerate(doc_counts):
+            for term, tf in counts.items():
+                postings[term_index[term]].append((doc_id, tf))
+
+        offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(p) for p in postings])
+        flat = [posting for term_postings in postings for posting in term_postings]
+        doc_len = np.array([sum(counts.values()) for counts in doc_counts], dtype=np.int32)
+
+        np.save(target / "offsets.npy", offsets)
+        np.save(target / "postings_doc.npy", np.array([d for d, _ in flat], dtype=np.int32))
+        np.save(target / "postings_tf.npy", np.array([min(tf, 65535) for _, tf in flat], dtype=np.uint16))
+        np.save(target / "doc_len.npy", doc_len)
+        np.save(target / "chunk_offsets.npy", np.array(chunk_offsets, dtype=np.int64))
+        with open(target / "meta.json", "w", encoding="utf-8") as f:
+            json.dump({"terms": terms, "doc_keys": doc_keys,
+                       "avgdl": float(doc_len.mean()) if len(doc_len) else 0.0}, f)
+
+        pointer_tmp = self.path / f"{CURRENT}.tmp"
+        previous = self._read_pointer()
+        pointer_tmp.write_text(version, encoding="utf-8")
+        os.replace(pointer_tmp, self.path / CURRENT)
+        # Deleting old files is safe on POSIX even while another process still has them mapped. The previous
+        # version stays: a reader that read CURRENT just before the swap is about to open it.
+        for entry in self.path.iterdir():
+            if entry.is_dir() and entry.name.startswith("v") and entry.name not in (version, previous):
+                shutil.rmtree(entry, ignore_errors=True)
+        logger.info(f"BM25 index {version}: {len(doc_counts)} chunks, {len(terms)} terms "
+                    f"in {(time.perf_counter() - started) * 1000:.0f} ms")
+        return len(doc_counts)
+
+    def load(self) -> Optional[_Segment]:
+        pointer = self.path / CURRENT
+        try:
+            mtime = pointer.stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
+        segment = self._segment
+        if segment is not None and segment.pointer_mtime == mtime:
+            return segment
+        with self._lock:
+            if self._segment is None or self._segment.pointer_mtime != mtime:
+                try:
+                    segment = self._open(self._read_pointer(), mtime)
+                except FileNotFoundError:
+                    # Two rebuilds landed between reading CURRENT and opening its version; follow the new pointer
+                    mtime = pointer.stat().st_mtime_ns
+                    segment = self._open(self._read_pointer(), mtime)
+                self._retire(self._segment)
+                self._segment = segment
+                logger.info(f"Loaded BM25 index {segment.version} ({len(segment.doc_keys)} chunks)")
+            return self._segment
+
+    @staticmethod
+    def _retire(segment: Optional[_Segment]):
+        # Called under the lock; a long-running API must not keep every superseded version mapped
+        if segment is None:
+            return
+        segment.retired = True
+        if not segment.readers:
+            segment.close()
+
+    @contextmanager
+    def _reading(self) -> Iterator[Optional[_Segment]]:
+        self.load()
+        with self._lock:
+            # Taken under the lock, so the segment cannot be retired and closed before it is counted
+            segment = self._segment
+            if segment is not None:
+                segment.readers += 1
+        try:
+            yield segment
+        finally:
+            if segment is not None:
+                with self._lock:
+                    segment.readers -= 1
+                    if segment.retired and not segment.readers:
+                        segment.close()
+
+    def _read_pointer(self) -> Optional[str]:
+        try:
+            return (self.path / CURRENT).read_text(encoding="utf-8").strip()
+        except FileNotFoundError:
+            return None
+
+    def _open(self, version: str, mtime: int) -> _Segment:
+        source = self.path / version
+        with open(source / "meta.json", encoding="utf-8") as f:
+            meta = json.load(f)
+        chunks = b""
+        if os.path.getsize(source / "chunks.jsonl"):
+            with open(source / "chunks.jsonl", "rb") as f:
+                chunks = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return _Segment(
+            version=version,
+            pointer_mtime=mtime,
+            terms=meta["terms"],
+            term_index={term: i for i, term in enumerate(meta["terms"])},
+            doc_keys=meta["doc_keys"],
+            avgdl=meta["avgdl"] or 1.0,
+            offsets=np.load(source / "offsets.npy", mmap_mode="r"),
+            postings_doc=np.load(source / "postings_doc.npy", mmap_mode="r"),
+            postings_tf=np.load(source / "postings_tf.npy", mmap_mode="r"),
+            doc_len=np.load(source / "doc_len.npy", mmap_mode="r"),
+            chunk_offsets=np.load(source / "chunk_offsets.npy", mmap_mode="r"),
+            chunks=chunks,
+        )
+
+    def search(self, query: str, top_k: int) -> List[RetrievedChunk]:
+        with self._reading() as segment:
+            if segment is None or not segment.doc_keys:
+                return []
+            return self._search(segment, query, top_k)
+
+    def _search(self, segment: _Segment, query: str, top_k: int) -> List[RetrievedChunk]:
+        n_docs = len(segment.doc_keys)
+        scores = np.zeros(n_docs, dtype=np.float32)
+        terms = [segment.term_index[term] for term in set(tokenize(query)) if term in segment.term_index]
+        if not terms:
+            return []
+        norm = self.k1 * (1 - self.b + self.b * np.asarray(segment.doc_len, dtype=np.float32) / segment.avgdl)
+        for term_id in terms:
+            start, end = int(segment.offsets[term_id]), int(segment.offsets[term_id + 1])
+            docs = np.asarray(segment.postings_doc[start:end])
+            tf = np.asarray(segment.postings_tf[start:end], dtype=np.float32)
+            idf = math.log(1 + (n_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+            scores[docs] += idf * tf * (self.k1 + 1) / (tf + norm[docs])
+
+        matched = np.flatnonzero(scores)
+        if len(matched) > top_k:
+            matched = matched[np.argpartition(-scores[matched], top_k - 1)[:top_k]]
+        ranked = matched[np.argsort(-scores[matched], kind="stable")]
+        return [self._chunk(segment, int(doc_id), float(scores[doc_id])) for doc_id in ranked]
+
+    @staticmethod
+    def _chunk(segment: _Segment, doc_id: int, score: float) -> RetrievedChunk:
+        record = json.loads(segment.chunk_bytes(doc_id))
+        return RetrievedChunk(node_id=record["node_id"], score=score, text=record["text"],
+                              metadata=record["metadata"] or {})
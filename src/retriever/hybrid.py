@@ -0,0 +1,174 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Tuple
+
+from config.config import Config
+from indexer.db.db_admin import DBAdmin
+from monitoring import metrics
+from retriever.bm25_index import BM25Index
+from retriever.retriever import RetrievalParams, RetrievedChunk
+
+logger = logging.getLogger(__name__)
+
+RRF = "rrf"
+WEIGHTED = "weighted"
+
+# Same table and columns PGVectorStore(hybrid_search=True) writes: embedding (HNSW) and text_search_tsv (GIN)
+DENSE_SQL = """SELECT node_id, text, metadata_, 1 - (embedding <=> %s::vector) AS score
+                FROM {table}
+                ORDER BY embedding <=> %s::vector
+                LIMIT %s"""
+
+# Terms are OR-ed so one missing word does not empty the leg; ts_rank_cd rewards chunks matching more of them
+# and close together, which is what "Article 3 of Code of Business Ethics" style queries need
+SPARSE_SQL = """SELECT node_id, text, metadata_, ts_rank_cd(text_search_tsv, query, 32) AS score
+                 FROM {table},
+                      CAST(NULLIF(replace(plainto_tsquery(%s, %s)::text, '&', '|'), '') AS tsquery) AS query
+                 WHERE text_search_tsv @@ query
+                 ORDER BY score DESC
+                 LIMIT %s"""
+
+class LegStats:
+    def __init__(self):
+        self.calls = 0
+        self.total_ms = 0.0
+        self.last_ms = None
+        self.last_count = 0
+
+    def record(self, elapsed_ms: float, count: int):
+        self.calls += 1
+        self.total_ms += elapsed_ms
+        self.last_ms = round(elapsed_ms, 1)
+        self.last_count = count
+
+    def as_dict(self) -> dict:
+        return {
+            "calls": self.calls,
+            "avg_ms": round(self.total_ms / self.calls, 1) if self.calls else None,
+            "last_ms": self.last_ms,
+            "last_candidates": self.last_count,
+        }
+
+class HybridSearchEngine:
+    def __init__(self, embed_model, fusion: str = Config.HYBRID_FUSION, rrf_k: int = Config.HYBRID_RRF_K,
+                 dense_weight: float = Config.HYBRID_DENSE_WEIGHT, sparse_weight: float = Config.HYBRID_SPARSE_WEIGHT,
+                 sparse_leg: str = Config.HYBRID_SPARSE_LEG, text_search_config: str = "english",
+                 table_name: str = Config.TABLE_NAME):
+        if fusion not in (RRF, WEIGHTED):
+            raise ValueError(f"Unknown hybrid fusion '{fusion}', expected '{RRF}' or '{WEIGHTED}'")
+        self.embed_model = embed_model
+        # Switched by the Retriever when another index version goes live
+        self.table_name = table_name
+        self.fusion = fusion
+        self.rrf_k = rrf_k
+        self.dense_weight = dense_weight
+        self.sparse_weight = sparse_weight
+        self.text_search_config = text_search_config
+        self.sparse_leg = sparse_leg
+        self.bm25 = None
+        if sparse_leg == "bm25":
+            self.bm25 = BM25Index(Config.BM25_INDEX_DIR)
+            if self.bm25.load() is None:
+                logger.warning(f"No BM25 index in {Config.BM25_INDEX_DIR}, falling back to full-text search")
+        self._legs = ThreadPoolExecutor(max_workers=2 * Config.API_MAX_CONCURRENCY, thread_name_prefix="hybrid")
+        self._stats_lock = threading.Lock()
+        self.dense_stats = LegStats()
+        self.sparse_stats = LegStats()
+        self.fused_stats = LegStats()
+        self.overlap_total = 0.0
+        self.last_overlap = None
+
+    def _dense(self, query: str, params: RetrievalParams) -> List[RetrievedChunk]:
+        # The query embedding is computed on this leg so the full-text leg overlaps with it
+        started = time.perf_counter()
+        with metrics.timed("query_embedding"):
+            vector = "[" + ",".join(map(str, self.embed_model.get_query_embedding(query))) + "]"
+        with metrics.timed("vector_search"), DBAdmin.get_pool().connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("SET LOCAL hnsw.ef_search = %s", (params.ef_search,))
+                cur.execute(DENSE_SQL.format(table=self.table_name), (vector, vector, params.top_k))
+                rows = cur.fetchall()
+            conn.commit()
+        chunks = self._chunks(rows)
+        with self._stats_lock:
+            self.dense_stats.record((time.perf_counter() - started) * 1000, len(chunks))
+        return chunks
+
+    def _sparse(self, query: str, params: RetrievalParams) -> List[RetrievedChunk]:
+        started = time.perf_counter()
+        with metrics.timed("sparse_search"):
+            if self.bm25 is not None and self.bm25.load() is not None:
+                chunks = self.bm25.search(query, params.sparse_top_k)
+            else:
+                results = DBAdmin.execute_query([
+                    (SPARSE_SQL.format(table=self.table_name), (self.text_search_config, query, params.sparse_top_k))
+                ], fetch=True)
+                chunks = self._chunks(results[0])
+        with self._stats_lock:
+            self.sparse_stats.record((time.perf_counter() - started) * 1000, len(chunks))
+        return chunks
+
+    @staticmethod
+    def _chunks(rows) -> List[RetrievedChunk]:
+        return [RetrievedChunk(node_id=node_id, score=float(score or 0.0), text=text, metadata=metadata or {})
+                for node_id, text, metadata, score in rows]
+
+    def _fuse(self, dense: List[RetrievedChunk], sparse: List[RetrievedChunk]) -> List[Tuple[float, RetrievedChunk]]:
+        legs = [(dense, self.dense_weight), (sparse, self.sparse_weight)]
+        fused: Dict[str, float] = {}
+        chunks: Dict[str, RetrievedChunk] = {}
+        if self.fusion == RRF:
+            # Scaled by the best achievable score: 1.0 is rank 1 in every leg, a single-leg rank 1 is only 0.5.
+            # These are rank positions, not similarities, so the Retriever applies no score cut-offs to them
+            best = sum(weight for _, weight in legs) / (self.rrf_k + 1)
+            for leg, weight in legs:
+                for rank, chunk in enumerate(leg, start=1):
+                    fused[chunk.node_id] = fused.get(chunk.node_id, 0.0) + weight / (self.rrf_k + rank) / best
+                    chunks.setdefault(chunk.node_id, chunk)
+        else:
+            total = sum(weight for _, weight in legs) or 1.0
+            for leg, weight in legs:
+                if not leg:
+                    continue
+                high, low = max(c.score for c in leg), min(c.score for c in leg)
+                for chunk in leg:
+                    normalized = (chunk.score - low) / (high - low) if high > low else 1.0
+                    fused[chunk.node_id] = fused.get(chunk.node_id, 0.0) + weight * normalized / total
+                    chunks.setdefault(chunk.node_id, chunk)
+        return sorted(((score, chunks[node_id]) for node_id, score in fused.items()),
+                      key=lambda item: item[0], reverse=True)
+
+    def search(self, query: str, params: RetrievalParams) -> List[RetrievedChunk]:
+        started = time.perf_counter()
+        dense_leg = self._legs.submit(self._dense, query, params)
+        sparse_leg = self._legs.submit(self._sparse, query, params)
+        dense, sparse = dense_leg.result(), sparse_leg.result()
+
+        fused = self._fuse(dense, sparse)
+        limit = max(params.top_k, params.sparse_top_k)
+        dense_ids, sparse_ids = {c.node_id for c in dense}, {c.node_id for c in sparse}
+        overlap = len(dense_ids & sparse_ids) / min(len(dense_ids), len(sparse_ids)) if dense_ids and sparse_ids else 0.0
+        with self._stats_lock:
+            self.fused_stats.record((time.perf_counter() - started) * 1000, min(limit, len(fused)))
+            self.overlap_total += overlap
+            self.last_overlap = round(overlap, 3)
+
+        return [RetrievedChunk(chunk.node_id, score, chunk.text, chunk.metadata) for score, chunk in fused[:limit]]
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            calls = self.fused_stats.calls
+            return {
+                "fusion": self.fusion,
+                "sparse_leg": self.sparse_leg,
+                **({"bm25": {"version": self.bm25.version, "chunks": self.bm25.size}} if self.bm25 else {}),
+                "rrf_k": self.rrf_k,
+                "weights": {"dense": self.dense_weight, "sparse": self.sparse_weight},
+                "dense": self.dense_stats.as_dict(),
+                "sparse": self.sparse_stats.as_dict(),
+                "fused": self.fused_stats.as_dict(),
+                "overlap": {"last": self.last_overlap,
+                            "avg": round(self.overlap_total / calls, 3) if calls else None},
+            }
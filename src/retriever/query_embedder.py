@@ -0,0 +1,102 @@
+import logging
+import queue
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import List, Tuple
+
+logger = logging.getLogger(__name__)
+
+def normalize_query(query: str) -> str:
+    # The memorized_agent re-issues the same enriched query with different spacing and casing
+    return re.sub(r"\s+", " ", query).strip().lower()
+
+class QueryEmbedder:
+    def __init__(self, embed_model, cache_size: int, max_batch: int, max_wait_ms: float):
+        self.embed_model = embed_model
+        self.cache_size = max(0, cache_size)
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max_wait_ms / 1000
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.batches = 0
+        self.batched_queries = 0
+        self._cache: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._requests: "queue.Queue[Tuple[str, str]]" = queue.Queue()
+        self._worker = threading.Thread(target=self._run, name="query-embedder", daemon=True)
+        self._worker.start()
+
+    def get_query_embedding(self, query: str) -> List[float]:
+        key = normalize_query(query)
+        with self._lock:
+            embedding = self._cache.get(key)
+            if embedding is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return embedding
+            self.misses += 1
+            future = self._pending.get(key)
+            if future is not None:
+                # The same query is already on its way to the model; share that call
+                self.coalesced += 1
+            else:
+                future = self._pending[key] = Future()
+                # The normalized form only keys the cache; the model sees the query as it was written
+                self._requests.put((key, query))
+        return future.result()
+
+    def _run(self):
+        while True:
+            batch = [self._requests.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._requests.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._embed(batch)
+
+    def _embed(self, batch: List[Tuple[str, str]]):
+        keys = [key for key, _ in batch]
+        try:
+            # Ollama embeds queries and documents the same way, so one batch call serves all queued queries
+            embeddings = self.embed_model.get_text_embedding_batch([query for _, query in batch])
+        except Exception as e:
+            with self._lock:
+                futures = [self._pending.pop(key) for key in keys]
+            for future in futures:
+                future.set_exception(e)
+            return
+
+        with self._lock:
+            self.batches += 1
+            self.batched_queries += len(keys)
+            futures = []
+            for key, embedding in zip(keys, embeddings):
+                futures.append((self._pending.pop(key), embedding))
+                if self.cache_size:
+                    self._cache[key] = embedding
+                    self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        for future, embedding in futures:
+            future.set_result(embedding)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "cached": len(self._cache),
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "batches": self.batches,
+                "avg_batch_size": round(self.batched_queries / self.batches, 2) if self.batches else None,
+            }
@@ -0,0 +1,84 @@
+import logging
+import threading
+import time
+from dataclasses import replace
+from typing import Dict, List, Optional
+
+from config.config import Config
+from retriever.retriever import RetrievedChunk
+
+logger = logging.getLogger(__name__)
+
+class CrossEncoderReranker:
+    # Weights are loaded once per process and shared by every crew and request
+    _models: Dict[str, object] = {}
+    _models_lock = threading.Lock()
+    # Measured cost per pair, shared like the weights so a freshly built reranker applies the budget at once
+    _pair_costs: Dict[str, float] = {}
+
+    def __init__(self, model_name: str = Config.RERANKER_MODEL, top_n: int = Config.RERANK_TOP_N,
+                 budget_ms: float = Config.RERANK_BUDGET_MS, batch_size: int = Config.RERANK_BATCH_SIZE,
+                 model=None):
+        self.model_name = model_name
+        self.top_n = max(1, top_n)
+        self.budget_ms = budget_ms
+        self.batch_size = batch_size
+        self._model = model
+        self._costs = CrossEncoderReranker._pair_costs if model is None else {}
+        self.last_latency_ms: Optional[float] = None
+
+    @classmethod
+    def load_model(cls, model_name: str):
+        if model_name not in cls._models:
+            with cls._models_lock:
+                if model_name not in cls._models:
+                    from sentence_transformers import CrossEncoder
+                    started = time.perf_counter()
+                    cls._models[model_name] = CrossEncoder(model_name, device="cpu")
+                    logger.info(f"Loaded cross-encoder {model_name} in {(time.perf_counter() - started) * 1000:.0f} ms")
+        return cls._models[model_name]
+
+    @property
+    def model(self):
+        if self._model is None:
+            self._model = self.load_model(self.model_name)
+        return self._model
+
+    @property
+    def _pair_ms(self) -> Optional[float]:
+        return self._costs.get(self.model_name)
+
+    @_pair_ms.setter
+    def _pair_ms(self, value: float):
+        self._costs[self.model_name] = value
+
+    def warm_up(self):
+        self.model.predict([("warm up", "warm up")], batch_size=1, show_progress_bar=False)
+
+    def _affordable_pairs(self, candidates: int) -> int:
+        # The forward pass cannot be interrupted, so the budget caps how many pairs go into it
+        if self._pair_ms is None or self.budget_ms <= 0:
+            return candidates
+        return max(self.top_n, min(candidates, int(self.budget_ms / self._pair_ms)))
+
+    def rerank(self, query: str, chunks: List[RetrievedChunk], top_n: Optional[int] = None) -> List[RetrievedChunk]:
+        top_n = top_n or self.top_n
+        if len(chunks) <= 1:
+            return list(chunks[:top_n])
+
+        limit = self._affordable_pairs(len(chunks))
+        candidates, overflow = chunks[:limit], chunks[limit:]
+        started = time.perf_counter()
+        scores = self.model.predict([(query, chunk.text) for chunk in candidates],
+                                    batch_size=self.batch_size, show_progress_bar=False)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        pair_ms = elapsed_ms / len(candidates)
+        self._pair_ms = pair_ms if self._pair_ms is None else 0.8 * self._pair_ms + 0.2 * pair_ms
+        self.last_latency_ms = round(elapsed_ms, 1)
+        if overflow:
+            logger.info(f"Rerank budget {self.budget_ms:.0f} ms: scored {len(candidates)} of {len(chunks)} candidates")
+
+        scored = sorted((replace(chunk, score=float(score)) for chunk, score in zip(candidates, scores)),
+                        key=lambda chunk: chunk.score, reverse=True)
+        # Unscored candidates keep the retriever's order behind the scored ones
+        return (scored + list(overflow))[:top_n]
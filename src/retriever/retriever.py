@@ -1,52 +1,271 @@
 import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field, replace
+from typing import Any, Dict, List, Optional
+from config.config import Config
 from config.config_rag import ConfigRag
-from llama_index.core import Settings, VectorStoreIndex
+from llama_index.core import QueryBundle, Settings, VectorStoreIndex
+from monitoring import metrics
+from retriever.query_embedder import QueryEmbedder
 
 logger = logging.getLogger(__name__)
 
+# Fields an API request may override; the max_* bounds and adaptive thresholds stay server-side
+REQUEST_PARAMS = ("top_k", "sparse_top_k", "min_score", "ef_search", "adaptive")
+# Query engines kept per distinct (top_k, sparse_top_k, ef_search), least recently used dropped first
+MAX_ENGINES = 8
+
+@dataclass(frozen=True)
+class RetrievedChunk:
+    # Holds references to the node's own text and metadata; nothing is copied or re-parsed downstream
+    node_id: str
+    score: float
+    text: str
+    metadata: Dict[str, Any] = field(default_factory=dict)
+    start_char_idx: Optional[int] = None
+    end_char_idx: Optional[int] = None
+
+    @classmethod
+    def from_node(cls, node_with_score) -> "RetrievedChunk":
+        node = node_with_score.node
+        return cls(
+            node_id=node.node_id,
+            score=node_with_score.score or 0.0,
+            text=node.text,
+            metadata=node.metadata if hasattr(node, 'metadata') and node.metadata else {},
+            start_char_idx=getattr(node, 'start_char_idx', None),
+            end_char_idx=getattr(node, 'end_char_idx', None),
+        )
+
+    @property
+    def doc_name(self) -> str:
+        return self.metadata.get('doc_source') or self.metadata.get('file_name', 'Unknown Document')
+
+    @property
+    def page(self):
+        return self.metadata.get('page_label', self.metadata.get('page_number', 'N/A'))
+
+def format_chunks(chunks: List[RetrievedChunk]) -> str:
+    return "".join(
+        f"--- Source Document ---\n"
+        f"Document: {chunk.doc_name}\n"
+        f"Page: {chunk.page}\n"
+        f"Relevance Score: {chunk.score:.3f}\n"
+        f"Content: {chunk.text}\n\n"
+        for chunk in chunks
+    )
+
+@dataclass(frozen=True)
+class RetrievalParams:
+    top_k: int = Config.RETRIEVER_TOP_K
+    sparse_top_k: int = Config.RETRIEVER_SPARSE_TOP_K
+    min_score: float = Config.RETRIEVER_MIN_SCORE
+    ef_search: int = Config.HNSW_EF_SEARCH
+    adaptive: bool = Config.RETRIEVER_ADAPTIVE
+    max_top_k: int = Config.RETRIEVER_MAX_TOP_K
+    max_ef_search: int = Config.HNSW_MAX_EF_SEARCH
+    confident_score: float = Config.RETRIEVER_CONFIDENT_SCORE
+    score_gap: float = Config.RETRIEVER_SCORE_GAP
+
+    @classmethod
+    def from_overrides(cls, overrides: Optional[Dict[str, Any]]) -> "RetrievalParams":
+        defaults = cls()
+        if not overrides:
+            return defaults
+        unknown = set(overrides) - set(REQUEST_PARAMS)
+        if unknown:
+            raise ValueError(f"Unknown retrieval parameters: {', '.join(sorted(unknown))}")
+        values = {}
+        for name, value in overrides.items():
+            kind = type(getattr(defaults, name))
+            if kind is bool and not isinstance(value, bool):
+                raise TypeError(f"{name} must be a boolean")
+            values[name] = kind(value)
+        bounds = {"top_k": (1, defaults.max_top_k), "sparse_top_k": (1, defaults.max_top_k),
+                  "ef_search": (1, defaults.max_ef_search), "min_score": (0.0, 1.0)}
+        for name, (low, high) in bounds.items():
+            if name in values and not low <= values[name] <= high:
+                raise ValueError(f"{name} must be between {low} and {high}")
+        return replace(defaults, **values)
+
+    @property
+    def engine_key(self):
+        return (self.top_k, self.sparse_top_k, self.ef_search)
+
+    def widened(self) -> "RetrievalParams":
+        return replace(self, top_k=max(self.top_k, self.max_top_k), sparse_top_k=max(self.sparse_top_k, self.max_top_k // 2),
+                       ef_search=max(self.ef_search, self.max_ef_search))
+
 class Retriever:
+    _instance = None
+    _instance_lock = threading.Lock()
+
     def __init__(self):
+        self._stats_lock = threading.Lock()
+        self.warmed_up = False
+        self.query_count = 0
+        self.error_count = 0
+        self.last_error = None
+        self.last_latency_ms = None
+        self.widened_count = 0
+        self.narrowed_count = 0
+        self.params = RetrievalParams()
+        self._engines = OrderedDict()
+        self._engines_lock = threading.Lock()
         self._setup_vector_store()
-    
+
+    @classmethod
+    def get_instance(cls) -> "Retriever":
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = cls()
+        return cls._instance
+
     def _setup_vector_store(self):
         try:
             Settings.embed_model = ConfigRag.get_embedding_model()
             Settings.llm = None
-            vector_store = ConfigRag.get_vector_store()
-            index = VectorStoreIndex.from_vector_store(
-                vector_store=vector_store, 
+            self.table_name = ConfigRag.active_table()
+            vector_store = ConfigRag.get_vector_store(self.table_name)
+            self.index = VectorStoreIndex.from_vector_store(
+                vector_store=vector_store,
                 embed_model=Settings.embed_model
             )
-            self.query_engine = index.as_query_engine(
+            self.query_engine = self._engine_for(self.params)
+            self.query_embedder = QueryEmbedder(
+                Settings.embed_model,
+                cache_size=Config.QUERY_EMBED_CACHE_SIZE,
+                max_batch=Config.QUERY_EMBED_BATCH_MAX,
+                max_wait_ms=Config.QUERY_EMBED_BATCH_WAIT_MS,
+            )
+            self.hybrid = None
+            if Config.HYBRID_ENGINE == "native":
+                from retriever.hybrid import HybridSearchEngine
+                self.hybrid = HybridSearchEngine(self.query_embedder, table_name=self.table_name)
+        except Exception as e:
+            logger.error(f"Failed to setup vector store: {e}")
+            raise
+
+    def _engine_for(self, params: RetrievalParams):
+        # Engines are cheap but not free to build; the MAX_ENGINES most recently used settings keep theirs
+        with self._engines_lock:
+            engine = self._engines.get(params.engine_key)
+            if engine is not None:
+                self._engines.move_to_end(params.engine_key)
+                return engine
+            engine = self.index.as_query_engine(
                 vector_store_query_mode="hybrid",
                 llm=None,
-                similarity_top_k=2,
-                sparse_top_k=1,
+                similarity_top_k=params.top_k,
+                sparse_top_k=params.sparse_top_k,
+                vector_store_kwargs={"hnsw_ef_search": params.ef_search},
                 response_mode="no_text"
             )
+            self._engines[params.engine_key] = engine
+            while len(self._engines) > MAX_ENGINES:
+                self._engines.popitem(last=False)
+        return engine
+
+    def _follow_active_table(self):
+        # A reindex or rollback switched the index version; rebuild the index and engines on the new table
+        table_name = ConfigRag.active_table()
+        if table_name == self.table_name:
+            return
+        with self._engines_lock:
+            if table_name == self.table_name:
+                return
+            self.index = VectorStoreIndex.from_vector_store(
+                vector_store=ConfigRag.get_vector_store(table_name),
+                embed_model=Settings.embed_model
+            )
+            self._engines = OrderedDict()
+            if self.hybrid:
+                self.hybrid.table_name = table_name
+            logger.info(f"Retriever switched from {self.table_name} to {table_name}")
+            self.table_name = table_name
+        self.query_engine = self._engine_for(self.params)
+
+    def warm_up(self):
+        started = time.perf_counter()
+        self.search("warm up")
+        self.warmed_up = True
+        logger.info(f"Retriever warmed up in {(time.perf_counter() - started) * 1000:.0f} ms")
+
+    def health(self) -> dict:
+        with self._stats_lock:
+            return {
+                "status": "error" if self.last_error else "ok",
+                "warmed_up": self.warmed_up,
+                "queries": self.query_count,
+                "errors": self.error_count,
+                "last_latency_ms": self.last_latency_ms,
+                "last_error": self.last_error,
+                "adaptive": {"widened": self.widened_count, "narrowed": self.narrowed_count},
+                "engine": Config.HYBRID_ENGINE,
+                "table": self.table_name,
+                "query_embeddings": self.query_embedder.stats(),
+                **({"hybrid": self.hybrid.stats()} if self.hybrid else {}),
+            }
+
+    def _query(self, query: str, params: RetrievalParams) -> List[RetrievedChunk]:
+        started = time.perf_counter()
+        try:
+            self._follow_active_table()
+            if self.hybrid:
+                chunks = self.hybrid.search(query, params)
+            else:
+                with metrics.timed("query_embedding"):
+                    embedding = self.query_embedder.get_query_embedding(query)
+                with metrics.timed("vector_search"):
+                    source_nodes = self._engine_for(params).query(QueryBundle(query_str=query, embedding=embedding)).source_nodes
+                chunks = [RetrievedChunk.from_node(n) for n in source_nodes]
         except Exception as e:
-            logger.error(f"Failed to setup vector store: {e}")
+            with self._stats_lock:
+                self.error_count += 1
+                self.last_error = str(e)
             raise
-    
-    def search(self, query: str, min_score: float = 0.5) -> str:
+        with self._stats_lock:
+            self.query_count += 1
+            self.last_error = None
+            self.last_latency_ms = round((time.perf_counter() - started) * 1000, 1)
+        return sorted(chunks, key=lambda chunk: chunk.score, reverse=True)
+
+    def _adapt(self, query: str, params: RetrievalParams, chunks: List[RetrievedChunk]) -> List[RetrievedChunk]:
+        # A clear winner needs no long tail; a low or flat score distribution means the answer may sit deeper
+        scores = [chunk.score for chunk in chunks]
+        runner_up = scores[1] if len(scores) > 1 else 0.0
+        if scores and scores[0] >= params.confident_score and scores[0] - runner_up >= params.score_gap:
+            with self._stats_lock:
+                self.narrowed_count += 1
+            return [chunk for chunk in chunks if chunk.score >= scores[0] - params.score_gap]
+        wider = params.widened()
+        if wider.engine_key == params.engine_key:
+            return chunks
+        with self._stats_lock:
+            self.widened_count += 1
+        return self._query(query, wider)
+
+    def retrieve(self, query: str, min_score: Optional[float] = None,
+                 params: Optional[RetrievalParams] = None) -> List[RetrievedChunk]:
         if not self.query_engine:
             raise ValueError("Vector store not initialized")
-        
-        response = self.query_engine.query(query)
-        filtered_nodes = [n for n in response.source_nodes if n.score >= min_score]
-        
-        formatted_chunks = []
-        for node in filtered_nodes:
-            metadata = node.node.metadata if hasattr(node.node, 'metadata') else {}
-            doc_name = metadata.get('doc_source') or metadata.get('file_name', 'Unknown Document')
-            page_number = metadata.get('page_label', metadata.get('page_number', 'N/A'))
-            
-            formatted_chunks.append(
-                f"--- Source Document ---\n"
-                f"Document: {doc_name}\n"
-                f"Page: {page_number}\n"
-                f"Relevance Score: {node.score:.3f}\n"
-                f"Content: {node.node.text}\n\n"
-            )
-        
-        return "".join(formatted_chunks)
\ No newline at end of file
+
+        params = params or self.params
+        if min_score is not None:
+            params = replace(params, min_score=min_score)
+        if self.hybrid:
+            # Native fusion scores rank a chunk against this query's other candidates; the min_score and adaptive
+            # cut-offs are calibrated on cosine similarity and would drop most single-leg hits
+            params = replace(params, min_score=0.0, adaptive=False)
+        with metrics.timed("retrieval"):
+            chunks = self._query(query, params)
+            if params.adaptive:
+                chunks = self._adapt(query, params, chunks)
+
+        return [chunk for chunk in chunks if chunk.score >= params.min_score]
+
+    def search(self, query: str, min_score: Optional[float] = None, params: Optional[RetrievalParams] = None) -> str:
+        return format_chunks(self.retrieve(query, min_score, params))
@@ -0,0 +1,276 @@
+import os
+import re
+import sys
+import json
+import time
+import uuid
+import argparse
+import subprocess
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import requests
+
+sys.path.append(os.path.dirname(__file__))
+
+from stub_ollama import StubOllama
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+QUESTIONS = os.path.join(ROOT, "tests", "retriever", "ragas_ground_truth.json")
+COMPOSE_FILE = os.path.join(os.path.dirname(__file__), "docker-compose.yml")
+METRIC_RE = re.compile(r'^rag_stage_duration_seconds_(sum|count)\{(.*)\} (\S+)$')
+LABEL_RE = re.compile(r'(\w+)="((?:[^"\\]|\\.)*)"')
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))] if ordered else 0.0
+
+def load_questions() -> List[str]:
+    with open(QUESTIONS, 'r', encoding='utf-8') as f:
+        return [item["question"] for item in json.load(f)]
+
+def scrape_stages(base_url: str) -> Dict[str, Dict[str, float]]:
+    """Histogram sums and counts from /metrics, keyed by stage plus any extra labels (e.g. crew_task:llm_task)"""
+    stages: Dict[str, Dict[str, float]] = {}
+    text = requests.get(f"{base_url}/metrics", timeout=10).text
+    for line in text.splitlines():
+        match = METRIC_RE.match(line)
+        if not match:
+            continue
+        kind, labels, value = match.groups()
+        labels = dict(LABEL_RE.findall(labels))
+        name = ":".join([labels.pop("stage")] + [labels[key] for key in sorted(labels) if labels[key]])
+        stages.setdefault(name, {"sum": 0.0, "count": 0.0})[kind] = float(value)
+    return stages
+
+def stage_breakdown(before: Dict, after: Dict, requests_done: int) -> Dict[str, Dict[str, float]]:
+    """Per-stage deltas over the run: spans per request, mean span time and time per request"""
+    breakdown = {}
+    for name, totals in sorted(after.items()):
+        start = before.get(name, {"sum": 0.0, "count": 0.0})
+        count, seconds = totals["count"] - start["count"], totals["sum"] - start["sum"]
+        if count <= 0:
+            continue
+        breakdown[name] = {
+            "count": int(count),
+            "spans_per_request": count / max(1, requests_done),
+            "mean_ms": seconds / count * 1000,
+            "per_request_ms": seconds / max(1, requests_done) * 1000,
+        }
+    return breakdown
+
+def send(base_url: str, question: str, stream: bool) -> Tuple[int, float, Optional[float]]:
+    """One chat completion with a fresh chat_id; returns status, total latency and time to first content chunk"""
+    payload = {"model": "dge-policy-rag", "messages": [{"role": "user", "content": question}], "stream": stream,
+               "chat_id": f"bench_{uuid.uuid4().hex[:16]}"}
+    started = time.perf_counter()
+    first_chunk = None
+    with requests.post(f"{base_url}/v1/chat/completions", json=payload, stream=stream, timeout=600) as resp:
+        if stream and resp.ok:
+            for line in resp.iter_lines():
+                if first_chunk is None and line.startswith(b"data: ") and b'"content"' in line:
+                    first_chunk = time.perf_counter() - started
+        else:
+            resp.content
+    return resp.status_code, time.perf_counter() - started, first_chunk
+
+def run_load(base_url: str, concurrency: int, total: int, stream: bool, warmup: int) -> Dict:
+    questions = load_questions()
+    for i in range(warmup):
+        send(base_url, questions[i % len(questions)], stream)
+
+    before = scrape_stages(base_url)
+    latencies, ttfts, statuses = [], [], {}
+    lock = threading.Lock()
+
+    def worker(i: int):
+        try:
+            status, latency, ttft = send(base_url, questions[i % len(questions)], stream)
+        except requests.RequestException as e:
+            status, latency, ttft = type(e).__name__, None, None
+        with lock:
+            statuses[str(status)] = statuses.get(str(status), 0) + 1
+            if status == 200:
+                latencies.append(latency)
+                if ttft is not None:
+                    ttfts.append(ttft)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(worker, range(total)))
+    elapsed = time.perf_counter() - started
+    after = scrape_stages(base_url)
+
+    summary = {
+        "requests": total,
+        "ok": len(latencies),
+        "statuses": statuses,
+        "duration_s": elapsed,
+        "rps": len(latencies) / elapsed,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+    }
+    if ttfts:
+        summary.update(ttft_p50_ms=percentile(ttfts, 50) * 1000, ttft_p95_ms=percentile(ttfts, 95) * 1000)
+    return {"summary": summary, "stages": stage_breakdown(before, after, len(latencies))}
+
+def wait_for(url: str, timeout: float, process: Optional[subprocess.Popen] = None):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError(f"Process exited with code {process.returncode} before {url} came up")
+        try:
+            if requests.get(url, timeout=2).ok:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(1)
+    raise TimeoutError(f"{url} not ready after {timeout:.0f}s")
+
+def stack_env(args, cache_dir: str) -> Dict[str, str]:
+    env = dict(os.environ)
+    env.update({
+        "PYTHONPATH": os.path.join(ROOT, "src"),
+        "OLLAMA_BASE_URL": f"http://127.0.0.1:{args.ollama_port}",
+        "EMBEDDING_MODEL": "stub-embed",
+        "EMBEDDING_MODEL_DIM": str(args.dim),
+        "LLM_MODEL": "stub-llm",
+        "DHOST": "127.0.0.1", "DPORT": str(args.db_port), "DUSER": "bench", "DPASSWORD": "bench", "DNAME": "ragbench",
+        "RAG_API_PORT": str(args.api_port),
+        "PHOENIX_HOST": "127.0.0.1",
+        "METRICS_ENABLED": "true",
+        "ANSWER_CACHE_ENABLED": str(args.answer_cache).lower(),
+        "RERANKER_ENABLED": str(args.reranker).lower(),
+        "EMBED_CACHE_PATH": os.path.join(cache_dir, "embeddings.sqlite"),
+        "BM25_INDEX_DIR": os.path.join(cache_dir, "bm25"),
+    })
+    return env
+
+@contextmanager
+def local_stack(args):
+    """Stub Ollama in-process, a throwaway Postgres from docker compose, an index of data/md and the API"""
+    server = StubOllama(args.dim, args.embed_ms, args.first_token_ms, args.token_ms).serve(port=args.ollama_port)
+    compose = ["docker", "compose", "-f", COMPOSE_FILE]
+    api = None
+    with tempfile.TemporaryDirectory(prefix="rag-bench-") as cache_dir:
+        env = stack_env(args, cache_dir)
+        try:
+            subprocess.run(compose + ["up", "-d", "--wait", "postgres"], check=True,
+                           env={**os.environ, "BENCH_DPORT": str(args.db_port)})
+            subprocess.run([sys.executable, "-m", "indexer.ingester"], cwd=ROOT, env=env, check=True)
+            api = subprocess.Popen([sys.executable, "-m", "api.service"], cwd=ROOT, env=env)
+            wait_for(f"http://127.0.0.1:{args.api_port}/health", args.startup_timeout, api)
+            yield f"http://127.0.0.1:{args.api_port}"
+        finally:
+            if api is not None:
+                api.terminate()
+                api.wait(timeout=30)
+            if not args.keep_db:
+                subprocess.run(compose + ["down", "-v"], check=False)
+            server.shutdown()
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def print_run(run: Dict):
+    summary = run["summary"]
+    print(f"concurrency={run['config']['concurrency']:<3} ok={summary['ok']}/{summary['requests']} "
+          f"rps={summary['rps']:.2f} p50={summary['p50_ms']:.0f} ms p95={summary['p95_ms']:.0f} ms "
+          f"p99={summary['p99_ms']:.0f} ms statuses={summary['statuses']}")
+    for name, stage in run["stages"].items():
+        print(f"  {name:<32} {stage['spans_per_request']:>5.2f}/req  mean={stage['mean_ms']:>9.1f} ms  "
+              f"per request={stage['per_request_ms']:>9.1f} ms")
+
+def compare(limit: int):
+    """Summary lines of the stored runs, oldest first, with p95 and rps relative to the previous run"""
+    files = sorted(f for f in os.listdir(RESULTS_DIR) if f.startswith("load_") and f.endswith(".json"))[-limit:] \
+        if os.path.isdir(RESULTS_DIR) else []
+    previous = {}
+    for name in files:
+        with open(os.path.join(RESULTS_DIR, name), 'r', encoding='utf-8') as f:
+            report = json.load(f)
+        for run in report["runs"]:
+            summary, key = run["summary"], (run["config"]["concurrency"], run["config"]["stream"])
+            delta = ""
+            if key in previous:
+                last = previous[key]
+                delta = (f"  p95 {summary['p95_ms'] / last['p95_ms'] - 1:+.1%}" if last["p95_ms"] else "") + \
+                        (f"  rps {summary['rps'] / last['rps'] - 1:+.1%}" if last["rps"] else "")
+            print(f"{report['timestamp']}  {report.get('commit') or '-':<9} {report['label'] or '-':<16} "
+                  f"c={key[0]:<3} p50={summary['p50_ms']:>7.0f} p95={summary['p95_ms']:>7.0f} "
+                  f"p99={summary['p99_ms']:>7.0f} ms rps={summary['rps']:>6.2f}{delta}")
+            previous[key] = summary
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test /v1/chat/completions and record latency per stage")
+    parser.add_argument("--url", help="Benchmark a running API instead of starting the local stub stack")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--requests", type=int, default=40, help="Requests per concurrency level")
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--stream", action="store_true", help="Use SSE streaming and also report time to first chunk")
+    parser.add_argument("--label", default="", help="Free-form tag stored with the results, e.g. a branch name")
+    parser.add_argument("--compare", type=int, nargs="?", const=20, metavar="N",
+                        help="Print the last N stored runs and exit")
+    stack = parser.add_argument_group("local stack")
+    stack.add_argument("--api-port", type=int, default=8018)
+    stack.add_argument("--ollama-port", type=int, default=11435)
+    stack.add_argument("--db-port", type=int, default=5433)
+    stack.add_argument("--dim", type=int, default=384)
+    stack.add_argument("--embed-ms", type=float, default=5.0)
+    stack.add_argument("--first-token-ms", type=float, default=200.0)
+    stack.add_argument("--token-ms", type=float, default=10.0)
+    stack.add_argument("--reranker", action="store_true", help="Keep the cross-encoder on (needs the model locally)")
+    stack.add_argument("--answer-cache", action="store_true", help="Keep the semantic answer cache on")
+    stack.add_argument("--keep-db", action="store_true", help="Leave the benchmark Postgres running afterwards")
+    stack.add_argument("--startup-timeout", type=float, default=300.0)
+    args = parser.parse_args()
+
+    if args.compare is not None:
+        compare(args.compare)
+        return
+
+    @contextmanager
+    def target():
+        if args.url:
+            yield args.url.rstrip('/')
+        else:
+            with local_stack(args) as url:
+                yield url
+
+    runs = []
+    with target() as base_url:
+        for concurrency in args.concurrency:
+            run = run_load(base_url, concurrency, args.requests, args.stream, args.warmup)
+            run["config"] = {"concurrency": concurrency, "requests": args.requests, "stream": args.stream}
+            print_run(run)
+            runs.append(run)
+
+    timestamp = datetime.now().strftime("%Y%m%dT%H%M%S")
+    report = {
+        "timestamp": timestamp,
+        "commit": git_commit(),
+        "label": args.label,
+        "target": args.url or "local stub stack",
+        "stub": None if args.url else {"dim": args.dim, "embed_ms": args.embed_ms,
+                                       "first_token_ms": args.first_token_ms, "token_ms": args.token_ms,
+                                       "reranker": args.reranker, "answer_cache": args.answer_cache},
+        "runs": runs,
+    }
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    output = os.path.join(RESULTS_DIR, f"load_{timestamp}.json")
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {output}")
+
+if __name__ == "__main__":
+    main()
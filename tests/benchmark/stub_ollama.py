@@ -0,0 +1,181 @@
+import os
+import re
+import sys
+import json
+import time
+import hashlib
+import argparse
+import threading
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+# Deterministic stand-in for the Ollama endpoints the stack calls: /api/embed and /api/embeddings for
+# OllamaEmbedding, /api/generate and /api/chat for the crew LLM (litellm "ollama/..." models). Same input,
+# same output, with configurable latencies so runs measure the RAG stack rather than a model.
+
+WORD_RE = re.compile(r"[a-z0-9]+")
+TOOL_MARKER = "Tool Name: retriever_reranker"
+GUARDRAIL_MARKER = "Check if this query is safe"
+
+def embed(text: str, dim: int) -> List[float]:
+    """Hashed bag of words, L2-normalised: texts sharing words are close, so retrieval still ranks sensibly"""
+    vector = [0.0] * dim
+    for word in WORD_RE.findall(text.lower()):
+        digest = hashlib.md5(word.encode("utf-8")).digest()
+        index = int.from_bytes(digest[:4], "little") % dim
+        vector[index] += 1.0 if digest[4] & 1 else -1.0
+    norm = sum(v * v for v in vector) ** 0.5
+    if not norm:
+        vector[0], norm = 1.0, 1.0
+    return [v / norm for v in vector]
+
+def _field(pattern: str, text: str, default: str) -> str:
+    match = re.search(pattern, text)
+    return match.group(1).strip() if match else default
+
+def complete(prompt: str, answer_words: int) -> str:
+    """ReAct turns in the format crewai parses: guardrail verdict, one retriever_reranker call, then an answer"""
+    if GUARDRAIL_MARKER in prompt and TOOL_MARKER not in prompt:
+        return "Thought: The query is about organisational policy.\nFinal Answer: VALID"
+    if TOOL_MARKER in prompt and "Observation:" not in prompt:
+        query = _field(r"Answer the query: (.+)", prompt, "policy")
+        chat_id = _field(r"Chat ID: (\S+)", prompt, "default_chat")
+        return ("Thought: I should search the policy documents.\nAction: retriever_reranker\n"
+                f"Action Input: {json.dumps({'query': query, 'chat_id': chat_id})}")
+    documents = sorted(set(re.findall(r"Document: (.+)", prompt)))[:3] or ["Policy Manual"]
+    seed = int(hashlib.md5(prompt.encode("utf-8")).hexdigest()[:8], 16)
+    words = ["policy", "employees", "approval", "article", "procedure", "manager", "section", "required"]
+    body = " ".join(words[(seed + i) % len(words)] for i in range(answer_words))
+    sources = "\n".join(f"- {name}" for name in documents)
+    return f"Thought: I now know the final answer\nFinal Answer: {body}.\n\nSources:\n{sources}"
+
+class StubOllama:
+    def __init__(self, dim: int, embed_ms: float = 5.0, first_token_ms: float = 200.0, token_ms: float = 10.0,
+                 answer_words: int = 60):
+        self.dim = dim
+        self.embed_ms = embed_ms
+        self.first_token_ms = first_token_ms
+        self.token_ms = token_ms
+        self.answer_words = answer_words
+        self.calls: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def count(self, path: str):
+        with self._lock:
+            self.calls[path] = self.calls.get(path, 0) + 1
+
+    def serve(self, host: str = "127.0.0.1", port: int = 11435) -> ThreadingHTTPServer:
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                if self.path in ("/", "/api/version"):
+                    self._json({"version": "0.0.0-stub"})
+                elif self.path == "/api/tags":
+                    self._json({"models": []})
+                else:
+                    self._json({"error": f"unknown path {self.path}"}, status=404)
+
+            def do_HEAD(self):
+                self.send_response(200)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+                stub.count(self.path)
+                if self.path == "/api/embed":
+                    inputs = body.get("input", "")
+                    inputs = [inputs] if isinstance(inputs, str) else inputs
+                    time.sleep(stub.embed_ms / 1000)
+                    self._json({"model": body.get("model"), "embeddings": [embed(text, stub.dim) for text in inputs]})
+                elif self.path == "/api/embeddings":
+                    time.sleep(stub.embed_ms / 1000)
+                    self._json({"embedding": embed(body.get("prompt", ""), stub.dim)})
+                elif self.path in ("/api/generate", "/api/chat"):
+                    self._generate(body, chat=self.path == "/api/chat")
+                else:
+                    self._json({"error": f"unknown path {self.path}"}, status=404)
+
+            def _generate(self, body: dict, chat: bool):
+                if chat:
+                    prompt = "\n".join(str(m.get("content", "")) for m in body.get("messages", []))
+                else:
+                    prompt = f"{body.get('system', '')}\n{body.get('prompt', '')}"
+                text = complete(prompt, stub.answer_words)
+                tokens = re.findall(r"\S+\s*", text)
+                time.sleep(stub.first_token_ms / 1000)
+                if not body.get("stream", True):
+                    time.sleep(stub.token_ms * len(tokens) / 1000)
+                    self._json(self._message(body, text, chat, done=True, eval_count=len(tokens), prompt=prompt))
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                for i, token in enumerate(tokens):
+                    if i:
+                        time.sleep(stub.token_ms / 1000)
+                    self._chunk(self._message(body, token, chat, done=False))
+                self._chunk(self._message(body, "", chat, done=True, eval_count=len(tokens), prompt=prompt))
+                self.wfile.write(b"0\r\n\r\n")
+
+            @staticmethod
+            def _message(body: dict, text: str, chat: bool, done: bool, eval_count: int = 0,
+                         prompt: Optional[str] = None) -> dict:
+                message = {"model": body.get("model"), "created_at": datetime.now(timezone.utc).isoformat(),
+                           "done": done}
+                if chat:
+                    message["message"] = {"role": "assistant", "content": text}
+                else:
+                    message["response"] = text
+                if done:
+                    message.update(done_reason="stop", eval_count=eval_count,
+                                   prompt_eval_count=len((prompt or "").split()), total_duration=0)
+                return message
+
+            def _chunk(self, payload: dict):
+                data = (json.dumps(payload) + "\n").encode("utf-8")
+                self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+                self.wfile.flush()
+
+            def _json(self, payload: dict, status: int = 200):
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, name="stub-ollama", daemon=True).start()
+        return server
+
+def main():
+    parser = argparse.ArgumentParser(description="Deterministic local stand-in for the Ollama LLM and embedding API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--dim", type=int, default=int(os.getenv("EMBEDDING_MODEL_DIM", "384")))
+    parser.add_argument("--embed-ms", type=float, default=5.0, help="Latency per embedding request")
+    parser.add_argument("--first-token-ms", type=float, default=200.0, help="LLM latency before the first token")
+    parser.add_argument("--token-ms", type=float, default=10.0, help="LLM latency per further token")
+    parser.add_argument("--answer-words", type=int, default=60)
+    args = parser.parse_args()
+
+    server = StubOllama(args.dim, args.embed_ms, args.first_token_ms, args.token_ms,
+                        args.answer_words).serve(args.host, args.port)
+    print(f"Stub Ollama listening on http://{args.host}:{server.server_port} (dim={args.dim})", file=sys.stderr)
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+import os
+import sys
+import json
+import time
+import statistics
+from typing import Dict, List
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+
+def load_cases(file_path: str) -> List[Dict]:
+    with open(file_path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    print(f"Loaded {len(data)} guardrail test cases")
+    return data
+
+def evaluate_fast_guardrail(cases: List[Dict], use_embeddings: bool = True) -> Dict:
+    """Score the first-stage guardrail; AMBIGUOUS verdicts are deferred to the LLM guardrail"""
+    from agents.fast_guardrail import FastGuardrail, BLOCKED, VALID, AMBIGUOUS
+    
+    embed_model = None
+    if use_embeddings:
+        from config.config_rag import ConfigRag
+        embed_model = ConfigRag.get_embedding_model()
+    guardrail = FastGuardrail(FastGuardrail.load_topics(), embed_model=embed_model)
+    guardrail.classify("warm up")
+    
+    tp = fp = fn = tn = deferred = 0
+    latencies = []
+    rows = []
+    for case in cases:
+        started = time.perf_counter()
+        result = guardrail.classify(case["query"])
+        latencies.append((time.perf_counter() - started) * 1000)
+        
+        expected_blocked = case["expected"] == BLOCKED
+        if result.verdict == AMBIGUOUS:
+            deferred += 1
+        elif result.verdict == BLOCKED:
+            tp += expected_blocked
+            fp += not expected_blocked
+        elif result.verdict == VALID:
+            fn += expected_blocked
+            tn += not expected_blocked
+        rows.append((case["query"], case["expected"], result.verdict, result.reason))
+    
+    decided_blocked = tp + fp
+    actual_blocked = sum(1 for c in cases if c["expected"] == BLOCKED)
+    return {
+        "cases": len(cases),
+        "precision": tp / decided_blocked if decided_blocked else 1.0,
+        "recall": tp / actual_blocked if actual_blocked else 1.0,
+        "false_valid": fn,
+        "deferred_to_llm": deferred,
+        "llm_calls_saved": (len(cases) - deferred) / len(cases),
+        "latency_p50_ms": statistics.median(latencies),
+        "latency_max_ms": max(latencies),
+        "rows": rows,
+    }
+
+def print_report(results: Dict, title: str):
+    print("\n" + "=" * 80)
+    print(title)
+    print("=" * 80)
+    for query, expected, verdict, reason in results["rows"]:
+        marker = "  " if verdict == "AMBIGUOUS" else ("✅" if verdict == expected else "❌")
+        print(f"{marker} {verdict:<9} (expected {expected:<7}) {query[:55]:<55} {reason}")
+    print(f"\nBLOCKED precision: {results['precision']:.3f}")
+    print(f"BLOCKED recall (deferred count as misses): {results['recall']:.3f}")
+    print(f"False VALID verdicts: {results['false_valid']}")
+    print(f"Deferred to LLM guardrail: {results['deferred_to_llm']}/{results['cases']} "
+          f"({results['llm_calls_saved']:.0%} LLM guardrail calls saved)")
+    print(f"Latency p50: {results['latency_p50_ms']:.2f} ms, max: {results['latency_max_ms']:.2f} ms")
+
+def main():
+    cases = load_cases(os.path.join(os.path.dirname(__file__), "guardrail_test_cases.json"))
+    print_report(evaluate_fast_guardrail(cases, use_embeddings=False), "FAST GUARDRAIL - keywords only")
+    try:
+        print_report(evaluate_fast_guardrail(cases, use_embeddings=True), "FAST GUARDRAIL - keywords + embeddings")
+    except Exception as e:
+        print(f"\nEmbedding stage skipped: {e}")
+
+if __name__ == "__main__":
+    main()
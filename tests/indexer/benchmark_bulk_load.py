@@ -0,0 +1,101 @@
+import os
+import sys
+import json
+import time
+import random
+import argparse
+from typing import Dict, List
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+WORDS = ("employee procurement article supplier contract approval leave probation salary policy "
+         "committee tender payment manager security access incident data classification").split()
+
+def make_nodes(count: int, dim: int, seed: int = 7) -> List:
+    """Synthetic chunks of roughly policy-chunk size with random unit embeddings"""
+    import numpy as np
+    from llama_index.core.schema import TextNode
+
+    rng = random.Random(seed)
+    vectors = np.random.default_rng(seed).standard_normal((count, dim)).astype("float32")
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return [
+        TextNode(text=" ".join(rng.choices(WORDS, k=300)),
+                 metadata={"file_name": f"bench_{i % 20}.md", "page_number": i % 50 + 1},
+                 embedding=vectors[i].tolist())
+        for i in range(count)
+    ]
+
+def batches(nodes: List, size: int):
+    for start in range(0, len(nodes), size):
+        yield nodes[start:start + size]
+
+def bench_insert(nodes: List, batch_size: int) -> Dict:
+    """Current path: PGVectorStore.add, per-row INSERTs into a table whose HNSW index is maintained per row"""
+    from llama_index.vector_stores.postgres import PGVectorStore
+    from config.config import Config
+
+    store = PGVectorStore.from_params(
+        database=Config.DNAME, host=Config.DHOST, port=Config.DPORT, user=Config.DUSER, password=Config.DPASSWORD,
+        table_name="bench_insert", embed_dim=Config.EMBEDDING_DIM, hybrid_search=True, text_search_config="english",
+        hnsw_kwargs={"hnsw_m": Config.HNSW_M, "hnsw_ef_construction": Config.HNSW_EF_CONSTRUCTION,
+                     "hnsw_ef_search": Config.HNSW_EF_SEARCH, "hnsw_dist_method": "vector_cosine_ops"},
+    )
+    started = time.perf_counter()
+    for batch in batches(nodes, batch_size):
+        store.add(batch)
+    elapsed = time.perf_counter() - started
+    return {"path": "insert", "rows": len(nodes), "load_s": elapsed, "index_s": 0.0, "total_s": elapsed,
+            "rows_per_sec": len(nodes) / elapsed}
+
+def bench_copy(nodes: List, batch_size: int) -> Dict:
+    """Bulk path: binary COPY into staging, indexes built once, atomic swap"""
+    from indexer.db.bulk_loader import BulkLoader
+
+    loader = BulkLoader(table_name="data_bench_copy")
+    started = time.perf_counter()
+    loader.begin()
+    for batch in batches(nodes, batch_size):
+        loader.add(batch)
+    loaded = time.perf_counter()
+    loader.finish()
+    elapsed = time.perf_counter() - started
+    return {"path": "copy", "rows": len(nodes), "load_s": loaded - started, "index_s": elapsed - (loaded - started),
+            "total_s": elapsed, "rows_per_sec": len(nodes) / elapsed}
+
+def drop_tables():
+    from indexer.db.db_admin import DBAdmin
+
+    DBAdmin.execute_query([
+        ("DROP TABLE IF EXISTS data_bench_insert CASCADE", None),
+        ("DROP TABLE IF EXISTS data_bench_copy CASCADE", None),
+        ("DROP TABLE IF EXISTS data_bench_copy_staging CASCADE", None),
+    ], autocommit=True)
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare PGVectorStore inserts with the COPY bulk-load path")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--output", default=os.path.join(os.path.dirname(__file__), "results", "bulk_load_benchmark.json"))
+    args = parser.parse_args()
+
+    from config.config import Config
+
+    results = []
+    for rows in args.rows:
+        nodes = make_nodes(rows, Config.EMBEDDING_DIM)
+        drop_tables()
+        for bench in (bench_insert, bench_copy):
+            result = bench(nodes, args.batch_size)
+            results.append(result)
+            print(f"{result['path']:<6} rows={rows:<7} load={result['load_s']:.1f}s index={result['index_s']:.1f}s "
+                  f"total={result['total_s']:.1f}s {result['rows_per_sec']:.0f} rows/sec")
+        drop_tables()
+
+    os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+import os
+import sys
+import json
+import re
+import time
+import argparse
+import itertools
+from typing import Dict, List
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+DATASETS = {
+    "ragas": os.path.join(os.path.dirname(__file__), "ragas_ground_truth.json"),
+    "conversational": os.path.join(os.path.dirname(__file__), "conversational_test_cases.json"),
+}
+
+def load_queries() -> List[Dict]:
+    """Question/context pairs from both evaluation datasets"""
+    with open(DATASETS["ragas"], 'r', encoding='utf-8') as f:
+        queries = [{"question": item["question"], "contexts": item["contexts"]} for item in json.load(f)]
+    with open(DATASETS["conversational"], 'r', encoding='utf-8') as f:
+        for conversation in json.load(f):
+            queries += [{"question": turn["question"], "contexts": turn["contexts"]} for turn in conversation["turns"]]
+    return queries
+
+def _words(text: str) -> set:
+    return set(re.findall(r"[a-z0-9]+", text.lower()))
+
+def is_relevant(chunk_text: str, contexts: List[str], overlap: float = 0.6) -> bool:
+    """A chunk counts as a hit when it covers most of the words of a ground-truth context"""
+    chunk_words = _words(chunk_text)
+    for context in contexts:
+        context_words = _words(context.replace("...", ""))
+        if context_words and len(context_words & chunk_words) / len(context_words) >= overlap:
+            return True
+    return False
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))] if ordered else 0.0
+
+def run_sweep(top_ks: List[int], ef_searches: List[int], adaptive_modes: List[bool], k: int) -> List[Dict]:
+    """Run every query once per parameter combination and report recall@k against latency"""
+    from retriever.retriever import Retriever, RetrievalParams
+
+    retriever = Retriever()
+    queries = load_queries()
+    retriever.retrieve("warm up")
+
+    results = []
+    for top_k, ef_search, adaptive in itertools.product(top_ks, ef_searches, adaptive_modes):
+        params = RetrievalParams(top_k=top_k, sparse_top_k=max(1, top_k // 2), ef_search=ef_search,
+                                 min_score=0.0, adaptive=adaptive)
+        latencies, hits, returned = [], 0, 0
+        for item in queries:
+            started = time.perf_counter()
+            chunks = retriever.retrieve(item["question"], params=params)
+            latencies.append((time.perf_counter() - started) * 1000)
+            returned += len(chunks)
+            hits += any(is_relevant(chunk.text, item["contexts"]) for chunk in chunks[:k])
+        results.append({
+            "top_k": top_k,
+            "ef_search": ef_search,
+            "adaptive": adaptive,
+            f"recall@{k}": hits / len(queries),
+            "avg_chunks": returned / len(queries),
+            "p50_ms": percentile(latencies, 50),
+            "p95_ms": percentile(latencies, 95),
+        })
+        print(f"top_k={top_k:<3} ef_search={ef_search:<4} adaptive={str(adaptive):<5} "
+              f"recall@{k}={hits / len(queries):.3f} p50={percentile(latencies, 50):.1f} ms "
+              f"p95={percentile(latencies, 95):.1f} ms")
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep retrieval parameters against the evaluation datasets")
+    parser.add_argument("--top-k", type=int, nargs="+", default=[2, 5, 10, 20])
+    parser.add_argument("--ef-search", type=int, nargs="+", default=[40, 64, 128, 200])
+    parser.add_argument("--adaptive", choices=["off", "on", "both"], default="both")
+    parser.add_argument("--k", type=int, default=5, help="Cut-off for recall@k")
+    parser.add_argument("--output", default=os.path.join(os.path.dirname(__file__), "results", "retrieval_params_sweep.json"))
+    args = parser.parse_args()
+
+    adaptive_modes = {"off": [False], "on": [True], "both": [False, True]}[args.adaptive]
+    results = run_sweep(args.top_k, args.ef_search, adaptive_modes, args.k)
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+import pytest
+
+from agents.answer_cache import AnswerCache
+
+class KeywordEmbedding:
+    # Deterministic stand-in for the embedding model: one dimension per known keyword
+    KEYWORDS = ["probation", "period", "leave", "annual", "supplier"]
+
+    def get_query_embedding(self, query):
+        words = query.lower().replace("?", "").split()
+        return [float(words.count(keyword)) for keyword in self.KEYWORDS]
+
+def make_cache(fingerprint=lambda: "v1", **kwargs):
+    options = dict(threshold=0.9, ttl_seconds=60, max_entries=10, fingerprint_check_seconds=0)
+    options.update(kwargs)
+    return AnswerCache(KeywordEmbedding(), fingerprint, **options)
+
+class TestAnswerCache:
+    def test_similar_query_hits_with_sources(self):
+        cache = make_cache()
+        cache.store("What is the probation period?", "Six months. Sources: HR Bylaws p.4", "HR Bylaws p.4")
+        
+        hit = cache.lookup("what is the probation period")
+        
+        assert hit.answer == "Six months. Sources: HR Bylaws p.4"
+        assert hit.sources == "HR Bylaws p.4"
+        assert cache.hits == 1
+    
+    def test_dissimilar_query_misses(self):
+        cache = make_cache()
+        cache.store("What is the probation period?", "Six months.", "")
+        
+        assert cache.lookup("How many days of annual leave?") is None
+        assert cache.misses == 1
+    
+    def test_reingestion_invalidates(self):
+        version = {"value": "v1"}
+        cache = make_cache(fingerprint=lambda: version["value"])
+        cache.store("What is the probation period?", "Six months.", "")
+        
+        version["value"] = "v2"
+        
+        assert cache.lookup("What is the probation period?") is None
+        assert cache.stats()["entries"] == 0
+        assert cache.invalidations == 1
+    
+    def test_expired_entries_are_dropped(self):
+        cache = make_cache(ttl_seconds=-1)
+        cache.store("What is the probation period?", "Six months.", "")
+        
+        assert cache.lookup("What is the probation period?") is None
+    
+    def test_evicts_least_recently_used(self):
+        cache = make_cache(max_entries=2)
+        cache.store("probation", "a", "")
+        cache.store("leave", "b", "")
+        cache.lookup("probation")
+        cache.store("supplier", "c", "")
+        
+        assert cache.lookup("probation").answer == "a"
+        assert cache.lookup("leave") is None
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,95 @@
+import pytest
+
+from retriever.bm25_index import BM25Index
+
+CHUNKS = [
+    ("n1", "ethics.md", "Article 3 Conflicts of interest must be disclosed to the line manager.", {"page_number": 3}),
+    ("n2", "ethics.md", "Article 4 Gifts above the threshold must be declared.", {"page_number": 4}),
+    ("n3", "hr.md", "The probation period for new employees is six months.", {"page_number": 1}),
+]
+
+class TestBM25Index:
+    def test_exact_article_number_ranks_first(self, tmp_path):
+        index = BM25Index(str(tmp_path))
+        index.build(CHUNKS)
+        
+        results = index.search("Article 3 of the Code of Business Ethics", top_k=2)
+        
+        assert [chunk.node_id for chunk in results] == ["n1", "n2"]
+        assert results[0].metadata == {"page_number": 3}
+    
+    def test_index_is_reloaded_from_disk(self, tmp_path):
+        BM25Index(str(tmp_path)).build(CHUNKS)
+        
+        results = BM25Index(str(tmp_path)).search("probation period", top_k=5)
+        
+        assert [chunk.node_id for chunk in results] == ["n3"]
+        assert results[0].text == CHUNKS[2][2]
+    
+    def test_incremental_update_replaces_changed_documents(self, tmp_path):
+        index = BM25Index(str(tmp_path))
+        index.build(CHUNKS)
+        
+        index.update({"hr.md"}, [("n4", "hr.md", "The probation period is three months.", {})])
+        
+        assert index.size == 3
+        assert [chunk.node_id for chunk in index.search("probation", top_k=5)] == ["n4"]
+        assert [chunk.node_id for chunk in index.search("gifts", top_k=5)] == ["n2"]
+        assert len([p for p in tmp_path.iterdir() if p.is_dir()]) == 2
+    
+    def test_previous_version_survives_a_swap(self, tmp_path):
+        index = BM25Index(str(tmp_path))
+        index.build(CHUNKS)
+        first = (tmp_path / "CURRENT").read_text()
+        
+        index.build(CHUNKS)
+        
+        assert (tmp_path / first / "meta.json").exists()
+        index.build(CHUNKS)
+        assert not (tmp_path / first).exists()
+    
+    def test_load_retries_a_pointer_that_went_stale(self, tmp_path, monkeypatch):
+        writer = BM25Index(str(tmp_path))
+        writer.build(CHUNKS)
+        stale = (tmp_path / "CURRENT").read_text()
+        writer.build(CHUNKS)
+        writer.build(CHUNKS[:1])
+        reader = BM25Index(str(tmp_path))
+        pointers = iter([stale])
+        read_pointer = reader._read_pointer
+        # The first read sees the version from two rebuilds ago, as a reader that stalled before opening it would
+        monkeypatch.setattr(reader, "_read_pointer", lambda: next(pointers, None) or read_pointer())
+        
+        assert [chunk.node_id for chunk in reader.search("article", top_k=5)] == ["n1"]
+    
+    def test_superseded_version_is_unmapped(self, tmp_path):
+        reader = BM25Index(str(tmp_path))
+        writer = BM25Index(str(tmp_path))
+        writer.build(CHUNKS)
+        reader.search("article", top_k=5)
+        old = reader._segment
+        
+        writer.build(CHUNKS[:1])
+        reader.search("article", top_k=5)
+        
+        assert old.retired and old.chunks.closed
+        assert old.postings_doc is None
+    
+    def test_segment_in_use_stays_mapped_until_released(self, tmp_path):
+        reader = BM25Index(str(tmp_path))
+        writer = BM25Index(str(tmp_path))
+        writer.build(CHUNKS)
+        
+        with reader._reading() as old:
+            writer.build(CHUNKS[:1])
+            assert [chunk.node_id for chunk in reader.search("probation", top_k=5)] == []
+            assert not old.chunks.closed
+            assert [chunk.node_id for chunk in reader._search(old, "probation", top_k=5)] == ["n3"]
+        
+        assert old.chunks.closed
+    
+    def test_missing_index_returns_nothing(self, tmp_path):
+        assert BM25Index(str(tmp_path / "absent")).search("article", top_k=3) == []
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
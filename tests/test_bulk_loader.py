@@ -0,0 +1,48 @@
+import json
+import struct
+
+import pytest
+from llama_index.core.schema import TextNode
+
+from indexer.db.bulk_loader import COPY_SIGNATURE, BulkLoader
+
+def decode_rows(payload: bytes):
+    assert payload.startswith(COPY_SIGNATURE)
+    offset = len(COPY_SIGNATURE) + 8
+    rows = []
+    while True:
+        (count,) = struct.unpack_from(">h", payload, offset)
+        offset += 2
+        if count == -1:
+            return rows
+        fields = []
+        for _ in range(count):
+            (length,) = struct.unpack_from(">i", payload, offset)
+            offset += 4
+            fields.append(payload[offset:offset + length])
+            offset += length
+        rows.append(fields)
+
+class TestBulkLoader:
+    def test_encodes_rows_in_binary_copy_format(self):
+        node = TextNode(id_="n1", text="Article 3 gifts", metadata={"doc_source": "ethics.pdf"},
+                        embedding=[0.5, -1.0, 2.0])
+        
+        rows = decode_rows(BulkLoader(table_name="t", embed_dim=3)._encode([node, node]))
+        
+        assert len(rows) == 2
+        text, metadata, node_id, vector = rows[0]
+        assert text == b"Article 3 gifts"
+        assert node_id == b"n1"
+        assert json.loads(metadata)["doc_source"] == "ethics.pdf"
+        assert "_node_content" in json.loads(metadata)
+        assert struct.unpack(">hh3f", vector) == (3, 0, 0.5, -1.0, 2.0)
+    
+    def test_rejects_wrong_embedding_dimension(self):
+        node = TextNode(id_="n1", text="x", embedding=[0.1, 0.2])
+        
+        with pytest.raises(ValueError, match="expected 3"):
+            BulkLoader(table_name="t", embed_dim=3)._encode([node])
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,60 @@
+import os
+import pytest
+
+from indexer.manifest import ConversionManifest
+
+class TestConversionManifest:
+    def _convert(self, manifest, src, md, content="# Source: policy.pdf\n\nbody"):
+        md.write_text(content, encoding="utf-8")
+        manifest.record(src, md, "2.0.0")
+    
+    def test_unchanged_source_is_skipped(self, tmp_path):
+        src = tmp_path / "policy.pdf"
+        src.write_bytes(b"v1")
+        md = tmp_path / "policy.md"
+        manifest = ConversionManifest(str(tmp_path))
+        self._convert(manifest, src, md)
+        manifest.save()
+        
+        reloaded = ConversionManifest(str(tmp_path))
+        
+        assert not reloaded.needs_conversion(src, md, "2.0.0")
+    
+    def test_changed_content_or_docling_version_triggers_conversion(self, tmp_path):
+        src = tmp_path / "policy.pdf"
+        src.write_bytes(b"v1")
+        md = tmp_path / "policy.md"
+        manifest = ConversionManifest(str(tmp_path))
+        self._convert(manifest, src, md)
+        
+        assert manifest.needs_conversion(src, md, "2.1.0")
+        
+        src.write_bytes(b"v2")
+        assert manifest.needs_conversion(src, md, "2.0.0")
+    
+    def test_touched_source_with_same_content_is_skipped(self, tmp_path):
+        src = tmp_path / "policy.pdf"
+        src.write_bytes(b"v1")
+        md = tmp_path / "policy.md"
+        manifest = ConversionManifest(str(tmp_path))
+        self._convert(manifest, src, md)
+        
+        stat = src.stat()
+        os.utime(src, (stat.st_atime, stat.st_mtime + 10))
+        
+        assert not manifest.needs_conversion(src, md, "2.0.0")
+    
+    def test_md_hash_only_trusted_while_markdown_untouched(self, tmp_path):
+        src = tmp_path / "policy.pdf"
+        src.write_bytes(b"v1")
+        md = tmp_path / "policy.md"
+        manifest = ConversionManifest(str(tmp_path))
+        self._convert(manifest, src, md)
+        
+        assert manifest.md_hash(md) is not None
+        
+        md.write_text("hand edited and longer", encoding="utf-8")
+        assert manifest.md_hash(md) is None
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
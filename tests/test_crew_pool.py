@@ -0,0 +1,54 @@
+import threading
+
+from agents.crew_pool import CrewPool
+
+class FakeCrew:
+    # Stands in for PolicyCrew; a pending draft keeps the crew busy until finish_draft() runs its callback
+    def __init__(self):
+        self.resets = 0
+        self._idle_callback = None
+        self.draft_running = False
+
+    def reset(self):
+        self.resets += 1
+
+    def when_idle(self, callback):
+        if self.draft_running:
+            self._idle_callback = callback
+        else:
+            callback()
+
+    def finish_draft(self):
+        self.draft_running = False
+        self._idle_callback()
+
+class TestCrewPool:
+    def test_never_builds_more_than_size(self):
+        pool = CrewPool(2, factory=FakeCrew)
+        pool.warm()
+        
+        for _ in range(5):
+            with pool.acquire():
+                pass
+        
+        assert pool.stats()["created"] == 2
+        assert pool.stats()["reused"] == 5
+    
+    def test_waits_for_a_busy_crew_instead_of_building_one(self):
+        pool = CrewPool(1, factory=FakeCrew)
+        with pool.acquire() as busy_crew:
+            busy_crew.draft_running = True
+        acquired = []
+        held = pool.acquire()
+        waiter = threading.Thread(target=lambda: acquired.append(held.__enter__()))
+        
+        waiter.start()
+        waiter.join(timeout=0.2)
+        assert waiter.is_alive() and not acquired
+        busy_crew.finish_draft()
+        waiter.join(timeout=2)
+        
+        assert acquired == [busy_crew]
+        assert busy_crew.resets == 1
+        assert pool.stats()["created"] == 1
+        assert pool.stats()["waited"] == 1
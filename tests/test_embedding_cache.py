@@ -0,0 +1,96 @@
+import pytest
+from typing import List
+
+from llama_index.core.base.embeddings.base import BaseEmbedding
+
+from config.embedding_cache import CachedEmbedding, EmbeddingCache
+
+class CountingEmbedding(BaseEmbedding):
+    # Embeds a text as [len(text), dim]; the batches it is asked to embed are recorded
+    dim: int = 2
+    batches: List[List[str]] = []
+
+    def _embed(self, text: str) -> List[float]:
+        return [float(len(text))] + [0.0] * (self.dim - 1)
+
+    def _get_query_embedding(self, query):
+        self.batches.append([query])
+        return self._embed(query)
+
+    async def _aget_query_embedding(self, query):
+        return self._get_query_embedding(query)
+
+    def _get_text_embedding(self, text):
+        return self._get_text_embeddings([text])[0]
+
+    def _get_text_embeddings(self, texts):
+        self.batches.append(list(texts))
+        return [self._embed(text) for text in texts]
+
+@pytest.fixture
+def cache(tmp_path):
+    return EmbeddingCache(str(tmp_path / "embeddings.sqlite"), max_entries=100)
+
+class TestEmbeddingCache:
+    def test_round_trip(self, tmp_path):
+        cache = EmbeddingCache(str(tmp_path / "embeddings.sqlite"), max_entries=100)
+        cache.put_many({"a": [0.5, -1.0, 2.0]})
+        
+        found = cache.get_many(["a", "b"])
+        
+        assert found == {"a": [0.5, -1.0, 2.0]}
+        assert cache.hits == 1 and cache.misses == 1
+    
+    def test_evicts_least_recently_used(self, tmp_path):
+        cache = EmbeddingCache(str(tmp_path / "embeddings.sqlite"), max_entries=10)
+        for i in range(10):
+            cache.put_many({f"k{i}": [float(i)]})
+        cache.get_many(["k0"])
+        
+        cache.put_many({"k10": [10.0]})
+        
+        assert "k0" in cache.get_many(["k0"])
+        assert len(cache.get_many([f"k{i}" for i in range(11)])) <= 10
+
+class TestCachedEmbedding:
+    def test_batch_embeds_only_misses(self, cache):
+        model = CountingEmbedding(model_name="counting")
+        embedding = CachedEmbedding(model, cache, dim=2)
+        embedding.get_text_embedding_batch(["gifts", "leave"])
+        
+        embedding.get_text_embedding_batch(["leave", "probation", "gifts", "travel"])
+        
+        assert model.batches == [["gifts", "leave"], ["probation", "travel"]]
+        assert cache.hits == 2 and cache.misses == 4
+    
+    def test_batch_keeps_input_order_and_duplicates(self, cache):
+        model = CountingEmbedding(model_name="counting")
+        embedding = CachedEmbedding(model, cache, dim=2)
+        embedding.get_text_embedding_batch(["probation"])
+        
+        result = embedding.get_text_embedding_batch(["ab", "probation", "abc", "ab"])
+        
+        assert [vector[0] for vector in result] == [2.0, 9.0, 3.0, 2.0]
+        assert model.batches[-1] == ["ab", "abc"]
+    
+    def test_query_and_text_are_cached_apart(self, cache):
+        model = CountingEmbedding(model_name="counting")
+        embedding = CachedEmbedding(model, cache, dim=2)
+        embedding.get_text_embedding("gifts")
+        
+        embedding.get_query_embedding("gifts")
+        embedding.get_query_embedding("gifts")
+        
+        assert model.batches == [["gifts"], ["gifts"]]
+    
+    def test_dim_mismatch_does_not_reuse_vectors(self, cache):
+        CachedEmbedding(CountingEmbedding(model_name="counting"), cache, dim=2).get_text_embedding("gifts")
+        model = CountingEmbedding(model_name="counting", dim=3)
+        
+        vector = CachedEmbedding(model, cache, dim=3).get_text_embedding("gifts")
+        
+        assert len(vector) == 3
+        assert model.batches == [["gifts"]]
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,70 @@
+import pytest
+
+from agents.fast_guardrail import FastGuardrail, BLOCKED, VALID, AMBIGUOUS
+
+class StubEmbedding:
+    """Bag-of-words embedding over a tiny vocabulary so similarity is deterministic offline"""
+    VOCAB = ["procurement", "policies", "policy", "supplier", "purchase", "probation", "employees",
+             "politics", "elections", "weapons", "violence", "war"]
+    
+    def _embed(self, text):
+        words = text.lower().replace(",", " ").replace("?", " ").split()
+        return [float(words.count(term)) + 0.01 for term in self.VOCAB]
+    
+    def get_text_embedding_batch(self, texts):
+        return [self._embed(t) for t in texts]
+    
+    def get_query_embedding(self, query):
+        return self._embed(query)
+
+class TestFastGuardrail:
+    def setup_method(self):
+        self.topics = FastGuardrail.load_topics()
+    
+    def test_topics_loaded_from_agents_yaml(self):
+        assert "Politics" in self.topics
+        assert "bombs" in self.topics["Terrorism"]
+    
+    @pytest.mark.parametrize("query", [
+        "What are your political views on elections?",
+        "How to build weapons?",
+        "How to make a bomb?",
+    ])
+    def test_keyword_blocks(self, query):
+        guardrail = FastGuardrail(self.topics)
+        
+        assert guardrail.classify(query).verdict == BLOCKED
+    
+    def test_word_boundaries_avoid_false_positives(self):
+        guardrail = FastGuardrail(self.topics)
+        
+        assert guardrail.classify("What are the warranty terms in a purchase order?").verdict == AMBIGUOUS
+    
+    def test_weak_terms_defer_to_llm(self):
+        guardrail = FastGuardrail(self.topics, embed_model=StubEmbedding(), valid_threshold=0.99, valid_margin=0.0)
+        
+        assert guardrail.classify("What is the workplace violence policy?").verdict == AMBIGUOUS
+    
+    @pytest.mark.parametrize("query", [
+        "What is the political activity policy for employees?",
+        "How must explosive materials be stored?",
+        "How do I report an employee who tried to steal equipment?",
+    ])
+    def test_extra_terms_defer_to_llm(self, query):
+        guardrail = FastGuardrail(self.topics)
+        
+        result = guardrail.classify(query)
+        
+        assert result.verdict == AMBIGUOUS
+        assert result.topic is not None
+    
+    def test_embedding_check_passes_policy_questions(self):
+        guardrail = FastGuardrail(self.topics, embed_model=StubEmbedding())
+        
+        result = guardrail.classify("What are the procurement policies?")
+        
+        assert result.verdict == VALID
+        assert result.message == "VALID"
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
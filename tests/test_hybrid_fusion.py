@@ -0,0 +1,73 @@
+import threading
+import pytest
+
+from retriever.hybrid import HybridSearchEngine, RRF, WEIGHTED
+from retriever.retriever import RetrievalParams, RetrievedChunk, Retriever
+
+def leg(*scored):
+    return [RetrievedChunk(node_id=node_id, score=score, text=node_id) for node_id, score in scored]
+
+DENSE = leg(("a", 0.82), ("b", 0.80), ("c", 0.55))
+SPARSE = leg(("c", 0.40), ("d", 0.10))
+
+class TestHybridFusion:
+    def test_rrf_rewards_agreement_between_legs(self):
+        engine = HybridSearchEngine(embed_model=None, fusion=RRF, rrf_k=60)
+        
+        fused = engine._fuse(DENSE, SPARSE)
+        
+        assert [chunk.node_id for _, chunk in fused][0] == "c"
+        assert all(0.0 <= score <= 1.0 for score, _ in fused)
+    
+    def test_rrf_weights_shift_the_ranking(self):
+        engine = HybridSearchEngine(embed_model=None, fusion=RRF, rrf_k=60, dense_weight=1.0, sparse_weight=0.0)
+        
+        fused = engine._fuse(DENSE, SPARSE)
+        
+        assert [chunk.node_id for _, chunk in fused][:3] == ["a", "b", "c"]
+    
+    def test_weighted_fusion_normalizes_each_leg(self):
+        engine = HybridSearchEngine(embed_model=None, fusion=WEIGHTED, dense_weight=0.5, sparse_weight=0.5)
+        
+        fused = dict((chunk.node_id, score) for score, chunk in engine._fuse(DENSE, SPARSE))
+        
+        assert fused["a"] == pytest.approx(0.5)
+        assert fused["c"] == pytest.approx(0.5)
+        assert fused["d"] == pytest.approx(0.0)
+    
+    def test_unknown_fusion_rejected(self):
+        with pytest.raises(ValueError):
+            HybridSearchEngine(embed_model=None, fusion="max")
+
+class NativeRetriever(Retriever):
+    # Skips the vector store; the hybrid engine's legs return the canned DENSE and SPARSE results
+    def __init__(self, engine):
+        self.hybrid = engine
+        self.query_engine = object()
+        self._stats_lock = threading.Lock()
+        self.query_count = 0
+        self.error_count = 0
+        self.last_error = None
+        self.last_latency_ms = None
+        self.widened_count = 0
+        self.narrowed_count = 0
+        self.params = RetrievalParams(top_k=3, sparse_top_k=2, min_score=0.5, adaptive=True)
+
+    def _follow_active_table(self):
+        pass
+
+class TestNativeRetrieval:
+    @pytest.mark.parametrize("fusion", [RRF, WEIGHTED])
+    def test_score_cut_offs_do_not_drop_fused_results(self, fusion, monkeypatch):
+        engine = HybridSearchEngine(embed_model=None, fusion=fusion)
+        monkeypatch.setattr(engine, "_dense", lambda query, params: DENSE)
+        monkeypatch.setattr(engine, "_sparse", lambda query, params: SPARSE)
+        retriever = NativeRetriever(engine)
+        
+        chunks = retriever.retrieve("gifts")
+        
+        assert sorted(chunk.node_id for chunk in chunks) == ["a", "b", "c"]
+        assert retriever.widened_count == retriever.narrowed_count == 0
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
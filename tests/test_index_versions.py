@@ -0,0 +1,67 @@
+from datetime import datetime
+
+import pytest
+
+from config.config import Config
+from indexer.db import index_versions
+from indexer.db.index_versions import ACTIVE, BUILDING, FAILED, READY, IndexTables, IndexVersions
+
+class FakeVersions(IndexVersions):
+    def __init__(self, rows, keep):
+        super().__init__(pointer_table="versions", keep=keep)
+        self.rows = rows
+    
+    def versions(self):
+        return [{"version": row[0], "status": row[1], "activated_at": row[2] if len(row) > 2 else None}
+                for row in self.rows]
+
+@pytest.fixture
+def dropped(monkeypatch):
+    tables = []
+    
+    def execute_query(queries, autocommit=False, fetch=False):
+        tables.extend(query.split()[-2] for query, _ in queries if query.startswith("DROP TABLE"))
+    
+    monkeypatch.setattr(index_versions.DBAdmin, "execute_query", staticmethod(execute_query))
+    return tables
+
+class TestIndexVersions:
+    def test_version_tables_are_suffixed(self):
+        tables = IndexTables.for_version(3)
+        
+        assert tables.table_name == f"{Config.TABLE_NAME}_v3"
+        assert tables.manifest_table == f"{Config.MANIFEST_TABLE}_v3"
+        assert tables.chunks_table == f"{Config.CHUNKS_TABLE}_v3"
+    
+    def test_legacy_tables_are_version_zero(self):
+        assert IndexTables.for_version(0).table_name == Config.TABLE_NAME
+    
+    def test_prune_keeps_active_and_rollback_target(self, dropped):
+        FakeVersions([(4, ACTIVE), (3, READY), (2, READY), (1, FAILED)], keep=2).prune()
+        
+        assert f"{Config.TABLE_NAME}_v4" not in dropped
+        assert f"{Config.TABLE_NAME}_v3" not in dropped
+        assert f"{Config.TABLE_NAME}_v2" in dropped
+        assert f"{Config.TABLE_NAME}_v1" in dropped
+    
+    def test_prune_keeps_previous_active_with_keep_one(self, dropped):
+        FakeVersions([(4, ACTIVE), (3, READY), (2, READY)], keep=1).prune()
+        
+        assert f"{Config.TABLE_NAME}_v3" not in dropped
+        assert f"{Config.TABLE_NAME}_v2" in dropped
+    
+    def test_prune_keeps_most_recently_active_target(self, dropped):
+        # v5 was rolled back to v4, then v6 went live: v4 served last and must survive, not the newer v5
+        FakeVersions([(6, ACTIVE), (5, READY, datetime(2026, 1, 1)), (4, READY, datetime(2026, 1, 2))],
+                     keep=2).prune()
+        
+        assert f"{Config.TABLE_NAME}_v4" not in dropped
+        assert f"{Config.TABLE_NAME}_v5" in dropped
+    
+    def test_prune_leaves_newer_builds_alone(self, dropped):
+        FakeVersions([(5, BUILDING), (4, ACTIVE), (2, BUILDING)], keep=1).prune()
+        
+        assert dropped == [f"{Config.TABLE_NAME}_v2", f"{Config.MANIFEST_TABLE}_v2", f"{Config.CHUNKS_TABLE}_v2"]
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
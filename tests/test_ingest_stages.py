@@ -0,0 +1,53 @@
+import threading
+import time
+
+import pytest
+
+from indexer.stages import prefetch
+
+class TestPrefetch:
+    def test_preserves_order(self):
+        assert list(prefetch(iter(range(100)), maxsize=3, name="test")) == list(range(100))
+    
+    def test_producer_stays_within_bound(self):
+        produced = []
+        
+        def items():
+            for i in range(50):
+                produced.append(i)
+                yield i
+        
+        stream = prefetch(items(), maxsize=2, name="test")
+        assert next(stream) == 0
+        time.sleep(0.2)
+        
+        # One item handed out, two buffered and one blocked on put
+        assert len(produced) <= 4
+    
+    def test_producer_error_reaches_consumer(self):
+        def items():
+            yield 1
+            raise ValueError("broken file")
+        
+        stream = prefetch(items(), maxsize=2, name="test")
+        
+        assert next(stream) == 1
+        with pytest.raises(ValueError, match="broken file"):
+            next(stream)
+    
+    def test_producer_stops_when_consumer_does(self):
+        def items():
+            i = 0
+            while True:
+                yield i
+                i += 1
+        
+        stream = prefetch(items(), maxsize=1, name="test-stop")
+        next(stream)
+        stream.close()
+        time.sleep(0.3)
+        
+        assert not any(thread.name == "test-stop" for thread in threading.enumerate())
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
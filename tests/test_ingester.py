@@ -0,0 +1,82 @@
+import json
+import pytest
+from llama_index.core.schema import TextNode
+
+from config.config import Config
+from indexer.ingester import Ingester
+from indexer.loaders.doc_loader import DocumentLoader
+
+@pytest.fixture
+def md_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, "MD_DIR", str(tmp_path))
+    for folder in ("hr", "finance"):
+        (tmp_path / folder).mkdir()
+        (tmp_path / folder / "policy.md").write_text(f"# Source: {folder}.pdf\n\n## Article 1\n\n{folder} rules.",
+                                                     encoding="utf-8")
+    return tmp_path
+
+class TestDocKeys:
+    def test_same_name_in_subfolders_gets_distinct_keys(self, md_dir):
+        ingester = Ingester(None, DocumentLoader())
+        
+        keys = [doc_key for doc_key, _ in ingester._split_files(DocumentLoader().iter_documents(str(md_dir)))]
+        
+        assert sorted(keys) == ["finance/policy.md", "hr/policy.md"]
+        assert sorted(Ingester._doc_key(path) for path in md_dir.rglob("*.md")) == sorted(keys)
+
+class TestChunkIds:
+    def test_ids_ignore_chunk_position(self):
+        before = [TextNode(text="Gifts are declared.", metadata={"heading_path": "Ethics", "page_number": 3})]
+        after = [TextNode(text="Gifts are declared.", metadata={"heading_path": "Ethics", "page_number": 4})]
+        
+        assert Ingester._assign_chunk_ids("hr/policy.md", before) == Ingester._assign_chunk_ids("hr/policy.md", after)
+    
+    def test_ids_follow_content_metadata(self):
+        ethics = [TextNode(text="Gifts are declared.", metadata={"heading_path": "Ethics"})]
+        finance = [TextNode(text="Gifts are declared.", metadata={"heading_path": "Finance"})]
+        
+        assert Ingester._assign_chunk_ids("hr/policy.md", ethics) != Ingester._assign_chunk_ids("hr/policy.md", finance)
+
+class FakeDBAdmin:
+    # Keeps the chunk hashes a previous run stored and records what this run writes
+    def __init__(self, stored):
+        self.stored = stored
+        self.updated = {}
+        self.manifests = {}
+
+    def get_chunk_hashes(self, doc_key):
+        return dict(self.stored)
+
+    def delete_nodes(self, node_ids):
+        pass
+
+    def update_metadata(self, metadata):
+        self.updated.update(metadata)
+
+    def save_doc_manifest(self, doc_key, doc_hash, chunks):
+        self.manifests[doc_key] = chunks
+
+class FakePipeline:
+    def __init__(self):
+        self.written = []
+
+    def run(self, nodes, on_written):
+        batch = list(nodes)
+        self.written += batch
+        on_written(batch)
+
+class TestUnchangedChunks:
+    def test_moved_chunk_keeps_id_and_gets_current_page(self):
+        before = [TextNode(text="Gifts are declared.", metadata={"page_number": 3})]
+        after = [TextNode(text="New article.", metadata={"page_number": 3}),
+                 TextNode(text="Gifts are declared.", metadata={"page_number": 4})]
+        db_admin = FakeDBAdmin(Ingester._assign_chunk_ids("hr/policy.md", before))
+        pipeline = FakePipeline()
+        
+        Ingester(None, DocumentLoader())._ingest_stream(db_admin, pipeline, iter([("hr/policy.md", after)]),
+                                                         {"hr/policy.md": "h2"})
+        
+        assert [node.text for node in pipeline.written] == ["New article."]
+        assert list(db_admin.updated) == [before[0].id_]
+        assert json.loads(db_admin.updated[before[0].id_])["page_number"] == 4
+        assert len(db_admin.manifests["hr/policy.md"]) == 2
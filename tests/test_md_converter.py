@@ -0,0 +1,94 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pypdfium2
+import pytest
+
+import indexer.md_converter as md_converter
+from indexer.md_converter import MDConverter
+
+def write_pdf(path, pages):
+    pdf = pypdfium2.PdfDocument.new()
+    for _ in range(pages):
+        pdf.new_page(612, 792)
+    pdf.save(str(path))
+    pdf.close()
+
+def fake_shard(src_path, page_range):
+    # Later shards finish first, so the merge cannot rely on completion order
+    time.sleep(0.05 / page_range[0] if page_range else 0)
+    return f"pages {page_range}"
+
+class FakeConverter:
+    def __init__(self):
+        self.calls = []
+
+    def convert(self, src_path, page_range=None):
+        self.calls.append(page_range)
+        document = type("Document", (), {"export_to_markdown": lambda _: f"pages {page_range}"})()
+        return type("Result", (), {"document": document})()
+
+@pytest.fixture
+def dirs(tmp_path):
+    (tmp_path / "docs").mkdir()
+    return tmp_path / "docs", tmp_path / "md"
+
+class TestPageRanges:
+    def test_ranges_cover_every_page_once(self, dirs):
+        docs, md = dirs
+        write_pdf(docs / "policy.pdf", 7)
+        converter = MDConverter(str(docs), str(md), workers=2, pages_per_shard=3)
+        
+        assert converter._page_ranges(docs / "policy.pdf") == [(1, 3), (4, 6), (7, 7)]
+    
+    def test_unsharded_and_non_pdf_convert_whole(self, dirs):
+        docs, md = dirs
+        write_pdf(docs / "policy.pdf", 7)
+        (docs / "notes.docx").write_bytes(b"docx")
+        
+        assert MDConverter(str(docs), str(md), workers=2)._page_ranges(docs / "policy.pdf") == [None]
+        assert MDConverter(str(docs), str(md), workers=2, pages_per_shard=3)._page_ranges(docs / "notes.docx") == [None]
+    
+    def test_empty_pdf_is_an_error(self, dirs):
+        docs, md = dirs
+        write_pdf(docs / "empty.pdf", 0)
+        converter = MDConverter(str(docs), str(md), workers=2, pages_per_shard=3)
+        
+        with pytest.raises((ValueError, pypdfium2.PdfiumError)):
+            converter._page_ranges(docs / "empty.pdf")
+
+class TestShardMerge:
+    def test_parallel_shards_merge_in_page_order(self, dirs, monkeypatch):
+        docs, md = dirs
+        write_pdf(docs / "policy.pdf", 7)
+        monkeypatch.setattr(md_converter, "ProcessPoolExecutor", ThreadPoolExecutor)
+        monkeypatch.setattr(md_converter, "_init_worker", lambda: None)
+        monkeypatch.setattr(md_converter, "_convert_shard", fake_shard)
+        
+        MDConverter(str(docs), str(md), workers=3, pages_per_shard=3).convert_all()
+        
+        assert (md / "policy.md").read_text(encoding="utf-8") == (
+            "# Source: policy.pdf\n\npages (1, 3)\n\npages (4, 6)\n\npages (7, 7)")
+    
+    def test_serial_run_shards_too(self, dirs):
+        docs, md = dirs
+        write_pdf(docs / "policy.pdf", 4)
+        converter = MDConverter(str(docs), str(md), workers=2, pages_per_shard=2)
+        converter.workers, converter.converter = 1, FakeConverter()
+        
+        converter.convert_all()
+        
+        assert converter.converter.calls == [(1, 2), (3, 4)]
+        assert (md / "policy.md").read_text(encoding="utf-8").endswith("pages (1, 2)\n\npages (3, 4)")
+    
+    def test_empty_pdf_is_reported(self, dirs, monkeypatch, capsys):
+        docs, md = dirs
+        write_pdf(docs / "empty.pdf", 0)
+        monkeypatch.setattr(md_converter, "ProcessPoolExecutor", ThreadPoolExecutor)
+        monkeypatch.setattr(md_converter, "_init_worker", lambda: None)
+        monkeypatch.setattr(md_converter, "_convert_shard", fake_shard)
+        
+        MDConverter(str(docs), str(md), workers=2, pages_per_shard=3).convert_all()
+        
+        assert not (md / "empty.md").exists()
+        assert "⚠️ Error reading empty.pdf" in capsys.readouterr().out
@@ -0,0 +1,64 @@
+import pytest
+
+from config.config import Config
+from monitoring import metrics
+
+@pytest.fixture(autouse=True)
+def enabled(monkeypatch):
+    monkeypatch.setattr(Config, "METRICS_ENABLED", True)
+    metrics.reset()
+    yield
+    metrics.reset()
+
+def line(text, prefix):
+    return next(l for l in text.splitlines() if l.startswith(prefix))
+
+class TestMetrics:
+    def test_render_histogram_buckets(self):
+        metrics.observe("retrieval", 0.003)
+        metrics.observe("retrieval", 0.2)
+        metrics.observe("retrieval", 500.0)
+
+        text = metrics.render()
+
+        assert "# TYPE rag_stage_duration_seconds histogram" in text
+        assert line(text, 'rag_stage_duration_seconds_bucket{le="0.0025",stage="retrieval",task=""}').endswith(" 0.0")
+        assert line(text, 'rag_stage_duration_seconds_bucket{le="0.005",stage="retrieval",task=""}').endswith(" 1.0")
+        assert line(text, 'rag_stage_duration_seconds_bucket{le="120.0",stage="retrieval",task=""}').endswith(" 2.0")
+        assert line(text, 'rag_stage_duration_seconds_bucket{le="+Inf",stage="retrieval",task=""}').endswith(" 3.0")
+        assert line(text, 'rag_stage_duration_seconds_count{stage="retrieval",task=""}').endswith(" 3.0")
+
+    def test_labels_are_separate_series(self):
+        metrics.observe("crew_task", 1.0, task="guardrail_task")
+        metrics.observe("crew_task", 2.0, task="llm_task")
+
+        text = metrics.render()
+
+        assert line(text, 'rag_stage_duration_seconds_sum{stage="crew_task",task="guardrail_task"}').endswith(" 1.0")
+        assert line(text, 'rag_stage_duration_seconds_sum{stage="crew_task",task="llm_task"}').endswith(" 2.0")
+
+    def test_failed_span_counts_error_and_reraises(self):
+        with pytest.raises(RuntimeError):
+            with metrics.timed("rerank"):
+                raise RuntimeError("model missing")
+        with metrics.timed("rerank"):
+            pass
+
+        text = metrics.render()
+
+        assert line(text, 'rag_stage_duration_seconds_count{stage="rerank",task=""}').endswith(" 2.0")
+        assert line(text, 'rag_stage_errors_total{stage="rerank",task=""}').endswith(" 1.0")
+
+    def test_label_values_are_escaped(self):
+        metrics.observe("crew_task", 1.0, task='say "hi"\n')
+        
+        assert 'task="say \\"hi\\"\\n"' in metrics.render()
+    
+    def test_disabled_records_nothing(self, monkeypatch):
+        monkeypatch.setattr(Config, "METRICS_ENABLED", False)
+
+        with metrics.timed("retrieval"):
+            pass
+        metrics.observe("retrieval", 1.0)
+
+        assert "stage=" not in metrics.render()
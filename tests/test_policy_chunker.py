@@ -0,0 +1,66 @@
+from indexer.policy_chunker import PolicyChunker
+
+BYLAWS = """# Source: hr_bylaws.pdf
+
+## decided the following:
+
+## Article (1)
+
+## Definitions
+
+Employee means any person working for the company.
+
+## Chapter II
+
+## Working Hours
+
+## Article (2) Working Days
+
+Working days are Sunday to Thursday.
+
+## 2.1 Ramadan
+
+Working hours are reduced during Ramadan.
+
+## Article (3) Overtime
+
+Overtime requires prior approval of the line manager.
+"""
+
+def chunker(max_tokens=600):
+    return PolicyChunker(max_tokens, tokenizer=str.split)
+
+class TestPolicyChunker:
+    def test_articles_are_chunk_boundaries(self):
+        chunks = chunker().split_text(BYLAWS)
+        
+        articles = [chunk.metadata.get("article") for chunk in chunks]
+        assert articles == [1, 2, 3]
+        assert chunks[1].text.startswith("## Article (2) Working Days")
+        assert "Ramadan" in chunks[1].text and "Overtime" not in chunks[1].text
+    
+    def test_heading_path_follows_chapters(self):
+        chunks = chunker().split_text(BYLAWS)
+        
+        assert chunks[0].metadata["heading_path"] == "decided the following: > Article (1) Definitions"
+        assert chunks[2].metadata["heading_path"] == "Chapter II Working Hours > Article (3) Overtime"
+    
+    def test_chunks_respect_max_tokens_without_overlap(self):
+        text = "## Article (7) Leave\n\n" + "\n\n".join(
+            f"Paragraph {i} " + " ".join(f"w{i}_{j}" for j in range(8)) for i in range(10))
+        
+        chunks = chunker(max_tokens=25).split_text(text)
+        
+        assert len(chunks) > 1
+        assert all(len(chunk.text.split()) <= 25 for chunk in chunks)
+        body_words = [w for chunk in chunks for w in chunk.text.split() if w.startswith("w")]
+        assert len(body_words) == len(set(body_words)) == 80
+    
+    def test_continuation_chunks_repeat_the_article_heading(self):
+        text = "## Article (7) Leave\n\n" + "\n\n".join(" ".join(["word"] * 15) for _ in range(3))
+        
+        chunks = chunker(max_tokens=20).split_text(text)
+        
+        assert len(chunks) == 3
+        assert all(chunk.text.startswith("## Article (7) Leave") for chunk in chunks)
+        assert all(chunk.metadata["article"] == 7 for chunk in chunks)
@@ -0,0 +1,71 @@
+import threading
+import time
+import pytest
+
+from retriever.query_embedder import QueryEmbedder
+
+class RecordingModel:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.batches = []
+
+    def get_text_embedding_batch(self, texts):
+        time.sleep(self.delay)
+        self.batches.append(list(texts))
+        return [[float(len(text))] for text in texts]
+
+class TestQueryEmbedder:
+    def test_repeated_query_is_served_from_cache(self):
+        model = RecordingModel()
+        embedder = QueryEmbedder(model, cache_size=10, max_batch=8, max_wait_ms=1)
+        
+        first = embedder.get_query_embedding("Probation period  of employees")
+        second = embedder.get_query_embedding("probation period of employees")
+        
+        assert first == second
+        assert len(model.batches) == 1
+        assert embedder.hits == 1
+    
+    def test_concurrent_queries_share_one_batch(self):
+        model = RecordingModel()
+        embedder = QueryEmbedder(model, cache_size=10, max_batch=8, max_wait_ms=50)
+        queries = ["annual leave", "probation", "suppliers", "annual leave"]
+        results = {}
+        threads = [threading.Thread(target=lambda i=i, q=q: results.__setitem__(i, embedder.get_query_embedding(q)))
+                   for i, q in enumerate(queries)]
+        
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        assert [results[i] for i in range(4)] == [[12.0], [9.0], [9.0], [12.0]]
+        assert len(model.batches) == 1
+        assert sorted(model.batches[0]) == ["annual leave", "probation", "suppliers"]
+    
+    def test_model_embeds_query_as_written(self):
+        model = RecordingModel()
+        embedder = QueryEmbedder(model, cache_size=10, max_batch=8, max_wait_ms=1)
+        
+        embedder.get_query_embedding("  Article 3 of the Code of Business Ethics ")
+        
+        assert model.batches == [["  Article 3 of the Code of Business Ethics "]]
+    
+    def test_lru_bound(self):
+        embedder = QueryEmbedder(RecordingModel(), cache_size=2, max_batch=1, max_wait_ms=0)
+        for query in ["a", "bb", "ccc"]:
+            embedder.get_query_embedding(query)
+        
+        assert embedder.stats()["cached"] == 2
+    
+    def test_errors_reach_every_waiter(self):
+        class BrokenModel:
+            def get_text_embedding_batch(self, texts):
+                raise ConnectionError("ollama down")
+        embedder = QueryEmbedder(BrokenModel(), cache_size=2, max_batch=4, max_wait_ms=1)
+        
+        with pytest.raises(ConnectionError):
+            embedder.get_query_embedding("anything")
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
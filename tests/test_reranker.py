@@ -0,0 +1,90 @@
+import pytest
+
+from agents.tools.reranker import RerankerTool
+from retriever.reranker import CrossEncoderReranker
+from retriever.retriever import RetrievedChunk, format_chunks
+
+class OverlapModel:
+    # Stands in for the cross-encoder: scores a pair by shared words and records each forward pass
+    def __init__(self):
+        self.calls = []
+
+    def predict(self, pairs, batch_size=32, show_progress_bar=False):
+        self.calls.append(len(pairs))
+        return [len(set(q.lower().split()) & set(t.lower().rstrip(".").split())) for q, t in pairs]
+
+def chunk(node_id, score, text, page=1):
+    return RetrievedChunk(node_id=node_id, score=score, text=text,
+                          metadata={'doc_source': f"{node_id}.pdf", 'page_number': page})
+
+class TestRerankerTool:
+    def test_picks_highest_scoring_chunk(self):
+        chunks = [chunk("a", 0.61, "Annual leave is 30 days."), chunk("b", 0.87, "Probation lasts six months.", page=4)]
+        
+        result = RerankerTool(top_n=1)._run(documents=chunks)
+        
+        assert result == "Document: b.pdf\nPage: 4\n\nProbation lasts six months."
+    
+    def test_rerank_keeps_chunk_objects(self):
+        chunks = [chunk("a", 0.5, "x"), chunk("b", 0.9, "y")]
+        
+        reranked = RerankerTool(cross_encoder=None).rerank(chunks)
+        
+        assert [c.node_id for c in reranked] == ["b", "a"]
+        assert reranked[0] is chunks[1]
+    
+    def test_legacy_text_with_field_names_in_content(self):
+        text = "See Document: Annex B.\nContent: applies to all suppliers."
+        formatted = format_chunks([chunk("a", 0.9, text), chunk("b", 0.7, "other")])
+        
+        result = RerankerTool(top_n=1)._run(documents=formatted)
+        
+        assert result == f"Document: a.pdf\nPage: 1\n\n{text}"
+    
+    def test_no_documents(self):
+        assert RerankerTool()._run(documents=[]) == "No documents found"
+
+class TestCrossEncoderReranker:
+    def test_scores_candidates_in_one_batch(self):
+        model = OverlapModel()
+        reranker = CrossEncoderReranker(top_n=2, budget_ms=0, model=model)
+        chunks = [chunk("a", 0.9, "Annual leave is 30 days."), chunk("b", 0.8, "Suppliers register online."),
+                  chunk("c", 0.5, "The probation period lasts six months.")]
+        
+        reranked = reranker.rerank("how long is the probation period", chunks)
+        
+        assert [c.node_id for c in reranked] == ["c", "a"]
+        assert model.calls == [3]
+    
+    def test_budget_caps_scored_pairs(self):
+        model = OverlapModel()
+        reranker = CrossEncoderReranker(top_n=1, budget_ms=10, model=model)
+        reranker._pair_ms = 5.0
+        chunks = [chunk(str(i), 1.0 - i / 10, f"text {i}") for i in range(6)]
+        
+        reranker.rerank("text 4", chunks)
+        
+        assert model.calls == [2]
+    
+    def test_budget_applies_to_new_instances_of_shared_model(self, monkeypatch):
+        model = OverlapModel()
+        monkeypatch.setitem(CrossEncoderReranker._models, "shared-test-model", model)
+        monkeypatch.setattr(CrossEncoderReranker, "_pair_costs", {"shared-test-model": 5.0})
+        chunks = [chunk(str(i), 1.0 - i / 10, f"text {i}") for i in range(6)]
+        
+        CrossEncoderReranker("shared-test-model", top_n=1, budget_ms=10).rerank("text 4", chunks)
+        
+        assert model.calls == [2]
+    
+    def test_tool_falls_back_when_model_fails(self):
+        class BrokenModel:
+            def predict(self, *args, **kwargs):
+                raise RuntimeError("model unavailable")
+        tool = RerankerTool(top_n=1, cross_encoder=CrossEncoderReranker(model=BrokenModel()))
+        
+        reranked = tool.rerank([chunk("a", 0.2, "x"), chunk("b", 0.9, "y")], query="y")
+        
+        assert [c.node_id for c in reranked] == ["b"]
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
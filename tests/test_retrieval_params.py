@@ -0,0 +1,140 @@
+import threading
+import pytest
+from collections import OrderedDict
+from dataclasses import replace
+from types import SimpleNamespace
+
+import retriever.retriever as retriever_module
+from retriever.retriever import Retriever, RetrievalParams, RetrievedChunk, format_chunks
+
+def nodes(*scores):
+    return [SimpleNamespace(score=score, node=SimpleNamespace(node_id=str(i), text="", metadata={}))
+            for i, score in enumerate(scores)]
+
+class FakeRetriever(Retriever):
+    # Skips the vector store; each query returns the scores registered for its (top_k, sparse_top_k, ef_search)
+    def __init__(self, results):
+        self.results = results
+        self.queried = []
+        self.widened_count = 0
+        self.narrowed_count = 0
+        self._stats_lock = threading.Lock()
+        self.query_count = 0
+        self.error_count = 0
+        self.last_error = None
+        self.last_latency_ms = None
+        self.hybrid = None
+        self.query_embedder = SimpleNamespace(get_query_embedding=lambda query: [0.0])
+
+    def _follow_active_table(self):
+        pass
+    
+    def _engine_for(self, params):
+        self.queried.append(params.engine_key)
+        return SimpleNamespace(query=lambda query: SimpleNamespace(source_nodes=self.results[params.engine_key]))
+
+PARAMS = RetrievalParams(top_k=4, sparse_top_k=2, min_score=0.0, ef_search=64, adaptive=True,
+                         max_top_k=12, max_ef_search=200, confident_score=0.8, score_gap=0.15)
+
+class TestRetrievalParams:
+    def test_overrides_are_coerced(self):
+        params = RetrievalParams.from_overrides({"top_k": "8", "ef_search": 128, "adaptive": True})
+        
+        assert (params.top_k, params.ef_search, params.adaptive) == (8, 128, True)
+    
+    def test_unknown_override_rejected(self):
+        with pytest.raises(ValueError):
+            RetrievalParams.from_overrides({"topk": 3})
+    
+    def test_out_of_bounds_override_rejected(self):
+        defaults = RetrievalParams()
+        
+        with pytest.raises(ValueError):
+            RetrievalParams.from_overrides({"top_k": defaults.max_top_k + 1})
+        with pytest.raises(ValueError):
+            RetrievalParams.from_overrides({"ef_search": 100000})
+        with pytest.raises(ValueError):
+            RetrievalParams.from_overrides({"sparse_top_k": 0})
+    
+    @pytest.mark.parametrize("name", ["max_top_k", "max_ef_search", "confident_score", "score_gap"])
+    def test_server_side_fields_not_overridable(self, name):
+        with pytest.raises(ValueError):
+            RetrievalParams.from_overrides({name: 1})
+    
+    def test_engine_cache_is_bounded(self, monkeypatch):
+        monkeypatch.setattr(retriever_module, "MAX_ENGINES", 2)
+        retriever = Retriever.__new__(Retriever)
+        retriever._engines, retriever._engines_lock = OrderedDict(), threading.Lock()
+        retriever.index = SimpleNamespace(as_query_engine=lambda **kwargs: object())
+        first = retriever._engine_for(replace(PARAMS, top_k=1))
+        retriever._engine_for(replace(PARAMS, top_k=2))
+        
+        assert retriever._engine_for(replace(PARAMS, top_k=1)) is first
+        retriever._engine_for(replace(PARAMS, top_k=3))
+        
+        assert list(retriever._engines) == [(1, 2, 64), (3, 2, 64)]
+    
+    def test_confident_result_is_narrowed(self):
+        retriever = FakeRetriever({(4, 2, 64): nodes(0.92, 0.61, 0.55, 0.40)})
+        
+        result = retriever._adapt("q", PARAMS, retriever._query("q", PARAMS))
+        
+        assert [n.score for n in result] == [0.92]
+        assert retriever.queried == [(4, 2, 64)]
+    
+    def test_flat_result_is_widened(self):
+        retriever = FakeRetriever({(4, 2, 64): nodes(0.62, 0.60, 0.59, 0.58),
+                                   (12, 6, 200): nodes(0.81, 0.62, 0.60, 0.59, 0.58)})
+        
+        result = retriever._adapt("q", PARAMS, retriever._query("q", PARAMS))
+        
+        assert result[0].score == 0.81
+        assert retriever.queried == [(4, 2, 64), (12, 6, 200)]
+        assert retriever.widened_count == 1
+
+class TestRetrieve:
+    def test_returns_chunks_sorted_and_filtered(self):
+        retriever = FakeRetriever({(4, 2, 64): nodes(0.40, 0.75, 0.20, 0.55)})
+        retriever.query_engine = object()
+        params = replace(PARAMS, adaptive=False, min_score=0.3)
+        
+        chunks = retriever.retrieve("q", params=params)
+        
+        assert all(isinstance(chunk, RetrievedChunk) for chunk in chunks)
+        assert [(chunk.node_id, chunk.score) for chunk in chunks] == [("1", 0.75), ("3", 0.55), ("0", 0.40)]
+        assert retriever.retrieve("q", min_score=0.5, params=params)[-1].score == 0.55
+    
+    def test_search_formats_retrieved_chunks(self):
+        retriever = FakeRetriever({(4, 2, 64): nodes(0.40, 0.75)})
+        retriever.query_engine = object()
+        params = replace(PARAMS, adaptive=False)
+        
+        assert retriever.search("q", params=params) == format_chunks(retriever.retrieve("q", params=params))
+
+class TestRetrievedChunk:
+    def test_from_node_keeps_node_text_and_metadata(self):
+        metadata = {"doc_source": "HR Bylaws.pdf", "page_number": 4}
+        node = SimpleNamespace(node_id="n1", text="Probation lasts six months.", metadata=metadata,
+                               start_char_idx=10, end_char_idx=37)
+        
+        chunk = RetrievedChunk.from_node(SimpleNamespace(score=None, node=node))
+        
+        assert chunk.metadata is metadata
+        assert chunk.text is node.text
+        assert (chunk.score, chunk.start_char_idx, chunk.end_char_idx) == (0.0, 10, 37)
+        assert (chunk.doc_name, chunk.page) == ("HR Bylaws.pdf", 4)
+    
+    def test_missing_metadata_falls_back(self):
+        chunk = RetrievedChunk.from_node(SimpleNamespace(score=0.5, node=SimpleNamespace(node_id="n1", text="x", metadata=None)))
+        
+        assert (chunk.metadata, chunk.doc_name, chunk.page) == ({}, "Unknown Document", "N/A")
+        assert RetrievedChunk("n2", 0.5, "x", {"file_name": "a.md", "page_label": "iv", "page_number": 4}).page == "iv"
+    
+    def test_format_chunks(self):
+        chunk = RetrievedChunk("n1", 0.87, "Probation lasts six months.", {"doc_source": "HR.pdf", "page_number": 4})
+        
+        assert format_chunks([chunk]) == ("--- Source Document ---\nDocument: HR.pdf\nPage: 4\n"
+                                          "Relevance Score: 0.870\nContent: Probation lasts six months.\n\n")
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
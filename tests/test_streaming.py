@@ -0,0 +1,20 @@
+import pytest
+
+from api.streaming import FinalAnswerFilter
+
+class TestFinalAnswerFilter:
+    def test_drops_reasoning_before_marker(self):
+        stream_filter = FinalAnswerFilter()
+        chunks = ["Thought: I now can give", " a great answer\nFinal ", "Answer: The probation", " period is six months."]
+        
+        streamed = "".join(stream_filter.feed(c) for c in chunks)
+        
+        assert streamed == "The probation period is six months."
+    
+    def test_nothing_streamed_without_marker(self):
+        stream_filter = FinalAnswerFilter()
+        
+        assert stream_filter.feed("The answer without a marker") == ""
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])